@@ -0,0 +1,238 @@
+"""In-process ANN indexes over pgvector columns.
+
+The web API owns building and syncing (webapi/services/ann_index_service.py);
+callers use search() and fall back to pgvector when it returns None.
+"""
+
+import importlib.util
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from hunterAgent.core.vector_codec import normalize_l2, to_vector
+
+HNSWLIB_AVAILABLE = importlib.util.find_spec("hnswlib") is not None
+
+_HNSW_M = 16
+_HNSW_EF_CONSTRUCTION = 200
+_HNSW_MIN_CAPACITY = 1024
+
+
+class VectorIndex:
+    """Cosine-distance index keyed by string ids.
+
+    Uses hnswlib when it is installed and an exact float32 matrix scan otherwise.
+    Distances match pgvector's ``<=>`` (1 - cosine similarity).
+    """
+
+    def __init__(self, name: str, dim: int, backend: str = "") -> None:
+        self.name = str(name)
+        self.dim = int(dim)
+        self.backend = backend or ("hnsw" if HNSWLIB_AVAILABLE else "exact")
+        self.lock = threading.RLock()
+        self.ready = False
+        # Opaque sync cursor owned by whoever keeps the index up to date.
+        self.watermark: list[Any] = []
+        self._keys: list[str] = []
+        self._pos: dict[str, int] = {}
+        self._live = np.zeros(0, dtype=bool)
+        self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+        self._hnsw: Any = None
+
+    def __len__(self) -> int:
+        return int(self._live.sum())
+
+    def _new_hnsw(self, capacity: int) -> Any:
+        import hnswlib
+
+        index = hnswlib.Index(space="cosine", dim=self.dim)
+        index.init_index(max_elements=max(_HNSW_MIN_CAPACITY, int(capacity)), ef_construction=_HNSW_EF_CONSTRUCTION, M=_HNSW_M)
+        return index
+
+    def upsert(self, items: list[tuple[str, Any]]) -> int:
+        rows: list[tuple[int, np.ndarray]] = []
+        with self.lock:
+            for key, value in items:
+                vec = to_vector(value)
+                if vec.size != self.dim:
+                    continue
+                i = self._pos.get(key)
+                if i is None:
+                    i = len(self._keys)
+                    self._keys.append(key)
+                    self._pos[key] = i
+                rows.append((i, normalize_l2(vec)))
+            if not rows:
+                return 0
+            n = len(self._keys)
+            if self._live.size < n:
+                self._live = np.concatenate([self._live, np.zeros(n - self._live.size, dtype=bool)])
+            labels = np.asarray([i for i, _ in rows], dtype=np.int64)
+            data = np.vstack([v for _, v in rows]).astype(np.float32, copy=False)
+            if self.backend == "hnsw":
+                if self._hnsw is None:
+                    self._hnsw = self._new_hnsw(n * 2)
+                elif self._hnsw.get_max_elements() < n:
+                    self._hnsw.resize_index(max(n, self._hnsw.get_max_elements() * 2))
+                self._hnsw.add_items(data, labels)
+            else:
+                if self._matrix.shape[0] < n:
+                    grow = np.zeros((n - self._matrix.shape[0], self.dim), dtype=np.float32)
+                    self._matrix = np.vstack([self._matrix, grow])
+                self._matrix[labels] = data
+            self._live[labels] = True
+            return len(rows)
+
+    def remove(self, keys: list[str]) -> int:
+        removed = 0
+        with self.lock:
+            for key in keys:
+                i = self._pos.get(key)
+                if i is None or not self._live[i]:
+                    continue
+                self._live[i] = False
+                if self._hnsw is not None:
+                    try:
+                        self._hnsw.mark_deleted(i)
+                    except RuntimeError:
+                        pass
+                elif i < self._matrix.shape[0]:
+                    self._matrix[i] = 0.0
+                removed += 1
+        return removed
+
+    def keys(self) -> set[str]:
+        with self.lock:
+            return {k for k, i in self._pos.items() if self._live[i]}
+
+    def search(self, vec: Any, k: int) -> list[tuple[str, float]] | None:
+        """Top-k (key, cosine distance) pairs; None when hnswlib cannot answer the query."""
+        q = to_vector(vec)
+        if q.size != self.dim:
+            return []
+        with self.lock:
+            k_use = min(int(k), len(self))
+            if k_use <= 0:
+                return []
+            if self._hnsw is not None:
+                self._hnsw.set_ef(max(64, k_use * 2))
+                try:
+                    labels, dists = self._hnsw.knn_query(q.reshape(1, -1), k=k_use)
+                except RuntimeError:
+                    # e.g. too few live labels left for k after many deletions; the
+                    # caller falls back to pgvector instead of reporting no hits.
+                    return None
+                return [(self._keys[int(i)], float(d)) for i, d in zip(labels[0], dists[0])]
+            n = len(self._keys)
+            sims = self._matrix[:n] @ normalize_l2(q)
+            sims = np.where(self._live[:n], sims, -np.inf)
+            top = np.argpartition(-sims, k_use - 1)[:k_use]
+            top = top[np.argsort(-sims[top], kind="stable")]
+            return [(self._keys[int(i)], float(1.0 - sims[i])) for i in top]
+
+    def save(self, root: Path) -> None:
+        root.mkdir(parents=True, exist_ok=True)
+        base = root / self.name
+        with self.lock:
+            data_path = base.with_suffix(".hnsw" if self._hnsw is not None else ".npy")
+            tmp = data_path.with_name(data_path.name + ".tmp")
+            if self._hnsw is not None:
+                self._hnsw.save_index(str(tmp))
+            else:
+                with tmp.open("wb") as fh:
+                    np.save(fh, self._matrix[: len(self._keys)])
+            os.replace(tmp, data_path)
+            live_path = base.with_suffix(".live.npy")
+            tmp = live_path.with_name(live_path.name + ".tmp")
+            with tmp.open("wb") as fh:
+                np.save(fh, self._live)
+            os.replace(tmp, live_path)
+            meta = {
+                "name": self.name,
+                "dim": self.dim,
+                "backend": "hnsw" if self._hnsw is not None else "exact",
+                "watermark": list(self.watermark),
+                "keys": self._keys,
+            }
+            meta_path = base.with_suffix(".json")
+            tmp = meta_path.with_name(meta_path.name + ".tmp")
+            tmp.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, meta_path)
+
+    def load(self, root: Path) -> bool:
+        base = root / self.name
+        meta_path = base.with_suffix(".json")
+        if not meta_path.exists():
+            return False
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            keys = [str(x) for x in (meta.get("keys") or [])]
+            if int(meta.get("dim") or 0) != self.dim or str(meta.get("backend") or "") != self.backend:
+                return False
+            live = np.load(base.with_suffix(".live.npy"))
+            if live.size != len(keys):
+                return False
+            hnsw = None
+            matrix = np.zeros((0, self.dim), dtype=np.float32)
+            if self.backend == "hnsw":
+                import hnswlib
+
+                hnsw = hnswlib.Index(space="cosine", dim=self.dim)
+                hnsw.load_index(str(base.with_suffix(".hnsw")), max_elements=max(_HNSW_MIN_CAPACITY, len(keys) * 2))
+                if hnsw.get_current_count() != len(keys):
+                    return False
+            else:
+                matrix = np.load(base.with_suffix(".npy")).astype(np.float32, copy=False)
+                if matrix.shape != (len(keys), self.dim):
+                    return False
+        except Exception:
+            return False
+        with self.lock:
+            self._keys = keys
+            self._pos = {k: i for i, k in enumerate(keys)}
+            self._live = live.astype(bool, copy=False)
+            self._matrix = matrix
+            self._hnsw = hnsw
+            self.watermark = list(meta.get("watermark") or [])
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        with self.lock:
+            return {
+                "ready": bool(self.ready),
+                "backend": self.backend,
+                "size": len(self),
+                "slots": len(self._keys),
+                "watermark": list(self.watermark[:1]),
+            }
+
+
+_registry_lock = threading.Lock()
+_indexes: dict[str, VectorIndex] = {}
+
+
+def register_index(index: VectorIndex) -> None:
+    with _registry_lock:
+        _indexes[index.name] = index
+
+
+def unregister_index(name: str) -> None:
+    with _registry_lock:
+        _indexes.pop(str(name), None)
+
+
+def get_index(name: str) -> VectorIndex | None:
+    with _registry_lock:
+        return _indexes.get(str(name))
+
+
+def search(name: str, vec: Any, k: int) -> list[tuple[str, float]] | None:
+    """Top-k (key, cosine distance) pairs, or None when the index is not warm or cannot answer."""
+    index = get_index(name)
+    if index is None or not index.ready:
+        return None
+    return index.search(vec, k)
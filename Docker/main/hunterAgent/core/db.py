@@ -1,5 +1,4 @@
 import logging
-import re
 import time
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Sequence, Tuple
@@ -9,7 +8,9 @@ import psycopg
 from psycopg.rows import dict_row
 from psycopg_pool import ConnectionPool
 
+from hunterAgent.core import ann_index
 from hunterAgent.core.config import Settings
+from hunterAgent.core.vector_codec import ensure_vector, to_vector
 
 
 logger = logging.getLogger(__name__)
@@ -55,7 +56,13 @@ def _get_pool(settings: Settings) -> ConnectionPool:
 
 def get_db_connection(settings: Settings):
     pool = _get_pool(settings)
-    return _PooledConnection(pool, pool.getconn())
+    conn = pool.getconn()
+    try:
+        ensure_vector(conn)
+    except Exception:
+        pool.putconn(conn)
+        raise
+    return _PooledConnection(pool, conn)
 
 
 @dataclass
@@ -70,7 +77,7 @@ _hot_tag_cache: Optional[HotTagCache] = None
 def get_hot_tags(settings: Settings) -> List[str]:
     """Return frequent tags from works.tags.
 
-    Cached in-process to avoid a full-table unnest per request.
+    Reads the trigger-maintained tag_stats dictionary; cached in-process on top.
     """
 
     global _hot_tag_cache
@@ -80,11 +87,10 @@ def get_hot_tags(settings: Settings) -> List[str]:
             return list(_hot_tag_cache.tags)
 
     sql = (
-        "SELECT tag, count(*) as freq "
-        "FROM (SELECT unnest(tags) as tag FROM works) as t "
-        "GROUP BY tag "
-        "HAVING count(*) > %s "
-        "ORDER BY freq DESC"
+        "SELECT tag, frequency as freq "
+        "FROM tag_stats "
+        "WHERE source = 'works' AND frequency > %s "
+        "ORDER BY frequency DESC"
     )
 
     conn = get_db_connection(settings)
@@ -170,40 +176,23 @@ def get_works_by_date_added(
         conn.close()
 
 
-def _vector_literal(vec: List[float]) -> str:
-    return "[" + ",".join(repr(float(x)) for x in vec) + "]"
-
-
-def _parse_vector_text(text: str) -> List[float]:
-    s = str(text or "").strip()
-    if not s:
-        return []
-    if s.startswith("[") and s.endswith("]"):
-        s = s[1:-1]
-    if not s.strip():
-        return []
-    parts = re.split(r"\s*,\s*", s.strip())
-    out: List[float] = []
-    for p in parts:
-        if not p:
-            continue
-        out.append(float(p))
-    return out
+def _vector_list(value: Any) -> List[float]:
+    return to_vector(value).tolist()
 
 
 def get_visual_embedding_by_arcid(settings: Settings, arcid: str) -> Optional[Dict[str, Any]]:
     sql = (
-        "SELECT arcid, title, visual_embedding::text as visual_vec "
+        "SELECT arcid, title, visual_embedding as visual_vec "
         "FROM works WHERE arcid = %s AND visual_embedding IS NOT NULL LIMIT 1"
     )
     conn = get_db_connection(settings)
     try:
-        with conn.cursor(row_factory=dict_row) as cur:
+        with conn.cursor(row_factory=dict_row, binary=True) as cur:
             cur.execute(sql, (str(arcid),))
             row = cur.fetchone()
             if not row:
                 return None
-            vec = _parse_vector_text(str(row.get("visual_vec") or ""))
+            vec = _vector_list(row.get("visual_vec"))
             if not vec:
                 return None
             return {"arcid": str(row.get("arcid")), "title": row.get("title"), "visual_embedding": vec}
@@ -216,7 +205,7 @@ def get_visual_embedding_by_title(settings: Settings, title: str) -> Optional[Di
     if not t:
         return None
     sql = (
-        "SELECT arcid, title, visual_embedding::text as visual_vec "
+        "SELECT arcid, title, visual_embedding as visual_vec "
         "FROM works "
         "WHERE visual_embedding IS NOT NULL "
         "AND (title = %s OR title ILIKE %s) "
@@ -225,12 +214,12 @@ def get_visual_embedding_by_title(settings: Settings, title: str) -> Optional[Di
     )
     conn = get_db_connection(settings)
     try:
-        with conn.cursor(row_factory=dict_row) as cur:
+        with conn.cursor(row_factory=dict_row, binary=True) as cur:
             cur.execute(sql, (t, f"%{t}%", t))
             row = cur.fetchone()
             if not row:
                 return None
-            vec = _parse_vector_text(str(row.get("visual_vec") or ""))
+            vec = _vector_list(row.get("visual_vec"))
             if not vec:
                 return None
             return {"arcid": str(row.get("arcid")), "title": row.get("title"), "visual_embedding": vec}
@@ -249,8 +238,8 @@ def search_by_text(
     if not q:
         return []
     like = f"%{q}%"
-    where = "(title ILIKE %s OR description ILIKE %s OR array_to_string(tags, ' ') ILIKE %s)"
-    params: List[Any] = [like, like, like]
+    where = "(search_text LIKE lower(%s) OR description ILIKE %s)"
+    params: List[Any] = [like, like]
     if tags:
         where += " AND tags && %s"
         params.append(list(tags))
@@ -276,7 +265,11 @@ def search_by_desc_vector(
 ) -> List[str]:
     if not query_vec:
         return []
-    v = _vector_literal(query_vec)
+    if not tags:
+        hits = ann_index.search("works_desc", query_vec, int(limit))
+        if hits is not None:
+            return [key for key, _ in hits]
+    v = to_vector(query_vec)
     where = "desc_embedding IS NOT NULL"
     params: List[Any] = []
     if tags:
@@ -305,7 +298,11 @@ def search_by_visual_vector(
 ) -> List[str]:
     if not query_vec:
         return []
-    v = _vector_literal(query_vec)
+    if not tags:
+        hits = ann_index.search("works_visual", query_vec, int(limit))
+        if hits is not None:
+            return [key for key, _ in hits]
+    v = to_vector(query_vec)
     where = "visual_embedding IS NOT NULL"
     params: List[Any] = []
     if tags:
@@ -333,7 +330,7 @@ def get_profile_samples_from_reads(
 ) -> List[Dict[str, Any]]:
     sql = (
         "SELECT e.arcid, e.read_time, w.title, w.tags, "
-        "w.visual_embedding::text as visual_vec, w.page_visual_embedding::text as page_visual_vec "
+        "w.visual_embedding as visual_vec, w.page_visual_embedding as page_visual_vec "
         "FROM read_events e "
         "JOIN works w ON w.arcid = e.arcid "
         "WHERE e.read_time >= %s AND e.read_time < %s "
@@ -342,14 +339,14 @@ def get_profile_samples_from_reads(
     )
     conn = get_db_connection(settings)
     try:
-        with conn.cursor(row_factory=dict_row) as cur:
+        with conn.cursor(row_factory=dict_row, binary=True) as cur:
             cur.execute(sql, (int(start_epoch), int(end_epoch), int(limit)))
             rows = cur.fetchall() or []
             out: List[Dict[str, Any]] = []
             for r in rows:
                 d = dict(r)
-                d["visual_embedding"] = _parse_vector_text(str(d.pop("visual_vec", "") or ""))
-                d["page_visual_embedding"] = _parse_vector_text(str(d.pop("page_visual_vec", "") or ""))
+                d["visual_embedding"] = _vector_list(d.pop("visual_vec", None))
+                d["page_visual_embedding"] = _vector_list(d.pop("page_visual_vec", None))
                 out.append(d)
             return out
     finally:
@@ -363,7 +360,7 @@ def get_profile_samples_from_inventory(
     limit: int = 800,
 ) -> List[Dict[str, Any]]:
     sql = (
-        "SELECT arcid, title, tags, visual_embedding::text as visual_vec, page_visual_embedding::text as page_visual_vec "
+        "SELECT arcid, title, tags, visual_embedding as visual_vec, page_visual_embedding as page_visual_vec "
         "FROM works "
         "WHERE date_added IS NOT NULL "
         "AND (CASE WHEN date_added >= 100000000000 THEN date_added / 1000 ELSE date_added END) >= %s "
@@ -373,14 +370,14 @@ def get_profile_samples_from_inventory(
     )
     conn = get_db_connection(settings)
     try:
-        with conn.cursor(row_factory=dict_row) as cur:
+        with conn.cursor(row_factory=dict_row, binary=True) as cur:
             cur.execute(sql, (int(start_epoch), int(end_epoch), int(limit)))
             rows = cur.fetchall() or []
             out: List[Dict[str, Any]] = []
             for r in rows:
                 d = dict(r)
-                d["visual_embedding"] = _parse_vector_text(str(d.pop("visual_vec", "") or ""))
-                d["page_visual_embedding"] = _parse_vector_text(str(d.pop("page_visual_vec", "") or ""))
+                d["visual_embedding"] = _vector_list(d.pop("visual_vec", None))
+                d["page_visual_embedding"] = _vector_list(d.pop("page_visual_vec", None))
                 out.append(d)
             return out
     finally:
@@ -395,7 +392,7 @@ def get_eh_candidates_by_period(
 ) -> List[Dict[str, Any]]:
     sql = (
         "SELECT gid, token, eh_url, ex_url, title, title_jpn, tags, tags_translated, posted, "
-        "cover_embedding::text as cover_vec "
+        "cover_embedding as cover_vec "
         "FROM eh_works "
         "WHERE posted IS NOT NULL "
         "AND posted >= %s AND posted < %s "
@@ -404,13 +401,13 @@ def get_eh_candidates_by_period(
     )
     conn = get_db_connection(settings)
     try:
-        with conn.cursor(row_factory=dict_row) as cur:
+        with conn.cursor(row_factory=dict_row, binary=True) as cur:
             cur.execute(sql, (int(start_epoch), int(end_epoch), int(limit)))
             rows = cur.fetchall() or []
             out: List[Dict[str, Any]] = []
             for r in rows:
                 d = dict(r)
-                d["cover_embedding"] = _parse_vector_text(str(d.pop("cover_vec", "") or ""))
+                d["cover_embedding"] = _vector_list(d.pop("cover_vec", None))
                 out.append(d)
             return out
     finally:
@@ -428,11 +425,8 @@ def search_eh_by_text(
     if not q:
         return []
     like = f"%{q}%"
-    where = (
-        "(title ILIKE %s OR title_jpn ILIKE %s OR "
-        "array_to_string(tags, ' ') ILIKE %s OR array_to_string(tags_translated, ' ') ILIKE %s)"
-    )
-    params: List[Any] = [like, like, like, like]
+    where = "search_text LIKE lower(%s)"
+    params: List[Any] = [like]
     if tags:
         where += " AND tags && %s"
         params.append(list(tags))
@@ -464,7 +458,11 @@ def search_eh_by_cover_vector(
 ) -> List[str]:
     if not query_vec:
         return []
-    v = _vector_literal(query_vec)
+    if not tags:
+        hits = ann_index.search("eh_cover", query_vec, int(limit))
+        if hits is not None:
+            return [f"eh:{key}" for key, _ in hits]
+    v = to_vector(query_vec)
     where = "cover_embedding IS NOT NULL"
     params: List[Any] = []
     if tags:
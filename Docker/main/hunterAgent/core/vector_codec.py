@@ -0,0 +1,176 @@
+"""Binary pgvector codec: vectors load as float32 NumPy arrays and NumPy arrays
+dump in pgvector's binary format, so embeddings never round-trip through text."""
+
+import struct
+from typing import Any
+
+import numpy as np
+from psycopg import AsyncConnection, Connection
+from psycopg.adapt import Dumper, Loader
+from psycopg.pq import Format
+from psycopg.types import TypeInfo
+
+_HEADER = struct.Struct(">HH")
+_EMPTY = np.zeros(0, dtype=np.float32)
+
+
+def parse_vector_text(text: Any) -> np.ndarray:
+    if isinstance(text, (bytes, bytearray, memoryview)):
+        text = bytes(text).decode("ascii", errors="ignore")
+    s = str(text or "").strip()
+    if s.startswith("[") and s.endswith("]"):
+        s = s[1:-1]
+    if not s.strip():
+        return _EMPTY.copy()
+    try:
+        return np.array(s.split(","), dtype=np.float32)
+    except ValueError:
+        out: list[float] = []
+        for part in s.split(","):
+            try:
+                out.append(float(part))
+            except ValueError:
+                continue
+        return np.asarray(out, dtype=np.float32)
+
+
+def to_vector(value: Any) -> np.ndarray:
+    if value is None:
+        return _EMPTY.copy()
+    if isinstance(value, np.ndarray):
+        return value.astype(np.float32, copy=False).reshape(-1)
+    if isinstance(value, (str, bytes, bytearray, memoryview)):
+        return parse_vector_text(value)
+    try:
+        return np.asarray(list(value), dtype=np.float32).reshape(-1)
+    except (TypeError, ValueError):
+        return _EMPTY.copy()
+
+
+def vector_literal(vec: Any) -> str:
+    arr = to_vector(vec)
+    return "[" + ",".join(repr(float(x)) for x in arr.tolist()) + "]"
+
+
+def normalize_l2(vec: Any) -> np.ndarray:
+    arr = to_vector(vec)
+    n = float(np.linalg.norm(arr)) if arr.size else 0.0
+    if n <= 0:
+        return arr
+    return (arr / n).astype(np.float32, copy=False)
+
+
+def project_dim(vec: Any, dim: int) -> np.ndarray:
+    arr = to_vector(vec)
+    if arr.size == 0 or arr.size == dim:
+        return arr
+    if arr.size > dim:
+        return arr[:dim]
+    out = np.zeros(dim, dtype=np.float32)
+    out[: arr.size] = arr
+    return out
+
+
+def mix_work_visual(cover_vec: Any, page_vec: Any, cover_weight: float = 0.6) -> np.ndarray:
+    c = to_vector(cover_vec)
+    p = to_vector(page_vec)
+    if c.size and p.size and c.size == p.size:
+        return normalize_l2(cover_weight * c + (1.0 - cover_weight) * p)
+    if c.size:
+        return normalize_l2(c)
+    if p.size:
+        return normalize_l2(p)
+    return _EMPTY.copy()
+
+
+def cosine(a: Any, b: Any) -> float:
+    va = to_vector(a)
+    vb = to_vector(b)
+    n = min(va.size, vb.size)
+    if n <= 0:
+        return 0.0
+    va = va[:n]
+    vb = vb[:n]
+    denom = float(np.linalg.norm(va)) * float(np.linalg.norm(vb))
+    if denom <= 0:
+        return 0.0
+    return float(np.dot(va, vb) / denom)
+
+
+def stack_vectors(vectors: list[np.ndarray], dim: int) -> np.ndarray:
+    if not vectors:
+        return np.zeros((0, dim), dtype=np.float32)
+    return np.vstack([project_dim(v, dim) for v in vectors]).astype(np.float32, copy=False)
+
+
+class VectorTextLoader(Loader):
+    format = Format.TEXT
+
+    def load(self, data: Any) -> np.ndarray:
+        return parse_vector_text(data)
+
+
+class VectorBinaryLoader(Loader):
+    format = Format.BINARY
+
+    def load(self, data: Any) -> np.ndarray:
+        buf = bytes(data)
+        dim, _unused = _HEADER.unpack_from(buf)
+        return np.frombuffer(buf, dtype=">f4", count=dim, offset=_HEADER.size).astype(np.float32)
+
+
+class VectorTextDumper(Dumper):
+    format = Format.TEXT
+
+    def dump(self, obj: Any) -> bytes:
+        return vector_literal(obj).encode("ascii")
+
+
+class VectorBinaryDumper(Dumper):
+    format = Format.BINARY
+
+    def dump(self, obj: Any) -> bytes:
+        arr = to_vector(obj)
+        return _HEADER.pack(int(arr.size), 0) + arr.astype(">f4", copy=False).tobytes()
+
+
+def _register_info(conn: Connection | AsyncConnection, info: TypeInfo | None) -> bool:
+    if info is None:
+        return False
+    info.register(conn)
+    adapters = conn.adapters
+    adapters.register_loader(info.oid, VectorTextLoader)
+    adapters.register_loader(info.oid, VectorBinaryLoader)
+    adapters.register_dumper(np.ndarray, type("VectorTextDumper", (VectorTextDumper,), {"oid": info.oid}))
+    adapters.register_dumper(np.ndarray, type("VectorBinaryDumper", (VectorBinaryDumper,), {"oid": info.oid}))
+    return True
+
+
+def register_vector(conn: Connection) -> bool:
+    try:
+        info = TypeInfo.fetch(conn, "vector")
+    finally:
+        if not conn.autocommit:
+            conn.rollback()
+    return _register_info(conn, info)
+
+
+async def register_vector_async(conn: AsyncConnection) -> bool:
+    try:
+        info = await TypeInfo.fetch(conn, "vector")
+    finally:
+        if not conn.autocommit:
+            await conn.rollback()
+    return _register_info(conn, info)
+
+
+def ensure_vector(conn: Connection) -> bool:
+    if conn.adapters.types.get("vector") is not None:
+        return True
+    return register_vector(conn)
+
+
+async def ensure_vector_async(conn: AsyncConnection) -> bool:
+    if conn.adapters.types.get("vector") is not None:
+        return True
+    return await register_vector_async(conn)
@@ -7,6 +7,8 @@ BEGIN;
 
 -- pgvector
 CREATE EXTENSION IF NOT EXISTS vector;
+-- trigram indexes for substring text search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 CREATE TABLE IF NOT EXISTS works (
     arcid         text PRIMARY KEY,
@@ -72,6 +74,139 @@ CREATE INDEX IF NOT EXISTS idx_works_desc_vec ON works USING hnsw (desc_embeddin
 CREATE INDEX IF NOT EXISTS idx_works_visual_vec ON works USING hnsw (visual_embedding vector_cosine_ops);
 CREATE INDEX IF NOT EXISTS idx_works_page_visual_vec ON works USING hnsw (page_visual_embedding vector_cosine_ops);
 
+-- Embedding change tracking (used to keep in-process ANN indexes in sync).
+-- Only bumped when a vector column changes, so metadata re-ingests stay cheap.
+ALTER TABLE works ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now();
+
+CREATE OR REPLACE FUNCTION works_touch_embedding_updated_at() RETURNS trigger AS $$
+BEGIN
+    IF NEW.visual_embedding IS DISTINCT FROM OLD.visual_embedding
+       OR NEW.page_visual_embedding IS DISTINCT FROM OLD.page_visual_embedding
+       OR NEW.desc_embedding IS DISTINCT FROM OLD.desc_embedding THEN
+        NEW.updated_at := now();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_works_embedding_updated_at ON works;
+CREATE TRIGGER trg_works_embedding_updated_at
+BEFORE UPDATE ON works
+FOR EACH ROW EXECUTE FUNCTION works_touch_embedding_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_works_updated_at ON works (updated_at, arcid);
+
+-- Lower-cased title + tag text, maintained by trigger and served by a trigram index,
+-- so substring search does not re-stringify every tag array per query.
+-- Title and tags are newline-separated so a match cannot straddle them.
+ALTER TABLE works ADD COLUMN IF NOT EXISTS search_text text NOT NULL DEFAULT '';
+
+CREATE OR REPLACE FUNCTION works_refresh_search_text() RETURNS trigger AS $$
+BEGIN
+    NEW.search_text := lower(coalesce(NEW.title, '') || E'\n' || array_to_string(NEW.tags, ' '));
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_works_search_text ON works;
+CREATE TRIGGER trg_works_search_text
+BEFORE INSERT OR UPDATE OF title, tags ON works
+FOR EACH ROW EXECUTE FUNCTION works_refresh_search_text();
+
+UPDATE works
+SET search_text = lower(coalesce(title, '') || E'\n' || array_to_string(tags, ' '))
+WHERE search_text = '';
+
+CREATE INDEX IF NOT EXISTS idx_works_search_text_trgm ON works USING gin (search_text gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_works_description_trgm ON works USING gin (description gin_trgm_ops);
+
+-- Item fields derived from tags, computed once at write time instead of per
+-- result row: category (same rules as the web API's _category_from_tags) and
+-- the first e-hentai / exhentai "source:" URL.
+ALTER TABLE works ADD COLUMN IF NOT EXISTS category text;
+ALTER TABLE works ADD COLUMN IF NOT EXISTS source_eh_url text NOT NULL DEFAULT '';
+ALTER TABLE works ADD COLUMN IF NOT EXISTS source_ex_url text NOT NULL DEFAULT '';
+
+CREATE OR REPLACE FUNCTION tags_category(p_tags text[], p_fallback text DEFAULT '') RETURNS text AS $$
+    SELECT coalesce(
+        (SELECT c FROM unnest(cats) c WHERE c = lower(btrim(coalesce(p_fallback, '')))),
+        (
+            SELECT x.c
+            FROM (
+                SELECT ord,
+                       CASE WHEN lower(btrim(tag)) LIKE 'category:%'
+                            THEN btrim(substr(lower(btrim(tag)), 10))
+                            ELSE lower(btrim(tag)) END AS c
+                FROM unnest(p_tags) WITH ORDINALITY AS t(tag, ord)
+            ) x
+            WHERE x.c = ANY(cats)
+            ORDER BY x.ord
+            LIMIT 1
+        ),
+        ''
+    )
+    FROM (SELECT ARRAY[
+        'doujinshi', 'manga', 'image set', 'game cg', 'artist cg',
+        'cosplay', 'non-h', 'asian porn', 'western', 'misc'
+    ] AS cats) k
+$$ LANGUAGE sql IMMUTABLE;
+
+-- p_ex selects exhentai.org URLs; otherwise the first e-hentai.org one that is not exhentai.
+CREATE OR REPLACE FUNCTION tags_source_url(p_tags text[], p_ex boolean) RETURNS text AS $$
+    SELECT coalesce((
+        SELECT u
+        FROM (
+            SELECT ord, CASE WHEN v ~ '^https?://' THEN v ELSE 'https://' || v END AS u
+            FROM (
+                SELECT ord, btrim(substr(btrim(tag), 8)) AS v
+                FROM unnest(p_tags) WITH ORDINALITY AS t(tag, ord)
+                WHERE lower(btrim(tag)) LIKE 'source:%'
+            ) s
+            WHERE v <> ''
+        ) x
+        WHERE CASE WHEN p_ex THEN position('exhentai.org' IN u) > 0
+                   ELSE position('exhentai.org' IN u) = 0 AND position('e-hentai.org' IN u) > 0 END
+        ORDER BY ord
+        LIMIT 1
+    ), '')
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION works_refresh_tag_fields() RETURNS trigger AS $$
+BEGIN
+    NEW.category := tags_category(NEW.tags);
+    NEW.source_eh_url := tags_source_url(NEW.tags, false);
+    NEW.source_ex_url := tags_source_url(NEW.tags, true);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_works_tag_fields ON works;
+CREATE TRIGGER trg_works_tag_fields
+BEFORE INSERT OR UPDATE OF tags ON works
+FOR EACH ROW EXECUTE FUNCTION works_refresh_tag_fields();
+
+UPDATE works
+SET category = tags_category(tags),
+    source_eh_url = tags_source_url(tags, false),
+    source_ex_url = tags_source_url(tags, true)
+WHERE category IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_works_category ON works (category);
+
+-- Optional per-page SigLIP vectors (WORKS_PAGE_MAXSIM_ENABLED): one row per sampled
+-- inner page, so image search can rank a work by its best-matching page (max-sim)
+-- instead of only the averaged works.page_visual_embedding.
+CREATE TABLE IF NOT EXISTS work_page_embeddings (
+    arcid       text NOT NULL REFERENCES works(arcid) ON DELETE CASCADE,
+    page_no     integer NOT NULL,
+    embedding   vector(1152) NOT NULL,
+    updated_at  timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (arcid, page_no)
+);
+
+CREATE INDEX IF NOT EXISTS idx_work_page_embeddings_vec ON work_page_embeddings USING hnsw (embedding vector_cosine_ops);
+CREATE INDEX IF NOT EXISTS idx_work_page_embeddings_updated_at ON work_page_embeddings (updated_at, arcid, page_no);
+
 CREATE TABLE IF NOT EXISTS read_events (
     id           bigserial PRIMARY KEY,
     arcid        text NOT NULL REFERENCES works(arcid) ON DELETE CASCADE,
@@ -165,6 +300,203 @@ CREATE INDEX IF NOT EXISTS idx_eh_works_cover_status ON eh_works (cover_embeddin
 CREATE INDEX IF NOT EXISTS idx_eh_works_tags_gin ON eh_works USING gin (tags);
 CREATE INDEX IF NOT EXISTS idx_eh_works_tags_translated_gin ON eh_works USING gin (tags_translated);
 CREATE INDEX IF NOT EXISTS idx_eh_works_cover_vec ON eh_works USING hnsw (cover_embedding vector_cosine_ops);
+CREATE INDEX IF NOT EXISTS idx_eh_works_updated_at ON eh_works (updated_at, gid, token);
+
+-- Same maintained search text as works: titles on the first line, then raw and translated tags.
+ALTER TABLE eh_works ADD COLUMN IF NOT EXISTS search_text text NOT NULL DEFAULT '';
+
+CREATE OR REPLACE FUNCTION eh_works_refresh_search_text() RETURNS trigger AS $$
+BEGIN
+    NEW.search_text := lower(
+        coalesce(NEW.title, '') || E'\n' || coalesce(NEW.title_jpn, '') || E'\n'
+        || array_to_string(NEW.tags, ' ') || E'\n' || array_to_string(NEW.tags_translated, ' ')
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_eh_works_search_text ON eh_works;
+CREATE TRIGGER trg_eh_works_search_text
+BEFORE INSERT OR UPDATE OF title, title_jpn, tags, tags_translated ON eh_works
+FOR EACH ROW EXECUTE FUNCTION eh_works_refresh_search_text();
+
+UPDATE eh_works
+SET search_text = lower(
+    coalesce(title, '') || E'\n' || coalesce(title_jpn, '') || E'\n'
+    || array_to_string(tags, ' ') || E'\n' || array_to_string(tags_translated, ' ')
+)
+WHERE search_text = '';
+
+CREATE INDEX IF NOT EXISTS idx_eh_works_search_text_trgm ON eh_works USING gin (search_text gin_trgm_ops);
+
+-- Category as the web API derives it for EH rows (API category first, then tags),
+-- so category filters on eh_works are index lookups.
+CREATE INDEX IF NOT EXISTS idx_eh_works_tags_category ON eh_works (tags_category(tags, category));
+
+-- Tag dictionary: per-source tag frequencies, maintained by statement-level triggers
+-- on works/eh_works so readers never unnest the whole library. Sources are
+-- 'works' (works.tags), 'eh' (eh_works.tags), 'eh_translated' (eh_works.tags_translated)
+-- plus 'all', the sum across sources.
+CREATE TABLE IF NOT EXISTS tag_stats (
+    tag        text NOT NULL,
+    source     text NOT NULL,
+    namespace  text NOT NULL DEFAULT '',
+    frequency  bigint NOT NULL DEFAULT 0,
+    last_seen  timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (tag, source)
+);
+
+CREATE INDEX IF NOT EXISTS idx_tag_stats_source_freq ON tag_stats (source, frequency DESC);
+CREATE INDEX IF NOT EXISTS idx_tag_stats_tag_trgm ON tag_stats USING gin (tag gin_trgm_ops);
+
+CREATE OR REPLACE FUNCTION tag_stats_apply(p_source text, p_added text[], p_removed text[]) RETURNS void AS $$
+BEGIN
+    IF coalesce(cardinality(p_added), 0) = 0 AND coalesce(cardinality(p_removed), 0) = 0 THEN
+        RETURN;
+    END IF;
+    -- Fixed (source, tag) order keeps row locks consistent between concurrent writers.
+    INSERT INTO tag_stats AS s (tag, source, namespace, frequency, last_seen)
+    SELECT d.tag, src.source,
+           CASE WHEN position(':' IN d.tag) > 0 THEN split_part(d.tag, ':', 1) ELSE '' END,
+           d.n, now()
+    FROM (
+        SELECT tag, sum(n)::bigint AS n
+        FROM (
+            SELECT unnest(coalesce(p_added, ARRAY[]::text[])) AS tag, 1 AS n
+            UNION ALL
+            SELECT unnest(coalesce(p_removed, ARRAY[]::text[])) AS tag, -1 AS n
+        ) x
+        WHERE tag IS NOT NULL AND tag <> ''
+        GROUP BY tag
+        HAVING sum(n) <> 0
+    ) d
+    CROSS JOIN (VALUES (p_source), ('all')) AS src(source)
+    ORDER BY src.source, d.tag
+    ON CONFLICT (tag, source) DO UPDATE
+    SET frequency = s.frequency + EXCLUDED.frequency,
+        last_seen = CASE WHEN EXCLUDED.frequency > 0 THEN EXCLUDED.last_seen ELSE s.last_seen END;
+
+    IF coalesce(cardinality(p_removed), 0) > 0 THEN
+        DELETE FROM tag_stats WHERE source IN (p_source, 'all') AND frequency <= 0;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION works_tag_stats_sync() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM tag_stats_apply('works', (SELECT array_agg(t) FROM new_rows, unnest(new_rows.tags) t), NULL);
+    ELSIF TG_OP = 'UPDATE' THEN
+        -- Most updates (sync touching last_seen_at, embedding writes) leave tags alone;
+        -- only rows whose tags changed contribute. The full join keeps key changes counted.
+        PERFORM tag_stats_apply(
+            'works',
+            (SELECT array_agg(t) FROM old_rows o FULL JOIN new_rows n ON n.arcid = o.arcid, unnest(n.tags) t
+             WHERE o.tags IS DISTINCT FROM n.tags),
+            (SELECT array_agg(t) FROM old_rows o FULL JOIN new_rows n ON n.arcid = o.arcid, unnest(o.tags) t
+             WHERE o.tags IS DISTINCT FROM n.tags)
+        );
+    ELSE
+        PERFORM tag_stats_apply('works', NULL, (SELECT array_agg(t) FROM old_rows, unnest(old_rows.tags) t));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION eh_works_tag_stats_sync() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM tag_stats_apply('eh', (SELECT array_agg(t) FROM new_rows, unnest(new_rows.tags) t), NULL);
+        PERFORM tag_stats_apply('eh_translated', (SELECT array_agg(t) FROM new_rows, unnest(new_rows.tags_translated) t), NULL);
+    ELSIF TG_OP = 'UPDATE' THEN
+        -- Only rows whose tag arrays changed contribute, as in works_tag_stats_sync.
+        PERFORM tag_stats_apply(
+            'eh',
+            (SELECT array_agg(t) FROM old_rows o FULL JOIN new_rows n ON n.gid = o.gid AND n.token = o.token, unnest(n.tags) t
+             WHERE o.tags IS DISTINCT FROM n.tags),
+            (SELECT array_agg(t) FROM old_rows o FULL JOIN new_rows n ON n.gid = o.gid AND n.token = o.token, unnest(o.tags) t
+             WHERE o.tags IS DISTINCT FROM n.tags)
+        );
+        PERFORM tag_stats_apply(
+            'eh_translated',
+            (SELECT array_agg(t) FROM old_rows o FULL JOIN new_rows n ON n.gid = o.gid AND n.token = o.token, unnest(n.tags_translated) t
+             WHERE o.tags_translated IS DISTINCT FROM n.tags_translated),
+            (SELECT array_agg(t) FROM old_rows o FULL JOIN new_rows n ON n.gid = o.gid AND n.token = o.token, unnest(o.tags_translated) t
+             WHERE o.tags_translated IS DISTINCT FROM n.tags_translated)
+        );
+    ELSE
+        PERFORM tag_stats_apply('eh', NULL, (SELECT array_agg(t) FROM old_rows, unnest(old_rows.tags) t));
+        PERFORM tag_stats_apply('eh_translated', NULL, (SELECT array_agg(t) FROM old_rows, unnest(old_rows.tags_translated) t));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables cannot be combined with multiple events or column lists,
+-- so each event gets its own trigger.
+DROP TRIGGER IF EXISTS trg_works_tag_stats_ins ON works;
+CREATE TRIGGER trg_works_tag_stats_ins
+AFTER INSERT ON works REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION works_tag_stats_sync();
+
+DROP TRIGGER IF EXISTS trg_works_tag_stats_upd ON works;
+CREATE TRIGGER trg_works_tag_stats_upd
+AFTER UPDATE ON works REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION works_tag_stats_sync();
+
+DROP TRIGGER IF EXISTS trg_works_tag_stats_del ON works;
+CREATE TRIGGER trg_works_tag_stats_del
+AFTER DELETE ON works REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION works_tag_stats_sync();
+
+DROP TRIGGER IF EXISTS trg_eh_works_tag_stats_ins ON eh_works;
+CREATE TRIGGER trg_eh_works_tag_stats_ins
+AFTER INSERT ON eh_works REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION eh_works_tag_stats_sync();
+
+DROP TRIGGER IF EXISTS trg_eh_works_tag_stats_upd ON eh_works;
+CREATE TRIGGER trg_eh_works_tag_stats_upd
+AFTER UPDATE ON eh_works REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION eh_works_tag_stats_sync();
+
+DROP TRIGGER IF EXISTS trg_eh_works_tag_stats_del ON eh_works;
+CREATE TRIGGER trg_eh_works_tag_stats_del
+AFTER DELETE ON eh_works REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION eh_works_tag_stats_sync();
+
+-- Full recount; blocks writers to both source tables for its duration.
+CREATE OR REPLACE FUNCTION rebuild_tag_stats() RETURNS bigint AS $$
+DECLARE
+    n bigint;
+BEGIN
+    LOCK TABLE works, eh_works IN SHARE MODE;
+    DELETE FROM tag_stats;
+    INSERT INTO tag_stats (tag, source, namespace, frequency, last_seen)
+    SELECT tag,
+           coalesce(source, 'all'),
+           CASE WHEN position(':' IN tag) > 0 THEN split_part(tag, ':', 1) ELSE '' END,
+           count(*),
+           now()
+    FROM (
+        SELECT unnest(tags) AS tag, 'works'::text AS source FROM works
+        UNION ALL
+        SELECT unnest(tags) AS tag, 'eh'::text AS source FROM eh_works
+        UNION ALL
+        SELECT unnest(tags_translated) AS tag, 'eh_translated'::text AS source FROM eh_works
+    ) x
+    WHERE tag IS NOT NULL AND tag <> ''
+    GROUP BY GROUPING SETS ((tag, source), (tag));
+    GET DIAGNOSTICS n = ROW_COUNT;
+    RETURN n;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM tag_stats) THEN
+        PERFORM rebuild_tag_stats();
+    END IF;
+END $$;
 
 -- Incremental EH fetch queue (cross-service safe, no shared txt file needed).
 CREATE TABLE IF NOT EXISTS eh_queue (
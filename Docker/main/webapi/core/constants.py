@@ -10,6 +10,10 @@ TASK_LOG_DIR = RUNTIME_DIR / "task_logs"
 APP_CONFIG_FILE = RUNTIME_DIR / "app_config.json"
 APP_CONFIG_KEY_FILE = RUNTIME_DIR / ".app_config.key"
 THUMB_CACHE_DIR = RUNTIME_DIR / "thumb_cache"
+THUMB_CACHE_INDEX_FILE = THUMB_CACHE_DIR / "index.sqlite3"
+ANN_INDEX_DIR = RUNTIME_DIR / "ann_index"
+EMBED_CACHE_FILE = RUNTIME_DIR / "embed_cache.sqlite3"
+TAG_EXTRACT_CACHE_FILE = RUNTIME_DIR / "tag_extract_cache.sqlite3"
 TRANSLATION_DIR = RUNTIME_DIR / "translations"
 PLUGINS_DIR = RUNTIME_DIR / "plugins"
 STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
@@ -30,6 +34,10 @@ CONFIG_SPECS: dict[str, dict[str, Any]] = {
     "POSTGRES_USER": {"type": "text", "default": "postgres"},
     "POSTGRES_PASSWORD": {"type": "text", "default": "", "secret": True},
     "POSTGRES_SSLMODE": {"type": "text", "default": "prefer"},
+    "POSTGRES_POOL_MIN": {"type": "int", "default": 1, "min": 0, "max": 32},
+    "POSTGRES_POOL_MAX": {"type": "int", "default": 8, "min": 1, "max": 64},
+    "POSTGRES_ASYNC_POOL_MAX": {"type": "int", "default": 4, "min": 1, "max": 64},
+    "POSTGRES_POOL_TIMEOUT_S": {"type": "int", "default": 30, "min": 1, "max": 300},
     "LRR_BASE": {"type": "url", "default": "http://lanraragi:3000"},
     "LRR_API_KEY": {"type": "text", "default": "", "secret": True},
     "OPENAI_API_KEY": {"type": "text", "default": "", "secret": True},
@@ -92,6 +100,9 @@ CONFIG_SPECS: dict[str, dict[str, Any]] = {
     "SEARCH_TAG_FUZZY_THRESHOLD": {"type": "float", "default": 0.62, "min": 0.2, "max": 1.0},
     "SEARCH_WORK_COVER_WEIGHT": {"type": "float", "default": 0.6, "min": 0.0, "max": 1.0},
     "SEARCH_WORK_PAGE_WEIGHT": {"type": "float", "default": 0.4, "min": 0.0, "max": 1.0},
+    "SEARCH_NL_CHANNEL_TIMEOUT_S": {"type": "int", "default": 20, "min": 1, "max": 600},
+    "ANN_INDEX_ENABLED": {"type": "bool", "default": False},
+    "ANN_INDEX_SYNC_INTERVAL_S": {"type": "int", "default": 60, "min": 5, "max": 3600},
     "TEXT_INGEST_PRUNE_NOT_SEEN": {"type": "bool", "default": True},
     "WORKER_ONLY_MISSING": {"type": "bool", "default": True},
     "LRR_READS_HOURS": {"type": "int", "default": 24, "min": 1, "max": 720},
@@ -133,6 +144,7 @@ CONFIG_SPECS: dict[str, dict[str, Any]] = {
     "WORKER_BATCH": {"type": "int", "default": 32, "min": 1, "max": 512},
     "WORKER_SLEEP": {"type": "float", "default": 0.0, "min": 0.0, "max": 60.0},
     "WORKS_PAGE_SAMPLE_COUNT": {"type": "int", "default": 4, "min": 1, "max": 8},
+    "WORKS_PAGE_MAXSIM_ENABLED": {"type": "bool", "default": False},
     "TAG_TRANSLATION_REPO": {"type": "text", "default": ""},
     "TAG_TRANSLATION_AUTO_UPDATE_HOURS": {"type": "int", "default": 24, "min": 1, "max": 720},
     "PROMPT_SEARCH_NARRATIVE_SYSTEM": {
@@ -5,10 +5,10 @@ from fastapi import Request, Response
 from fastapi.responses import JSONResponse
 
 from .config_values import as_bool as _as_bool
+from .runtime_state import run_blocking
 from ..services.auth_service import (
     auth_pepper,
-    bootstrap_status as auth_bootstrap_status,
-    ensure_auth_schema,
+    cached_bootstrap_status as auth_bootstrap_status,
     get_session_user as auth_get_session_user,
     verify_recovery_csrf,
     verify_csrf,
@@ -92,7 +92,7 @@ async def auth_guard(request: Request, call_next):
     if p.startswith("/api") and p not in AUTH_ALLOW_PATHS:
         token = str(request.cookies.get(AUTH_COOKIE_NAME) or "").strip()
         if token and token.startswith("RECV::"):
-            user = auth_get_session_user("", token)
+            user = await run_blocking(auth_get_session_user, "", token)
             if not user:
                 return JSONResponse(status_code=401, content={"detail": "invalid session"})
             user_role = str(user.get("role") or "")
@@ -114,8 +114,7 @@ async def auth_guard(request: Request, call_next):
                 return await call_next(request)
             return JSONResponse(status_code=503, content={"detail": "database is not configured"})
         try:
-            ensure_auth_schema(dsn)
-            st = auth_bootstrap_status(dsn)
+            st = await run_blocking(auth_bootstrap_status, dsn)
         except Exception:
             if p in SETUP_OPEN_PATHS:
                 return await call_next(request)
@@ -123,7 +122,7 @@ async def auth_guard(request: Request, call_next):
         if bool(st.get("configured")):
             if not token:
                 return JSONResponse(status_code=401, content={"detail": "authentication required"})
-            user = auth_get_session_user(dsn, token)
+            user = await run_blocking(auth_get_session_user, dsn, token)
             if not user:
                 return JSONResponse(status_code=401, content={"detail": "invalid session"})
             user_role = str(user.get("role") or "")
@@ -135,7 +134,7 @@ async def auth_guard(request: Request, call_next):
                 csrf_header = str(request.headers.get("x-csrf-token") or "")
                 if not csrf_cookie or not csrf_header or csrf_cookie != csrf_header:
                     return JSONResponse(status_code=403, content={"detail": "csrf verification failed"})
-                if not verify_csrf(dsn, token, csrf_header):
+                if not await run_blocking(verify_csrf, dsn, token, csrf_header):
                     return JSONResponse(status_code=403, content={"detail": "csrf verification failed"})
             request.state.auth_user = user
     return await call_next(request)
@@ -1,5 +1,9 @@
+import asyncio
+import functools
+import os
 import threading
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
 from zoneinfo import ZoneInfo
 
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -13,3 +17,20 @@ task_proc_state: dict[str, dict[str, Any]] = {}
 
 model_dl_lock = threading.Lock()
 model_dl_state: dict[str, dict[str, Any]] = {}
+
+blocking_executor = ThreadPoolExecutor(
+    max_workers=max(2, int(os.getenv("DATA_UI_BLOCKING_WORKERS", "16") or 16)),
+    thread_name_prefix="webapi-blocking",
+)
+
+# NL search fans its channels out here; kept apart from blocking_executor because
+# the fan-out itself runs on a blocking worker and must not wait on its own pool.
+search_channel_executor = ThreadPoolExecutor(
+    max_workers=max(2, int(os.getenv("DATA_UI_SEARCH_CHANNEL_WORKERS", "12") or 12)),
+    thread_name_prefix="webapi-search-channel",
+)
+
+
+async def run_blocking(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(blocking_executor, functools.partial(fn, *args, **kwargs))
@@ -33,6 +33,7 @@ class HomeImageSearchRequest(BaseModel):
     limit: int = 24
     include_categories: list[str] = []
     include_tags: list[str] = []
+    cursor: str = ""
 
 
 class HomeTextSearchRequest(BaseModel):
@@ -43,6 +44,7 @@ class HomeTextSearchRequest(BaseModel):
     ui_lang: str = "zh"
     include_categories: list[str] = []
     include_tags: list[str] = []
+    cursor: str = ""
 
 
 class HomeHybridSearchRequest(BaseModel):
@@ -58,6 +60,7 @@ class HomeHybridSearchRequest(BaseModel):
     ui_lang: str = "zh"
     include_categories: list[str] = []
     include_tags: list[str] = []
+    cursor: str = ""
 
 
 class ReaderReadEventRequest(BaseModel):
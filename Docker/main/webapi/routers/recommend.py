@@ -2,8 +2,9 @@ from typing import Any
 
 from fastapi import APIRouter, HTTPException, Query, Request
 
+from ..core.runtime_state import run_blocking
 from ..core.schemas import RecommendImpressionBatchRequest, RecommendTouchRequest
-from ..services.config_service import resolve_config
+from ..services.config_service import cached_config
 from ..services.recommend_feedback_service import (
     clear_recommend_clicks,
     clear_recommend_profile,
@@ -12,6 +13,7 @@ from ..services.recommend_feedback_service import (
     record_recommend_impressions,
 )
 from ..services.rec_service import _compute_xp_map, _get_recommendation_items_cached
+from ..services.search_service import _filter_items
 
 router = APIRouter(tags=["recommend"])
 
@@ -20,34 +22,8 @@ def _parse_csv_param(raw: str) -> list[str]:
     return [str(x).strip().lower() for x in str(raw or "").split(",") if str(x).strip()]
 
 
-def _filter_recommend_items(items: list[dict[str, Any]], cats: list[str], tags: list[str]) -> list[dict[str, Any]]:
-    if not cats and not tags:
-        return items
-    out: list[dict[str, Any]] = []
-    for it in items or []:
-        if cats:
-            c = str(it.get("category") or "").strip().lower()
-            if c not in cats:
-                continue
-        if tags:
-            bag = [
-                *(str(x).strip().lower() for x in (it.get("tags") or [])),
-                *(str(x).strip().lower() for x in (it.get("tags_translated") or [])),
-            ]
-            joined = " ".join([x for x in bag if x])
-            ok = True
-            for t in tags:
-                if t not in joined:
-                    ok = False
-                    break
-            if not ok:
-                continue
-        out.append(it)
-    return out
-
-
 @router.get("/api/home/recommend")
-def home_recommend(
+async def home_recommend(
     request: Request,
     cursor: str = Query(default=""),
     limit: int = Query(default=24, ge=1, le=80),
@@ -61,8 +37,9 @@ def home_recommend(
 ) -> dict[str, Any]:
     auth_user = getattr(request.state, "auth_user", {}) or {}
     user_id = str(auth_user.get("uid") or "default_user")
-    cfg, _ = resolve_config()
-    data = _get_recommendation_items_cached(
+    cfg, _ = cached_config()
+    data = await run_blocking(
+        _get_recommendation_items_cached,
         cfg,
         mode=mode,
         user_id=user_id,
@@ -79,7 +56,9 @@ def home_recommend(
         cats = []
         tags = []
     if cats or tags:
-        all_items = _filter_recommend_items(all_items, cats, tags)
+        # The ranked list is cached across requests regardless of filters, so it is
+        # filtered in memory; feeds backed by SQL queries push the filters down instead.
+        all_items = _filter_items(all_items, cats, tags)
     start = 0
     if cursor:
         try:
@@ -102,7 +81,7 @@ def home_recommend(
 
 
 @router.get("/api/recommend/items")
-def recommend_items(
+async def recommend_items(
     request: Request,
     cursor: str = Query(default=""),
     limit: int = Query(default=24, ge=1, le=80),
@@ -114,7 +93,7 @@ def recommend_items(
     include_categories: str = Query(default=""),
     include_tags: str = Query(default=""),
 ) -> dict[str, Any]:
-    return home_recommend(
+    return await home_recommend(
         request=request,
         cursor=cursor,
         limit=limit,
@@ -1,33 +1,42 @@
 import asyncio
+import hashlib
 import json
+import os
 import threading
 import time
-from typing import Any
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Awaitable, Callable
 from urllib.parse import parse_qs, quote, unquote, urlsplit
 
 import httpx
-import psycopg
-from fastapi import APIRouter, File, Form, HTTPException, Query, Response, UploadFile
+from fastapi import APIRouter, File, Form, HTTPException, Query, Request, Response, UploadFile
+from hunterAgent.core.vector_codec import to_vector
 
 from ..core.config_values import as_bool as _as_bool
+from ..core.runtime_state import run_blocking
 from ..core.schemas import HomeHybridSearchRequest, HomeImageSearchRequest, HomeTextSearchRequest, ReaderReadEventRequest
 from ..services.ai_provider import _extract_tags_by_llm
-from ..services.config_service import resolve_config
-from ..services.db_service import db_dsn, query_rows
+from ..services.config_service import cached_config, resolve_config
+from ..services.db_service import aquery_rows, db_dsn, execute, query_rows
+from ..services.image_search_cache import embedding_generation, get_cached_search, put_cached_search
 from ..services.search_service import (
     _agent_nl_search,
-    _cache_read,
-    _cache_write,
     _fuzzy_pick_tags,
     _fuzzy_tags,
     _hot_tags,
-    _parse_vector_text,
+    _norm_words,
+    _paged_result,
     _prefer_ex,
     _search_by_visual_vector,
+    _search_session_page,
     _search_text_non_llm,
     _tag_matches_ui_lang,
     _uploaded_image_search,
 )
+from ..services.search_session_service import cursor_offset, search_fingerprint, session_depth
+from ..services.thumb_cache import read_hot_thumb, read_thumb, write_thumb
+from ..services.thumb_transcode import thumb_width_bucket, transcode_thumb
 
 router = APIRouter(tags=["search"])
 
@@ -37,6 +46,21 @@ _thumb_client: httpx.AsyncClient | None = None
 _reader_manifest_lock = threading.Lock()
 _reader_manifest_cache: dict[str, dict[str, Any]] = {}
 
+# Thumbnail misses share one upstream fetch per cache key, and upstream requests are
+# capped per host so a grid of cards cannot trip EH rate limits or drain LRR workers.
+# Both live on the event loop, so plain dicts are enough.
+_THUMB_UPSTREAM_PER_HOST = max(1, int(os.getenv("DATA_UI_THUMB_UPSTREAM_PER_HOST", "6") or 6))
+_thumb_inflight: dict[str, asyncio.Task] = {}
+_thumb_host_slots: dict[str, asyncio.Semaphore] = {}
+# gid:token -> upstream cover URL, so EH thumbnail misses skip the eh_works lookup.
+_EH_THUMB_URL_MAX = 20000
+_eh_thumb_urls: OrderedDict[tuple[int, str], str] = OrderedDict()
+
+# Thumbnails can be refreshed upstream under the same URL, so browsers revalidate them
+# daily. LRR arcids are content hashes, so a page path inside one never changes.
+_THUMB_CACHE_CONTROL = "private, max-age=86400"
+_READER_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
 
 def _get_thumb_http_client() -> httpx.AsyncClient:
     global _thumb_client
@@ -79,7 +103,7 @@ async def _load_reader_manifest(arcid: str, *, force: bool = False) -> list[str]
             if cached and isinstance(cached.get("pages"), list) and cached.get("pages"):
                 return list(cached.get("pages") or [])
 
-    cfg, _ = resolve_config()
+    cfg, _ = cached_config()
     base = str(cfg.get("LRR_BASE") or "http://lanraragi:3000").strip().rstrip("/")
     api_key = str(cfg.get("LRR_API_KEY") or "").strip()
     url = f"{base}/api/archives/{key}/files"
@@ -107,6 +131,118 @@ async def _load_reader_manifest(arcid: str, *, force: bool = False) -> list[str]
     return pages
 
 
+def _host_slot(url: str) -> asyncio.Semaphore:
+    host = str(urlsplit(str(url or "")).hostname or "").lower()
+    slot = _thumb_host_slots.get(host)
+    if slot is None:
+        slot = asyncio.Semaphore(_THUMB_UPSTREAM_PER_HOST)
+        _thumb_host_slots[host] = slot
+    return slot
+
+
+def _forget_inflight(key: str, task: asyncio.Task) -> None:
+    if _thumb_inflight.get(key) is task:
+        _thumb_inflight.pop(key, None)
+    if not task.cancelled():
+        task.exception()
+
+
+def _remember_eh_thumb(gid: int, token: str, thumb: str) -> None:
+    key = (int(gid), str(token))
+    _eh_thumb_urls[key] = str(thumb)
+    _eh_thumb_urls.move_to_end(key)
+    while len(_eh_thumb_urls) > _EH_THUMB_URL_MAX:
+        _eh_thumb_urls.popitem(last=False)
+
+
+async def _single_flight(key: str, load: Callable[[], Awaitable[tuple[bytes, str]]]) -> tuple[bytes, str]:
+    # The fetch runs as its own task, so one client disconnecting does not cancel it for the others.
+    task = _thumb_inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(load())
+        _thumb_inflight[key] = task
+        task.add_done_callback(lambda t: _forget_inflight(key, t))
+    return await asyncio.shield(task)
+
+
+def _etag(data: bytes) -> str:
+    return f'"{hashlib.blake2b(data, digest_size=16).hexdigest()}"'
+
+
+def _is_fresh(request: Request, etag: str, *, last_modified: str = "", immutable: bool = False) -> bool:
+    # If-None-Match takes precedence over If-Modified-Since and is compared weakly.
+    inm = str(request.headers.get("if-none-match") or "").strip()
+    if inm:
+        return inm == "*" or etag in {t.strip().removeprefix("W/") for t in inm.split(",")}
+    ims = str(request.headers.get("if-modified-since") or "").strip()
+    if not ims:
+        return False
+    if immutable:
+        return True
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(ims)
+    except (TypeError, ValueError):
+        return False
+
+
+def _image_response(
+    request: Request,
+    data: bytes,
+    media_type: str,
+    *,
+    cache_control: str = _THUMB_CACHE_CONTROL,
+    etag: str = "",
+    headers: dict[str, str] | None = None,
+) -> Response:
+    etag = etag or _etag(data)
+    out = {"ETag": etag, "Cache-Control": cache_control, **(headers or {})}
+    if _is_fresh(request, etag, last_modified=out.get("Last-Modified", "")):
+        return Response(status_code=304, headers=out)
+    return Response(content=data, media_type=media_type, headers=out)
+
+
+async def _read_thumb(key: str) -> tuple[bytes, str] | None:
+    # Memory hits stay on the loop; the index and disk are read on the blocking pool.
+    hit = read_hot_thumb(key)
+    if hit is not None:
+        return hit
+    return await run_blocking(read_thumb, key)
+
+
+async def _thumb_response(
+    request: Request,
+    cache_key: str,
+    load: Callable[[], Awaitable[tuple[bytes, str]]],
+    width: int | None,
+) -> Response:
+    bucket = thumb_width_bucket(width)
+    variant_key = f"{cache_key}:w{bucket}"
+    if bucket:
+        hit = await _read_thumb(variant_key)
+        if hit is not None:
+            return _image_response(request, hit[0], hit[1], headers={"X-Thumb-Cache": "HIT"})
+    state = "HIT"
+    cached = await _read_thumb(cache_key)
+    if cached is None:
+        state = "MISS"
+        cached = await _single_flight(cache_key, load)
+    data, ctype = cached
+    if bucket:
+
+        async def _variant() -> tuple[bytes, str]:
+            small = await run_blocking(transcode_thumb, data, bucket)
+            if small is None:
+                # Undecodable source: serve it as-is and retry the resize on the next request.
+                return data, ctype
+            # Already-small sources can grow when re-encoded; the variant then just mirrors them.
+            out = (small, "image/webp") if len(small) < len(data) else (data, ctype)
+            await run_blocking(write_thumb, variant_key, *out)
+            return out
+
+        data, ctype = await _single_flight(variant_key, _variant)
+    return _image_response(request, data, ctype, headers={"X-Thumb-Cache": state})
+
+
 async def _fetch_bytes_with_retries(
     client: httpx.AsyncClient,
     urls: list[str],
@@ -131,11 +267,12 @@ async def _fetch_bytes_with_retries(
         for url in uniq_urls:
             try:
                 headers = headers_factory(url)
-                resp = await client.get(
-                    url,
-                    headers=headers,
-                    timeout=max(3.0, float(timeout_s)),
-                )
+                async with _host_slot(url):
+                    resp = await client.get(
+                        url,
+                        headers=headers,
+                        timeout=max(3.0, float(timeout_s)),
+                    )
                 resp.raise_for_status()
                 return resp.content, str(resp.headers.get("content-type") or "image/jpeg")
             except (httpx.RequestError, httpx.HTTPStatusError) as e:
@@ -187,7 +324,8 @@ async def _refresh_eh_thumb_from_api(
     ua = str(cfg.get("EH_USER_AGENT") or "AutoEhHunter/1.0").strip() or "AutoEhHunter/1.0"
     payload = {"method": "gdata", "gidlist": [[int(gid), safe_token]], "namespace": 1}
     try:
-        resp = await client.post(api_url, json=payload, headers={"User-Agent": ua}, timeout=15.0)
+        async with _host_slot(api_url):
+            resp = await client.post(api_url, json=payload, headers={"User-Agent": ua}, timeout=15.0)
         resp.raise_for_status()
         obj = resp.json()
     except Exception:
@@ -206,7 +344,7 @@ async def _refresh_eh_thumb_from_api(
     eh_url = f"https://e-hentai.org/g/{int(gid)}/{safe_token}/"
     ex_url = f"https://exhentai.org/g/{int(gid)}/{safe_token}/"
     raw_patch = json.dumps(row, ensure_ascii=False)
-    updated = query_rows(
+    updated = await aquery_rows(
         "UPDATE eh_works "
         "SET raw = COALESCE(raw, '{}'::jsonb) || %s::jsonb, "
         "eh_url = COALESCE(NULLIF(%s, ''), eh_url), "
@@ -226,87 +364,96 @@ async def _refresh_eh_thumb_from_api(
 
 
 @router.get("/api/thumb/lrr/{arcid}")
-async def thumb_lrr(arcid: str) -> Response:
-    cfg, _ = resolve_config()
+async def thumb_lrr(request: Request, arcid: str, w: int | None = Query(default=None, ge=1, le=4096)) -> Response:
+    cfg, _ = cached_config()
     base = str(cfg.get("LRR_BASE") or "http://lanraragi:3000").strip().rstrip("/")
     api_key = str(cfg.get("LRR_API_KEY") or "").strip()
     safe_arcid = str(arcid or "").strip()
     if not safe_arcid:
         raise HTTPException(status_code=400, detail="arcid required")
     cache_key = f"lrr:{safe_arcid}"
-    cached = _cache_read(cache_key)
-    if cached is not None:
-        return Response(content=cached, media_type="image/jpeg", headers={"X-Thumb-Cache": "HIT"})
     url = f"{base}/api/archives/{safe_arcid}/thumbnail"
     headers: dict[str, str] = {}
     if api_key:
         headers["Authorization"] = f"Bearer {api_key}"
-    client = _get_thumb_http_client()
-    data, ctype = await _fetch_bytes_with_retries(
-        client,
-        [url],
-        headers_factory=lambda _u: headers,
-        retries=3,
-        timeout_s=10.0,
-    )
-    _cache_write(cache_key, data)
-    return Response(content=data, media_type=ctype, headers={"X-Thumb-Cache": "MISS"})
+
+    async def _load() -> tuple[bytes, str]:
+        # A fetch that finished between our cache miss and joining the flight already wrote it.
+        hit = await _read_thumb(cache_key)
+        if hit is not None:
+            return hit
+        data, ctype = await _fetch_bytes_with_retries(
+            _get_thumb_http_client(),
+            [url],
+            headers_factory=lambda _u: headers,
+            retries=3,
+            timeout_s=10.0,
+        )
+        await run_blocking(write_thumb, cache_key, data, ctype)
+        return data, ctype
+
+    return await _thumb_response(request, cache_key, _load, w)
 
 
 @router.get("/api/thumb/eh/{gid}/{token}")
-async def thumb_eh(gid: int, token: str) -> Response:
+async def thumb_eh(request: Request, gid: int, token: str, w: int | None = Query(default=None, ge=1, le=4096)) -> Response:
     safe_token = str(token or "").strip()
     if gid <= 0 or not safe_token:
         raise HTTPException(status_code=400, detail="invalid gid/token")
-    rows = query_rows(
-        "SELECT raw->>'thumb' AS thumb, eh_url, ex_url FROM eh_works WHERE gid = %s AND token = %s LIMIT 1",
-        (int(gid), safe_token),
-    )
-    db_row = rows[0] if rows else {}
-    thumb = str((db_row or {}).get("thumb") or "").strip()
-
-    cfg, _ = resolve_config()
-    cache_key = f"eh:{gid}:{safe_token}:{'ex' if _prefer_ex(cfg) else 'eh'}"
-    cached = _cache_read(cache_key)
-    if cached is not None:
-        return Response(content=cached, media_type="image/jpeg", headers={"X-Thumb-Cache": "HIT"})
+    cfg, _ = cached_config()
+    prefer_ex = _prefer_ex(cfg)
+    cache_key = f"eh:{gid}:{safe_token}:{'ex' if prefer_ex else 'eh'}"
     ua = str(cfg.get("EH_USER_AGENT") or "AutoEhHunter/1.0").strip() or "AutoEhHunter/1.0"
     cookie = str(cfg.get("EH_COOKIE") or "").strip()
-    prefer_ex = _prefer_ex(cfg)
-    client = _get_thumb_http_client()
 
-    if not thumb:
-        refreshed = await _refresh_eh_thumb_from_api(gid=int(gid), token=safe_token, cfg=cfg, client=client)
-        thumb = str((refreshed or {}).get("thumb") or "").strip()
-    if not thumb:
-        raise HTTPException(status_code=404, detail="thumb not found")
+    async def _load() -> tuple[bytes, str]:
+        hit = await _read_thumb(cache_key)
+        if hit is not None:
+            return hit
+        client = _get_thumb_http_client()
+        thumb = _eh_thumb_urls.get((int(gid), safe_token), "")
+        if not thumb:
+            rows = await aquery_rows(
+                "SELECT raw->>'thumb' AS thumb FROM eh_works WHERE gid = %s AND token = %s LIMIT 1",
+                (int(gid), safe_token),
+            )
+            thumb = str((rows[0] if rows else {}).get("thumb") or "").strip()
+        if not thumb:
+            refreshed = await _refresh_eh_thumb_from_api(gid=int(gid), token=safe_token, cfg=cfg, client=client)
+            thumb = str((refreshed or {}).get("thumb") or "").strip()
+        if not thumb:
+            raise HTTPException(status_code=404, detail="thumb not found")
+        _remember_eh_thumb(int(gid), safe_token, thumb)
 
-    urls = _build_eh_thumb_urls(thumb, prefer_ex)
+        urls = _build_eh_thumb_urls(thumb, prefer_ex)
 
-    try:
-        data, ctype = await _fetch_bytes_with_retries(
-            client,
-            urls,
-            headers_factory=lambda u: _eh_headers_for(u, ua, cookie),
-            retries=3,
-            timeout_s=10.0,
-        )
-    except HTTPException:
-        refreshed = await _refresh_eh_thumb_from_api(gid=int(gid), token=safe_token, cfg=cfg, client=client)
-        refreshed_thumb = str((refreshed or {}).get("thumb") or "").strip()
-        if not refreshed_thumb or refreshed_thumb == thumb:
-            raise
-        retry_urls = _build_eh_thumb_urls(refreshed_thumb, prefer_ex)
-        data, ctype = await _fetch_bytes_with_retries(
-            client,
-            retry_urls,
-            headers_factory=lambda u: _eh_headers_for(u, ua, cookie),
-            retries=2,
-            timeout_s=10.0,
-        )
+        try:
+            data, ctype = await _fetch_bytes_with_retries(
+                client,
+                urls,
+                headers_factory=lambda u: _eh_headers_for(u, ua, cookie),
+                retries=3,
+                timeout_s=10.0,
+            )
+        except HTTPException:
+            refreshed = await _refresh_eh_thumb_from_api(gid=int(gid), token=safe_token, cfg=cfg, client=client)
+            refreshed_thumb = str((refreshed or {}).get("thumb") or "").strip()
+            if not refreshed_thumb or refreshed_thumb == thumb:
+                raise
+            _remember_eh_thumb(int(gid), safe_token, refreshed_thumb)
+            retry_urls = _build_eh_thumb_urls(refreshed_thumb, prefer_ex)
+            data, ctype = await _fetch_bytes_with_retries(
+                client,
+                retry_urls,
+                headers_factory=lambda u: _eh_headers_for(u, ua, cookie),
+                retries=2,
+                timeout_s=10.0,
+            )
+
+        await run_blocking(write_thumb, cache_key, data, ctype)
+        return data, ctype
 
-    _cache_write(cache_key, data)
-    return Response(content=data, media_type=ctype, headers={"X-Thumb-Cache": "MISS"})
+    return await _thumb_response(request, cache_key, _load, w)
 
 
 @router.get("/api/reader/{arcid}/manifest")
@@ -315,7 +462,7 @@ async def reader_manifest(arcid: str) -> dict[str, Any]:
     if not safe_arcid:
         raise HTTPException(status_code=400, detail="arcid required")
     pages = await _load_reader_manifest(safe_arcid)
-    row = query_rows("SELECT title FROM works WHERE arcid = %s LIMIT 1", (safe_arcid,))
+    row = await aquery_rows("SELECT title FROM works WHERE arcid = %s LIMIT 1", (safe_arcid,))
     title = str((row[0] if row else {}).get("title") or "")
     return {
         "arcid": safe_arcid,
@@ -325,7 +472,7 @@ async def reader_manifest(arcid: str) -> dict[str, Any]:
 
 
 @router.get("/api/reader/{arcid}/page/{index}")
-async def reader_page(arcid: str, index: int) -> Response:
+async def reader_page(request: Request, arcid: str, index: int) -> Response:
     safe_arcid = str(arcid or "").strip()
     if not safe_arcid:
         raise HTTPException(status_code=400, detail="arcid required")
@@ -335,12 +482,16 @@ async def reader_page(arcid: str, index: int) -> Response:
     if int(index) > len(pages):
         raise HTTPException(status_code=404, detail="page out of range")
 
-    cfg, _ = resolve_config()
+    cfg, _ = cached_config()
     base = str(cfg.get("LRR_BASE") or "http://lanraragi:3000").strip().rstrip("/")
     api_key = str(cfg.get("LRR_API_KEY") or "").strip()
     page_path = str(pages[int(index) - 1] or "").strip()
     if not page_path:
         raise HTTPException(status_code=404, detail="page path missing")
+    # Keyed by the page itself, so revalidation is answered without touching LRR.
+    etag = _etag(f"{safe_arcid}\n{page_path}".encode("utf-8", errors="ignore"))
+    if _is_fresh(request, etag, immutable=True):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": _READER_CACHE_CONTROL})
     url = f"{base}/api/archives/{safe_arcid}/page?path={quote(page_path, safe='')}"
     headers: dict[str, str] = {}
     if api_key:
@@ -350,9 +501,10 @@ async def reader_page(arcid: str, index: int) -> Response:
         resp = await client.get(url, headers=headers, timeout=20.0)
         resp.raise_for_status()
         ctype = str(resp.headers.get("content-type") or "image/jpeg")
-        return Response(content=resp.content, media_type=ctype)
     except Exception as e:
         raise HTTPException(status_code=502, detail=f"reader page fetch failed: {e}")
+    headers = {"Last-Modified": str(resp.headers.get("last-modified") or formatdate(time.time(), usegmt=True))}
+    return _image_response(request, resp.content, ctype, cache_control=_READER_CACHE_CONTROL, etag=etag, headers=headers)
 
 
 @router.post("/api/reader/read-event")
@@ -374,58 +526,119 @@ def reader_read_event(req: ReaderReadEventRequest) -> dict[str, Any]:
         "ON CONFLICT (arcid, read_time) DO NOTHING"
     )
     try:
-        with psycopg.connect(dsn) as conn:
-            with conn.cursor() as cur:
-                cur.execute(sql, (safe_arcid, read_time, source_file, ingested_at, json.dumps(raw, ensure_ascii=False)))
-                inserted = int(cur.rowcount or 0)
-            conn.commit()
+        inserted = execute(sql, (safe_arcid, read_time, source_file, ingested_at, json.dumps(raw, ensure_ascii=False)))
         return {"ok": True, "inserted": inserted}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"insert read_event failed: {e}")
 
 
-@router.post("/api/home/search/image")
-def home_image_search(req: HomeImageSearchRequest) -> dict[str, Any]:
-    scope = str(req.scope or "both").strip().lower()
-    if scope not in ("works", "eh", "both"):
-        scope = "both"
-    limit = max(1, min(500, int(req.limit or 24)))
-    cfg, _ = resolve_config()
-    use_tags = list(req.include_tags or []) if _as_bool(cfg.get("SEARCH_TAG_HARD_FILTER"), True) else []
-
-    vec: list[float] = []
-    if str(req.arcid or "").strip():
-        rows = query_rows(
-            "SELECT visual_embedding::text as vec FROM works WHERE arcid = %s AND visual_embedding IS NOT NULL LIMIT 1",
-            (str(req.arcid).strip(),),
+async def _reference_vector(arcid: str, gid: int | None, token: str) -> Any:
+    vec = to_vector(None)
+    if str(arcid or "").strip():
+        rows = await aquery_rows(
+            "SELECT visual_embedding as vec FROM works WHERE arcid = %s AND visual_embedding IS NOT NULL LIMIT 1",
+            (str(arcid).strip(),),
+            binary=True,
         )
         if rows:
-            vec = _parse_vector_text(str(rows[0].get("vec") or ""))
-    elif req.gid is not None and str(req.token or "").strip():
-        rows = query_rows(
-            "SELECT cover_embedding::text as vec FROM eh_works "
+            vec = to_vector(rows[0].get("vec"))
+    elif gid is not None and str(token or "").strip():
+        rows = await aquery_rows(
+            "SELECT cover_embedding as vec FROM eh_works "
             "WHERE gid = %s AND token = %s AND cover_embedding IS NOT NULL LIMIT 1",
-            (int(req.gid), str(req.token).strip()),
+            (int(gid), str(token).strip()),
+            binary=True,
         )
         if rows:
-            vec = _parse_vector_text(str(rows[0].get("vec") or ""))
-
-    if not vec:
+            vec = to_vector(rows[0].get("vec"))
+    if vec.size == 0:
         raise HTTPException(status_code=400, detail="image search needs a reference arcid or (gid, token) for now")
+    return vec
+
 
-    return _search_by_visual_vector(
+async def _reference_visual_search(
+    arcid: str,
+    gid: int | None,
+    token: str,
+    scope: str,
+    depth: int,
+    cfg: dict[str, Any],
+    include_categories: list[str],
+    include_tags: list[str],
+) -> dict[str, Any]:
+    # Unpaginated ranking for a reference item, cached until stored visual vectors change.
+    safe_arcid = str(arcid or "").strip()
+    ref = f"work:{safe_arcid}" if safe_arcid else f"eh:{int(gid or 0)}:{str(token or '').strip()}"
+    key = (
+        ref,
+        scope,
+        int(depth),
+        tuple(sorted(set(_norm_words(include_categories)))),
+        tuple(sorted(set(_norm_words(include_tags)))),
+        _prefer_ex(cfg),
+        float(cfg.get("SEARCH_WORK_COVER_WEIGHT", 0.6) or 0.6),
+        float(cfg.get("SEARCH_WORK_PAGE_WEIGHT", 0.4) or 0.4),
+        _as_bool(cfg.get("WORKS_PAGE_MAXSIM_ENABLED"), False),
+    )
+    hit = get_cached_search(key)
+    if hit is not None:
+        items, meta = hit
+        return {"items": items, "next_cursor": "", "has_more": False, "meta": meta}
+    generation = embedding_generation()
+    vec = await _reference_vector(arcid, gid, token)
+    out = await run_blocking(
+        _search_by_visual_vector,
         vec,
         scope,
-        limit,
+        int(depth),
         cfg,
-        include_categories=list(req.include_categories or []),
-        include_tags=use_tags,
+        include_categories=include_categories,
+        include_tags=include_tags,
+        paginate=False,
+    )
+    put_cached_search(key, generation, list(out.get("items") or []), dict(out.get("meta") or {}))
+    return out
+
+
+@router.post("/api/home/search/image")
+async def home_image_search(req: HomeImageSearchRequest) -> dict[str, Any]:
+    scope = str(req.scope or "both").strip().lower()
+    if scope not in ("works", "eh", "both"):
+        scope = "both"
+    limit = max(1, min(500, int(req.limit or 24)))
+    cfg, _ = cached_config()
+    # Cursors only page the session of the same endpoint and request; anything else searches afresh.
+    fp = search_fingerprint("image", req.model_dump(exclude={"cursor", "limit"}))
+    if req.cursor:
+        page = await run_blocking(_search_session_page, req.cursor, limit, cfg, fp)
+        if page is not None:
+            return page
+    use_tags = list(req.include_tags or []) if _as_bool(cfg.get("SEARCH_TAG_HARD_FILTER"), True) else []
+    offset = cursor_offset(req.cursor, fp)
+    depth = session_depth(limit, offset)
+    ranked = await _reference_visual_search(
+        req.arcid,
+        req.gid,
+        req.token,
+        scope,
+        depth,
+        cfg,
+        list(req.include_categories or []),
+        use_tags,
+    )
+    return _paged_result(
+        list(ranked.get("items") or []),
+        limit,
+        dict(ranked.get("meta") or {}),
+        offset=offset,
+        depth=depth,
+        fingerprint=fp,
     )
 
 
 @router.post("/api/home/search/image/upload")
 async def home_image_search_upload(
-    file: UploadFile = File(...),
+    file: UploadFile | None = File(default=None),
     scope: str = Form(default="both"),
     limit: int = Form(default=24),
     query: str = Form(default=""),
@@ -433,12 +646,31 @@ async def home_image_search_upload(
     visual_weight: float = Form(default=0.5),
     include_categories: str = Form(default=""),
     include_tags: str = Form(default=""),
+    cursor: str = Form(default=""),
 ) -> dict[str, Any]:
-    cfg, _ = resolve_config()
+    cfg, _ = cached_config()
+    fp = search_fingerprint(
+        "image_upload",
+        {
+            "scope": scope,
+            "query": query,
+            "text_weight": text_weight,
+            "visual_weight": visual_weight,
+            "include_categories": include_categories,
+            "include_tags": include_tags,
+        },
+    )
+    if cursor:
+        page = await run_blocking(_search_session_page, cursor, max(1, min(500, int(limit or 24))), cfg, fp)
+        if page is not None:
+            return page
+    if file is None:
+        raise HTTPException(status_code=400, detail="search session expired, upload the image again")
     body = await file.read()
     cats = [x.strip().lower() for x in str(include_categories or "").split(",") if x.strip()]
     tags = [x.strip().lower() for x in str(include_tags or "").split(",") if x.strip()]
-    return _uploaded_image_search(
+    return await run_blocking(
+        _uploaded_image_search,
         body,
         cfg=cfg,
         scope=scope,
@@ -448,12 +680,14 @@ async def home_image_search_upload(
         visual_weight=visual_weight,
         include_categories=cats,
         include_tags=tags,
+        offset=cursor_offset(cursor, fp),
+        fingerprint=fp,
     )
 
 
 @router.post("/api/home/search/text")
-def home_text_search(req: HomeTextSearchRequest) -> dict[str, Any]:
-    cfg, _ = resolve_config()
+async def home_text_search(req: HomeTextSearchRequest) -> dict[str, Any]:
+    cfg, _ = cached_config()
     query = str(req.query or "").strip()
     if not query:
         return {"items": [], "next_cursor": "", "has_more": False, "meta": {"mode": "text_search", "empty": True}}
@@ -461,9 +695,16 @@ def home_text_search(req: HomeTextSearchRequest) -> dict[str, Any]:
     if scope not in ("works", "eh", "both"):
         scope = "both"
     limit = max(1, min(500, int(req.limit or 24)))
+    fp = search_fingerprint("text", req.model_dump(exclude={"cursor", "limit"}))
+    if req.cursor:
+        page = await run_blocking(_search_session_page, req.cursor, limit, cfg, fp)
+        if page is not None:
+            return page
+    offset = cursor_offset(req.cursor, fp)
     use_nl = bool(req.use_llm) and _as_bool(cfg.get("SEARCH_NL_ENABLED"), False)
     if use_nl:
-        return _agent_nl_search(
+        return await run_blocking(
+            _agent_nl_search,
             query,
             scope,
             limit,
@@ -472,24 +713,36 @@ def home_text_search(req: HomeTextSearchRequest) -> dict[str, Any]:
             include_tags=list(req.include_tags or []),
             ui_lang=str(req.ui_lang or "zh"),
             scenario="plot",
+            offset=offset,
+            fingerprint=fp,
         )
-    return _search_text_non_llm(
+    return await run_blocking(
+        _search_text_non_llm,
         query,
         scope,
         limit,
         cfg,
         include_categories=list(req.include_categories or []),
         include_tags=list(req.include_tags or []) if _as_bool(cfg.get("SEARCH_TAG_HARD_FILTER"), True) else [],
+        offset=offset,
+        fingerprint=fp,
     )
 
 
 @router.post("/api/home/search/hybrid")
-def home_hybrid_search(req: HomeHybridSearchRequest) -> dict[str, Any]:
-    cfg, _ = resolve_config()
+async def home_hybrid_search(req: HomeHybridSearchRequest) -> dict[str, Any]:
+    cfg, _ = cached_config()
     scope = str(req.scope or "both").strip().lower()
     if scope not in ("works", "eh", "both"):
         scope = "both"
     limit = max(1, min(500, int(req.limit or 24)))
+    fp = search_fingerprint("hybrid", req.model_dump(exclude={"cursor", "limit"}))
+    if req.cursor:
+        page = await run_blocking(_search_session_page, req.cursor, limit, cfg, fp)
+        if page is not None:
+            return page
+    offset = cursor_offset(req.cursor, fp)
+    depth = session_depth(limit, offset)
     tw = float(req.text_weight if req.text_weight is not None else cfg.get("SEARCH_MIXED_TEXT_WEIGHT", 0.5))
     vw = float(req.visual_weight if req.visual_weight is not None else cfg.get("SEARCH_MIXED_VISUAL_WEIGHT", 0.5))
     tw = max(0.0, tw)
@@ -501,44 +754,48 @@ def home_hybrid_search(req: HomeHybridSearchRequest) -> dict[str, Any]:
 
     q = str(req.query or "").strip()
     use_nl = bool(req.use_llm) and _as_bool(cfg.get("SEARCH_NL_ENABLED"), False)
-    text_part = (
-        _agent_nl_search(
+    async def _text_part() -> dict[str, Any]:
+        if not q:
+            return {"items": []}
+        if use_nl:
+            return await run_blocking(
+                _agent_nl_search,
+                q,
+                scope,
+                depth,
+                cfg,
+                include_categories=list(req.include_categories or []),
+                include_tags=list(req.include_tags or []),
+                ui_lang=str(req.ui_lang or "zh"),
+                scenario="mixed",
+                paginate=False,
+            )
+        return await run_blocking(
+            _search_text_non_llm,
             q,
             scope,
-            limit * 2,
+            depth,
             cfg,
             include_categories=list(req.include_categories or []),
-            include_tags=list(req.include_tags or []),
-            ui_lang=str(req.ui_lang or "zh"),
-            scenario="mixed",
+            include_tags=list(req.include_tags or []) if _as_bool(cfg.get("SEARCH_TAG_HARD_FILTER"), True) else [],
+            paginate=False,
         )
-        if (q and use_nl)
-        else _search_text_non_llm(
-            q,
+
+    async def _image_part() -> dict[str, Any]:
+        if not (str(req.arcid or "").strip() or (req.gid is not None and str(req.token or "").strip())):
+            return {"items": []}
+        return await _reference_visual_search(
+            req.arcid,
+            req.gid,
+            req.token,
             scope,
-            limit * 2,
+            depth,
             cfg,
-            include_categories=list(req.include_categories or []),
-            include_tags=list(req.include_tags or []) if _as_bool(cfg.get("SEARCH_TAG_HARD_FILTER"), True) else [],
+            list(req.include_categories or []),
+            list(req.include_tags or []) if _as_bool(cfg.get("SEARCH_TAG_HARD_FILTER"), True) else [],
         )
-        if q
-        else {"items": []}
-    )
-    image_part = (
-        home_image_search(
-            HomeImageSearchRequest(
-                arcid=str(req.arcid or ""),
-                gid=req.gid,
-                token=str(req.token or ""),
-                scope=scope,
-                limit=limit * 2,
-                include_categories=list(req.include_categories or []),
-                include_tags=list(req.include_tags or []),
-            )
-        )
-        if (str(req.arcid or "").strip() or (req.gid is not None and str(req.token or "").strip()))
-        else {"items": []}
-    )
+
+    text_part, image_part = await asyncio.gather(_text_part(), _image_part())
 
     merged: dict[str, dict[str, Any]] = {}
     for idx, it in enumerate(text_part.get("items") or []):
@@ -556,17 +813,13 @@ def home_hybrid_search(req: HomeHybridSearchRequest) -> dict[str, Any]:
             row = dict(it)
             row["score"] = score
             merged[key] = row
-    items = sorted(merged.values(), key=lambda x: float(x.get("score") or 0.0), reverse=True)[:limit]
-    return {
-        "items": items,
-        "next_cursor": "",
-        "has_more": False,
-        "meta": {
-            "mode": "hybrid_search",
-            "llm_used": bool(use_nl),
-            "weights": {"text": round(tw, 4), "visual": round(vw, 4)},
-        },
+    items = sorted(merged.values(), key=lambda x: float(x.get("score") or 0.0), reverse=True)[:depth]
+    meta = {
+        "mode": "hybrid_search",
+        "llm_used": bool(use_nl),
+        "weights": {"text": round(tw, 4), "visual": round(vw, 4)},
     }
+    return _paged_result(items, limit, meta, offset=offset, depth=depth, fingerprint=fp)
 
 
 @router.get("/api/home/filter/tag-suggest")
@@ -581,11 +834,7 @@ def home_filter_tag_suggest(
     cfg, _ = resolve_config()
     fuzzy = _fuzzy_tags(kw, threshold=0.45, max_tags=max(20, limit * 2))
     rows = query_rows(
-        "SELECT tag FROM ("
-        "SELECT unnest(tags) AS tag FROM works "
-        "UNION ALL SELECT unnest(tags) AS tag FROM eh_works "
-        "UNION ALL SELECT unnest(tags_translated) AS tag FROM eh_works"
-        ") x WHERE tag ILIKE %s GROUP BY tag ORDER BY count(*) DESC LIMIT %s",
+        "SELECT tag FROM tag_stats WHERE source = 'all' AND tag ILIKE %s ORDER BY frequency DESC LIMIT %s",
         (f"%{kw}%", int(limit * 2)),
     )
     exact = [str(r.get("tag") or "").strip() for r in rows if str(r.get("tag") or "").strip()]
@@ -17,6 +17,7 @@ from ..core.constants import APP_CONFIG_FILE, CONFIG_SPECS, PLUGINS_DIR, RUNTIME
 from ..core.runtime_state import model_dl_lock, model_dl_state
 from ..core.schemas import ConfigUpdateRequest, ProviderModelsRequest, SetupValidateDbRequest, SetupValidateLrrRequest
 from ..services.ai_provider import _provider_models, check_http
+from ..services.ann_index_service import ann_index_stats
 from ..services.auth_service import bootstrap_status as auth_bootstrap_status
 from ..services.auth_service import set_initialized
 from ..services.config_service import (
@@ -29,12 +30,15 @@ from ..services.config_service import (
     now_iso,
     resolve_config,
 )
-from ..services.db_service import _build_dsn, db_dsn, query_rows
+from ..services.db_service import _build_dsn, db_dsn, pool_stats, query_rows
 from ..services.dev_schema import inject_schema_sql, save_schema_upload, schema_status
 from ..services.eh_cover_embedding_service import disable_eh_cover_embedding_worker, enable_eh_cover_embedding_worker
+from ..services.embedding_cache import embedding_cache_stats
+from ..services.image_search_cache import image_search_cache_stats
 from ..services.schedule_service import sync_scheduler
-from ..services.search_service import _clear_thumb_cache, _thumb_cache_stats
 from ..services.setup_service import init_core_schema, validate_db_connection, validate_lrr
+from ..services.tag_extract_cache import tag_extract_cache_stats
+from ..services.thumb_cache import clear_thumb_cache, thumb_cache_stats
 from ..services.vision_service import (
     _clear_runtime_pydeps,
     _clear_siglip_runtime,
@@ -207,8 +211,15 @@ def health() -> dict[str, Any]:
             "eh_works": total_eh,
             "last_fetch": last_fetch,
             "timezone": _runtime_timezone_name(),
+            "pool": pool_stats(),
+            "ann_index": ann_index_stats(),
         },
         "services": {"lrr": {"ok": ok_lrr, "message": msg_lrr}, "llm": llm},
+        "caches": {
+            "embedding": embedding_cache_stats(),
+            "tag_extract": tag_extract_cache_stats(),
+            "image_search": image_search_cache_stats(),
+        },
     }
 
 
@@ -373,12 +384,12 @@ def dev_schema_inject() -> dict[str, Any]:
 
 @router.get("/api/cache/thumbs")
 def thumb_cache_stats_api() -> dict[str, Any]:
-    return _thumb_cache_stats()
+    return thumb_cache_stats()
 
 
 @router.delete("/api/cache/thumbs")
 def thumb_cache_clear_api() -> dict[str, Any]:
-    return {"ok": True, **_clear_thumb_cache()}
+    return {"ok": True, **clear_thumb_cache()}
 
 
 @router.get("/api/translation/status")
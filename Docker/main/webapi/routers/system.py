@@ -4,10 +4,18 @@ from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import FileResponse, JSONResponse
 
 from ..core.constants import STATIC_DIR
-from ..core.runtime_state import scheduler
+from ..core.runtime_state import run_blocking, scheduler
+from ..services.ann_index_service import start_ann_index_worker, stop_ann_index_worker
 from ..services.auth_service import ensure_auth_schema
-from ..services.config_service import apply_runtime_timezone, ensure_dirs, resolve_config
-from ..services.db_service import db_dsn, query_rows
+from ..services.config_service import (
+    apply_runtime_timezone,
+    cached_config,
+    ensure_dirs,
+    resolve_config,
+    start_config_refresher,
+    stop_config_refresher,
+)
+from ..services.db_service import aquery_rows, close_async_pool, db_dsn
 from ..services.eh_cover_embedding_service import (
     disable_eh_cover_embedding_worker,
     enable_eh_cover_embedding_worker,
@@ -16,9 +24,9 @@ from ..services.eh_cover_embedding_service import (
     stop_eh_cover_embedding_worker,
     stop_eh_cover_embedding_worker_until_restart,
 )
-from ..services.rec_service_local import get_local_recommendation_items_cached
+from ..services.rec_service_local import get_local_recommendation_page
 from ..services.schedule_service import sync_scheduler
-from ..services.search_service import _item_from_work
+from ..services.search_service import _filter_conds, _item_from_work
 from ..services.vision_service import warmup_siglip_model, _embed_image_siglip, siglip_warmup_ready
 
 router = APIRouter(tags=["system"])
@@ -28,31 +36,6 @@ def _parse_csv_param(raw: str) -> list[str]:
     return [str(x).strip().lower() for x in str(raw or "").split(",") if str(x).strip()]
 
 
-def _apply_item_filters(items: list[dict[str, Any]], cats: list[str], tags: list[str]) -> list[dict[str, Any]]:
-    if not cats and not tags:
-        return items
-    out: list[dict[str, Any]] = []
-    for it in items or []:
-        if cats:
-            c = str(it.get("category") or "").strip().lower()
-            if c not in cats:
-                continue
-        if tags:
-            bag = [
-                *(str(x).strip().lower() for x in (it.get("tags") or [])),
-                *(str(x).strip().lower() for x in (it.get("tags_translated") or [])),
-            ]
-            joined = " ".join([x for x in bag if x])
-            ok = True
-            for t in tags:
-                if t not in joined:
-                    ok = False
-                    break
-            if not ok:
-                continue
-        out.append(it)
-    return out
-
 class ImageEmbedPayload(BaseModel):
     image: str
 
@@ -80,6 +63,7 @@ def embed_image_internal(payload: ImageEmbedPayload) -> JSONResponse:
 @router.on_event("startup")
 def _on_startup() -> None:
     ensure_dirs()
+    start_config_refresher()
     apply_runtime_timezone()
     try:
         dsn = db_dsn()
@@ -98,6 +82,7 @@ def _on_startup() -> None:
             warmup_siglip_model(target, strict=False, silent_skip=True)
     except Exception:
         pass
+    start_ann_index_worker()
     try:
         cfg, _ = resolve_config()
         if bool(cfg.get("SIGLIP_WORKER_ENABLED", True)):
@@ -111,10 +96,17 @@ def _on_startup() -> None:
 @router.on_event("shutdown")
 def _on_shutdown() -> None:
     stop_eh_cover_embedding_worker()
+    stop_ann_index_worker()
+    stop_config_refresher()
     if scheduler.running:
         scheduler.shutdown(wait=False)
 
 
+@router.on_event("shutdown")
+async def _close_db_pools() -> None:
+    await close_async_pool()
+
+
 @router.get("/api/visual-task/status")
 def visual_task_status() -> dict[str, Any]:
     return {"ok": True, "status": get_eh_cover_embedding_worker_status()}
@@ -142,7 +134,7 @@ def disable_visual_task() -> dict[str, Any]:
 
 
 @router.get("/api/home/history")
-def home_history(
+async def home_history(
     cursor: str = Query(default=""),
     limit: int = Query(default=24, ge=1, le=80),
     include_categories: str = Query(default=""),
@@ -164,33 +156,30 @@ def home_history(
     tags = _parse_csv_param(include_tags)
     if "__none__" in cats:
         return {"items": [], "next_cursor": "", "has_more": False, "meta": {"mode": "history"}}
-    cat_tag_vals = [f"category:{c}" for c in cats if c and c != "__none__"]
 
     conds: list[str] = []
     params: list[Any] = []
     if cursor_ep is not None:
         conds.append("(l.read_time < %s OR (l.read_time = %s AND l.arcid < %s))")
         params.extend([int(cursor_ep), int(cursor_ep), cursor_arcid])
-    if cat_tag_vals:
-        conds.append("EXISTS (SELECT 1 FROM unnest(w.tags) t(tag) WHERE lower(t.tag) = ANY(%s))")
-        params.append(cat_tag_vals)
-    for t in tags:
-        conds.append("EXISTS (SELECT 1 FROM unnest(w.tags) tt(tag) WHERE lower(tt.tag) LIKE %s)")
-        params.append(f"%{t}%")
+    fconds, fparams = _filter_conds(cats, tags, alias="w")
+    conds.extend(fconds)
+    params.extend(fparams)
 
     where = f"WHERE {' AND '.join(conds)}" if conds else ""
     sql = (
         "WITH latest AS ("
         "SELECT arcid, max(read_time) AS read_time FROM read_events GROUP BY arcid"
         ") "
-        "SELECT l.arcid, l.read_time, w.title, w.tags, w.eh_posted, w.date_added, w.lastreadtime "
+        "SELECT l.arcid, l.read_time, w.title, w.tags, w.eh_posted, w.date_added, w.lastreadtime, "
+        "w.category, w.source_eh_url, w.source_ex_url "
         "FROM latest l JOIN works w ON w.arcid = l.arcid "
         f"{where} "
         "ORDER BY l.read_time DESC, l.arcid DESC LIMIT %s"
     )
     params.append(int(limit))
-    rows = query_rows(sql, tuple(params))
-    cfg, _ = resolve_config()
+    rows = await aquery_rows(sql, tuple(params))
+    cfg, _ = cached_config()
     items = [_item_from_work(r, cfg) for r in rows]
     next_cursor = ""
     if len(rows) >= int(limit):
@@ -205,7 +194,7 @@ def home_history(
 
 
 @router.get("/api/home/local")
-def home_local(
+async def home_local(
     request: Request,
     cursor: str = Query(default=""),
     limit: int = Query(default=24, ge=1, le=80),
@@ -227,7 +216,7 @@ def home_local(
         except Exception:
             offset = 0
 
-    cfg, _ = resolve_config()
+    cfg, _ = cached_config()
     cats = _parse_csv_param(include_categories)
     tags = _parse_csv_param(include_tags)
     if "__none__" in cats:
@@ -237,13 +226,20 @@ def home_local(
     if safe_sort_by == "xp":
         auth_user = getattr(request.state, "auth_user", {}) or {}
         user_id = str(auth_user.get("uid") or "default_user")
-        ranked = get_local_recommendation_items_cached(cfg, user_id=user_id, sort_order=safe_sort_order)
-        all_items = _apply_item_filters(list(ranked.get("items") or []), cats, tags)
+        ranked = await run_blocking(
+            get_local_recommendation_page,
+            cfg,
+            user_id=user_id,
+            sort_order=safe_sort_order,
+            offset=offset,
+            limit=int(limit),
+            categories=cats,
+            tags=tags,
+        )
         end = offset + int(limit)
-        items = all_items[offset:end]
-        next_cursor = str(end) if end < len(all_items) else ""
+        next_cursor = str(end) if end < int(ranked.get("matched") or 0) else ""
         return {
-            "items": items,
+            "items": list(ranked.get("items") or []),
             "next_cursor": next_cursor,
             "has_more": bool(next_cursor),
             "meta": {
@@ -255,25 +251,18 @@ def home_local(
         }
 
     safe_col = "date_added" if safe_sort_by == "date_added" else "eh_posted"
-    conds: list[str] = []
-    params: list[Any] = []
-    cat_tag_vals = [f"category:{c}" for c in cats if c and c != "__none__"]
-    if cat_tag_vals:
-        conds.append("EXISTS (SELECT 1 FROM unnest(w.tags) t(tag) WHERE lower(t.tag) = ANY(%s))")
-        params.append(cat_tag_vals)
-    for t in tags:
-        conds.append("EXISTS (SELECT 1 FROM unnest(w.tags) tt(tag) WHERE lower(tt.tag) LIKE %s)")
-        params.append(f"%{t}%")
+    conds, params = _filter_conds(cats, tags, alias="w")
     where = f"WHERE {' AND '.join(conds)}" if conds else ""
     sql = (
-        "SELECT w.arcid, w.title, w.tags, w.eh_posted, w.date_added, w.lastreadtime "
+        "SELECT w.arcid, w.title, w.tags, w.eh_posted, w.date_added, w.lastreadtime, "
+        "w.category, w.source_eh_url, w.source_ex_url "
         "FROM works w "
         f"{where} "
         f"ORDER BY COALESCE(w.{safe_col}, 0) {'ASC' if safe_sort_order == 'asc' else 'DESC'}, w.arcid {'ASC' if safe_sort_order == 'asc' else 'DESC'} "
         "OFFSET %s LIMIT %s"
     )
     params.extend([int(offset), int(limit)])
-    rows = query_rows(sql, tuple(params))
+    rows = await aquery_rows(sql, tuple(params))
     items = [_item_from_work(r, cfg) for r in rows]
     next_cursor = str(offset + int(limit)) if len(rows) >= int(limit) else ""
     return {
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import subprocess
 import threading
@@ -8,7 +9,6 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
-import psycopg
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import StreamingResponse
 
@@ -16,7 +16,7 @@ from ..core.constants import RUN_HISTORY_FILE, TASK_LOG_DIR
 from ..core.runtime_state import task_proc_lock, task_proc_state, task_state, task_state_lock
 from ..core.schemas import ScheduleUpdateRequest, TaskRunRequest, TaskStopRequest
 from ..services.config_service import build_runtime_env, ensure_dirs, now_iso
-from ..services.db_service import db_dsn
+from ..services.db_service import db_dsn, db_transaction, execute
 from ..services.schedule_service import (
     _clear_eh_checkpoint,
     _filter_run_history,
@@ -209,8 +209,8 @@ def list_tasks() -> dict[str, Any]:
 
 
 @router.get("/api/tasks/stream")
-def stream_tasks() -> StreamingResponse:
-    def event_stream():
+async def stream_tasks() -> StreamingResponse:
+    async def event_stream():
         while True:
             with task_state_lock:
                 items = [
@@ -222,7 +222,7 @@ def stream_tasks() -> StreamingResponse:
                 ]
                 payload = json.dumps({"tasks": items}, ensure_ascii=False)
             yield f"data: {payload}\n\n"
-            time.sleep(1)
+            await asyncio.sleep(1)
 
     return StreamingResponse(event_stream(), media_type="text/event-stream")
 
@@ -318,7 +318,7 @@ def audit_log_tail(
 
 @router.post("/api/db/works/deduplicate")
 def deduplicate_works_by_arcid() -> dict[str, Any]:
-    dsn = _require_db_dsn()
+    _require_db_dsn()
     sql = (
         "WITH ranked AS ("
         "SELECT ctid, row_number() OVER (PARTITION BY arcid ORDER BY COALESCE(lastreadtime, 0) DESC, ctid DESC) AS rn "
@@ -328,26 +328,28 @@ def deduplicate_works_by_arcid() -> dict[str, Any]:
         "WHERE w.ctid = r.ctid AND r.rn > 1"
     )
     try:
-        with psycopg.connect(dsn) as conn:
-            with conn.cursor() as cur:
-                cur.execute(sql)
-                deleted = int(cur.rowcount or 0)
-            conn.commit()
+        deleted = execute(sql)
         return {"ok": True, "deleted": deleted}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"deduplicate works failed: {e}")
 
 
+@router.post("/api/db/tag-stats/rebuild")
+def rebuild_tag_stats() -> dict[str, Any]:
+    _require_db_dsn()
+    try:
+        with db_transaction() as conn:
+            row = conn.execute("SELECT rebuild_tag_stats()").fetchone()
+        return {"ok": True, "rows": int((row or [0])[0] or 0)}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"rebuild tag_stats failed: {e}")
+
+
 @router.delete("/api/db/read-events")
 def clear_read_events() -> dict[str, Any]:
-    dsn = _require_db_dsn()
+    _require_db_dsn()
     try:
-        with psycopg.connect(dsn) as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT count(*) FROM read_events")
-                before = int((cur.fetchone() or [0])[0] or 0)
-                cur.execute("DELETE FROM read_events")
-            conn.commit()
-        return {"ok": True, "deleted": before}
+        deleted = execute("DELETE FROM read_events")
+        return {"ok": True, "deleted": deleted}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"clear read_events failed: {e}")
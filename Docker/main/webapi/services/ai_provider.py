@@ -5,6 +5,9 @@ from urllib.parse import urlparse
 
 import requests
 
+from .embedding_cache import cached_embedding, normalize_text
+from .tag_extract_cache import get_cached_tags, put_cached_tags, tag_extract_cache_key, tag_set_fingerprint
+
 
 def check_http(url: str, timeout: int = 4) -> tuple[bool, str]:
     if not url:
@@ -108,6 +111,11 @@ def _provider_embedding(base_url: str, api_key: str, model: str, text: str, *, t
     base = _provider_v1_base(base_url)
     if not base:
         raise RuntimeError("embedding base not configured")
+    model_id = f"provider:{base}|{str(model or '').strip()}"
+    return cached_embedding(model_id, str(text or ""), lambda s: _request_embedding(base, api_key, model, s, timeout_s))
+
+
+def _request_embedding(base: str, api_key: str, model: str, text: str, timeout_s: int) -> list[float]:
     headers = {"Content-Type": "application/json"}
     if str(api_key or "").strip():
         headers["Authorization"] = f"Bearer {str(api_key).strip()}"
@@ -186,8 +194,12 @@ def _provider_chat_stream_chunks(
                 yield str(delta)
 
 
-def _extract_tags_by_llm(query: str, cfg: dict[str, Any], allowed_tags: list[str]) -> list[str]:
-    q = str(query or "").strip()
+_TAG_EXTRACT_USER_PROMPT = "用户查询(query):\n{query}\n\nallowed_tags(JSON array):\n{tags}\n\n只输出JSON: {{\"tags\": [...]}}"
+
+
+def _extract_tags_by_llm(query: str, cfg: dict[str, Any], allowed_tags: list[str], *, timeout_s: int = 0) -> list[str]:
+    # Normalized once so the cache key and the prompt always see the same text.
+    q = normalize_text(query)
     if not q or not allowed_tags:
         return []
     base = str(cfg.get("LLM_API_BASE") or "").strip()
@@ -196,21 +208,26 @@ def _extract_tags_by_llm(query: str, cfg: dict[str, Any], allowed_tags: list[str
     if not base or not model:
         return []
     system = str(cfg.get("PROMPT_TAG_EXTRACT_SYSTEM") or "").strip() or "Extract tags as JSON"
-    user = (
-        "用户查询(query):\n"
-        + q
-        + "\n\nallowed_tags(JSON array):\n"
-        + json.dumps(list(allowed_tags)[:1200], ensure_ascii=False)
-        + "\n\n只输出JSON: {\"tags\": [...]}"
+    allowed = list(allowed_tags)[:1200]
+    max_tokens = _llm_max_tokens(cfg, "LLM_MAX_TOKENS_TAG_EXTRACT", 1200)
+    cache_id = tag_extract_cache_key(
+        q,
+        f"{_provider_v1_base(base)}|{model}",
+        json.dumps([system, _TAG_EXTRACT_USER_PROMPT, max_tokens], ensure_ascii=False),
+        tag_set_fingerprint(allowed),
     )
+    cached = get_cached_tags(cache_id)
+    if cached is not None:
+        return cached
+    user = _TAG_EXTRACT_USER_PROMPT.format(query=q, tags=json.dumps(allowed, ensure_ascii=False))
     obj = _provider_chat_json(
         base,
         key,
         model,
         [{"role": "system", "content": system}, {"role": "user", "content": user}],
         temperature=0.0,
-        max_tokens=_llm_max_tokens(cfg, "LLM_MAX_TOKENS_TAG_EXTRACT", 1200),
-        timeout_s=_llm_timeout_s(cfg),
+        max_tokens=max_tokens,
+        timeout_s=int(timeout_s) if timeout_s > 0 else _llm_timeout_s(cfg),
     )
     text = ""
     try:
@@ -226,4 +243,6 @@ def _extract_tags_by_llm(query: str, cfg: dict[str, Any], allowed_tags: list[str
     tags = data.get("tags") if isinstance(data, dict) else []
     if not isinstance(tags, list):
         return []
-    return [str(x).strip() for x in tags if str(x).strip()]
+    out = [str(x).strip() for x in tags if str(x).strip()]
+    put_cached_tags(cache_id, out)
+    return out
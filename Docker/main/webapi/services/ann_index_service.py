@@ -0,0 +1,190 @@
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from hunterAgent.core import ann_index
+from hunterAgent.core.ann_index import VectorIndex
+
+from ..core.config_values import as_bool as _as_bool
+from ..core.constants import ANN_INDEX_DIR
+from .config_service import resolve_config
+from .db_service import db_dsn, query_rows
+from .image_search_cache import bump_embedding_generation
+
+# Each index mirrors one pgvector column. Rows are keyed the same way the search
+# channels build item ids ("arcid" / "gid:token"), and synced by (updated_at, keys).
+_SPECS: dict[str, dict[str, Any]] = {
+    "works_visual": {"table": "works", "keys": ("arcid",), "key_min": ("",), "column": "visual_embedding", "dim": 1152},
+    "works_page_visual": {"table": "works", "keys": ("arcid",), "key_min": ("",), "column": "page_visual_embedding", "dim": 1152},
+    "works_desc": {"table": "works", "keys": ("arcid",), "key_min": ("",), "column": "desc_embedding", "dim": 1024},
+    "works_pages": {"table": "work_page_embeddings", "keys": ("arcid", "page_no"), "key_min": ("", -1), "column": "embedding", "dim": 1152},
+    "eh_cover": {"table": "eh_works", "keys": ("gid", "token"), "key_min": (-1, ""), "column": "cover_embedding", "dim": 1152},
+}
+_SYNC_BATCH = 2000
+# Re-read a short window behind the watermark: now() is the transaction start, so a
+# slow writer can commit rows stamped earlier than ones we have already seen.
+_SYNC_LAG_S = 120
+_RECONCILE_INTERVAL_S = 1800
+_SNAPSHOT_INTERVAL_S = 300
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+_worker_thread: threading.Thread | None = None
+_worker_stop = threading.Event()
+_worker_lock = threading.Lock()
+_status_lock = threading.Lock()
+_status: dict[str, dict[str, Any]] = {}
+
+
+def _row_key(spec: dict[str, Any], row: dict[str, Any]) -> str:
+    return ":".join(str(row.get(k) if row.get(k) is not None else "") for k in spec["keys"])
+
+
+def _set_status(name: str, **kwargs: Any) -> None:
+    with _status_lock:
+        _status.setdefault(name, {}).update(kwargs)
+
+
+def _sync_index(name: str, index: VectorIndex) -> int:
+    spec = _SPECS[name]
+    keys = ", ".join(spec["keys"])
+    marks = ", ".join(["%s"] * (len(spec["keys"]) + 1))
+    sql = (
+        f"SELECT {keys}, updated_at, {spec['column']} AS vec FROM {spec['table']} "
+        f"WHERE (updated_at, {keys}) > ({marks}) "
+        f"ORDER BY updated_at, {keys} LIMIT %s"
+    )
+    if index.watermark:
+        start = datetime.fromisoformat(str(index.watermark[0])) - timedelta(seconds=_SYNC_LAG_S)
+    else:
+        start = _EPOCH
+    cursor: list[Any] = [start, *spec["key_min"]]
+    changed = 0
+    while not _worker_stop.is_set():
+        rows = query_rows(sql, (*cursor, _SYNC_BATCH), binary=True)
+        if not rows:
+            break
+        upserts: list[tuple[str, Any]] = []
+        removals: list[str] = []
+        for r in rows:
+            key = _row_key(spec, r)
+            if r.get("vec") is None:
+                removals.append(key)
+            else:
+                upserts.append((key, r.get("vec")))
+        changed += index.upsert(upserts) + index.remove(removals)
+        last = rows[-1]
+        cursor = [last.get("updated_at"), *(last.get(k) for k in spec["keys"])]
+        if not index.watermark or cursor[0] >= datetime.fromisoformat(str(index.watermark[0])):
+            index.watermark = [cursor[0].isoformat(), *cursor[1:]]
+        if len(rows) < _SYNC_BATCH:
+            break
+    return changed
+
+
+def _reconcile_index(name: str, index: VectorIndex) -> int:
+    spec = _SPECS[name]
+    rows = query_rows(f"SELECT {', '.join(spec['keys'])} FROM {spec['table']} WHERE {spec['column']} IS NOT NULL")
+    present = {_row_key(spec, r) for r in rows}
+    return index.remove([k for k in index.keys() if k not in present])
+
+
+def _load_or_create(name: str) -> VectorIndex:
+    index = ann_index.get_index(name)
+    if index is not None:
+        return index
+    index = VectorIndex(name, int(_SPECS[name]["dim"]))
+    loaded = index.load(ANN_INDEX_DIR)
+    _set_status(name, snapshot_loaded=loaded, last_snapshot_at=0.0, last_reconcile_at=time.time() if not loaded else 0.0)
+    ann_index.register_index(index)
+    return index
+
+
+def _sync_all() -> None:
+    for name in _SPECS:
+        if _worker_stop.is_set():
+            return
+        index = _load_or_create(name)
+        t0 = time.time()
+        try:
+            changed = _sync_index(name, index)
+            with _status_lock:
+                st = dict(_status.get(name) or {})
+            if time.time() - float(st.get("last_reconcile_at") or 0.0) >= _RECONCILE_INTERVAL_S:
+                changed += _reconcile_index(name, index)
+                _set_status(name, last_reconcile_at=time.time())
+            index.ready = True
+            if changed and _SPECS[name]["column"] != "desc_embedding":
+                # Image search may have cached rankings read from the previous index state.
+                bump_embedding_generation()
+            if changed and time.time() - float(st.get("last_snapshot_at") or 0.0) >= _SNAPSHOT_INTERVAL_S:
+                index.save(ANN_INDEX_DIR)
+                _set_status(name, last_snapshot_at=time.time())
+            _set_status(name, last_sync_at=time.time(), last_sync_ms=int((time.time() - t0) * 1000), last_changed=changed, last_error="")
+        except Exception as e:
+            print(f"[ann_index] sync {name} failed: {e}", file=sys.stderr)
+            print(traceback.format_exc(), file=sys.stderr)
+            _set_status(name, last_error=str(e))
+
+
+def _drop_all() -> None:
+    for name in _SPECS:
+        ann_index.unregister_index(name)
+
+
+def _save_all() -> None:
+    for name in _SPECS:
+        index = ann_index.get_index(name)
+        if index is None or not index.ready:
+            continue
+        try:
+            index.save(ANN_INDEX_DIR)
+            _set_status(name, last_snapshot_at=time.time())
+        except Exception as e:
+            print(f"[ann_index] snapshot {name} failed: {e}", file=sys.stderr)
+
+
+def _worker_loop() -> None:
+    while not _worker_stop.is_set():
+        interval = 60
+        try:
+            cfg, _ = resolve_config()
+            interval = max(5, int(cfg.get("ANN_INDEX_SYNC_INTERVAL_S", 60) or 60))
+            if not _as_bool(cfg.get("ANN_INDEX_ENABLED"), False):
+                _drop_all()
+            elif db_dsn():
+                _sync_all()
+        except Exception as e:
+            print(f"[ann_index] worker loop error: {e}", file=sys.stderr)
+        _worker_stop.wait(float(interval))
+
+
+def start_ann_index_worker() -> None:
+    global _worker_thread
+    with _worker_lock:
+        if _worker_thread and _worker_thread.is_alive():
+            return
+        _worker_stop.clear()
+        _worker_thread = threading.Thread(target=_worker_loop, name="ann-index-sync", daemon=True)
+        _worker_thread.start()
+
+
+def stop_ann_index_worker() -> None:
+    _worker_stop.set()
+    with _worker_lock:
+        thread = _worker_thread
+    if thread and thread.is_alive():
+        thread.join(timeout=10.0)
+    _save_all()
+
+
+def ann_index_stats() -> dict[str, Any]:
+    out: dict[str, Any] = {"hnswlib": ann_index.HNSWLIB_AVAILABLE, "indexes": {}}
+    with _status_lock:
+        status = {k: dict(v) for k, v in _status.items()}
+    for name in _SPECS:
+        index = ann_index.get_index(name)
+        out["indexes"][name] = {**(index.stats() if index is not None else {"ready": False}), **status.get(name, {})}
+    return out
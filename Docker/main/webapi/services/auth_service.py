@@ -8,19 +8,32 @@ import secrets
 import threading
 import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import Any
 from urllib.parse import quote_plus
 
-import psycopg
 from psycopg.rows import dict_row
 
+from .db_service import db_connection
+
 
 _RATE_LOCK = threading.Lock()
 _RATE_MAP: dict[str, list[float]] = {}
 _RATE_BLOCK_UNTIL: dict[str, float] = {}
 _RECOVERY_LOCK = threading.Lock()
 
+_SESSION_CACHE_TTL_S = max(0.0, float(os.getenv("DATA_UI_AUTH_SESSION_CACHE_TTL_S", "30") or 30))
+_SESSION_CACHE_MAX = max(16, int(os.getenv("DATA_UI_AUTH_SESSION_CACHE_MAX", "1024") or 1024))
+_SESSION_CACHE_LOCK = threading.Lock()
+_SESSION_CACHE: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+_SCHEMA_LOCK = threading.Lock()
+_SCHEMA_READY: set[str] = set()
+_BOOTSTRAP_TTL_S = 60.0
+_BOOTSTRAP_LOCK = threading.Lock()
+_BOOTSTRAP_CACHE: dict[str, dict[str, Any]] = {}
+
 
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
@@ -57,6 +70,57 @@ def _token_hash(token: str) -> str:
     return hashlib.sha256(str(token or "").encode("utf-8", errors="ignore")).hexdigest()
 
 
+def _session_cache_get(dsn: str, token_hash: str) -> dict[str, Any] | None:
+    now = time.monotonic()
+    with _SESSION_CACHE_LOCK:
+        entry = _SESSION_CACHE.get(token_hash)
+        if entry is None:
+            return None
+        if entry.get("dsn") != dsn or float(entry.get("deadline") or 0.0) <= now:
+            _SESSION_CACHE.pop(token_hash, None)
+            return None
+        _SESSION_CACHE.move_to_end(token_hash)
+        return entry
+
+
+def _session_cache_put(dsn: str, token_hash: str, user: dict[str, Any], csrf_hash: str, expires_at: datetime) -> None:
+    if _SESSION_CACHE_TTL_S <= 0:
+        return
+    remaining = (expires_at - _utcnow()).total_seconds()
+    ttl = min(_SESSION_CACHE_TTL_S, remaining)
+    if ttl <= 0:
+        return
+    entry = {
+        "dsn": dsn,
+        "user": dict(user),
+        "csrf_hash": str(csrf_hash or ""),
+        "deadline": time.monotonic() + ttl,
+    }
+    with _SESSION_CACHE_LOCK:
+        _SESSION_CACHE[token_hash] = entry
+        _SESSION_CACHE.move_to_end(token_hash)
+        while len(_SESSION_CACHE) > _SESSION_CACHE_MAX:
+            _SESSION_CACHE.popitem(last=False)
+
+
+def _session_cache_drop(token_hash: str) -> None:
+    with _SESSION_CACHE_LOCK:
+        _SESSION_CACHE.pop(token_hash, None)
+
+
+def _session_cache_drop_uid(uid: str) -> None:
+    target = str(uid or "")
+    with _SESSION_CACHE_LOCK:
+        stale = [k for k, v in _SESSION_CACHE.items() if str((v.get("user") or {}).get("uid") or "") == target]
+        for k in stale:
+            _SESSION_CACHE.pop(k, None)
+
+
+def _invalidate_bootstrap(dsn: str) -> None:
+    with _BOOTSTRAP_LOCK:
+        _BOOTSTRAP_CACHE.pop(dsn, None)
+
+
 def build_dsn(host: str, port: int, db: str, user: str, password: str, sslmode: str = "prefer") -> str:
     return (
         f"postgresql://{quote_plus(str(user or ''))}:{quote_plus(str(password or ''))}@{str(host or '').strip()}:{int(port)}/{quote_plus(str(db or ''))}"
@@ -65,6 +129,16 @@ def build_dsn(host: str, port: int, db: str, user: str, password: str, sslmode:
 
 
 def ensure_auth_schema(dsn: str) -> None:
+    if dsn in _SCHEMA_READY:
+        return
+    with _SCHEMA_LOCK:
+        if dsn in _SCHEMA_READY:
+            return
+        _create_auth_schema(dsn)
+        _SCHEMA_READY.add(dsn)
+
+
+def _create_auth_schema(dsn: str) -> None:
     create_users = (
         "CREATE TABLE IF NOT EXISTS ui_users ("
         "uid uuid PRIMARY KEY,"
@@ -93,7 +167,7 @@ def ensure_auth_schema(dsn: str) -> None:
         "value text NOT NULL DEFAULT '',"
         "updated_at timestamptz NOT NULL DEFAULT now())"
     )
-    with psycopg.connect(dsn) as conn:
+    with db_connection(dsn) as conn:
         with conn.cursor() as cur:
             cur.execute(create_users)
             cur.execute(create_sessions)
@@ -103,7 +177,7 @@ def ensure_auth_schema(dsn: str) -> None:
 
 
 def _get_meta(dsn: str, key: str) -> str:
-    with psycopg.connect(dsn, row_factory=dict_row) as conn:
+    with db_connection(dsn, row_factory=dict_row) as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT value FROM ui_meta WHERE key=%s LIMIT 1", (str(key or ""),))
             row = cur.fetchone() or {}
@@ -111,18 +185,19 @@ def _get_meta(dsn: str, key: str) -> str:
 
 
 def _set_meta(dsn: str, key: str, value: str) -> None:
-    with psycopg.connect(dsn) as conn:
+    with db_connection(dsn) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 "INSERT INTO ui_meta(key,value,updated_at) VALUES (%s,%s,now()) ON CONFLICT (key) DO UPDATE SET value=EXCLUDED.value, updated_at=now()",
                 (str(key or ""), str(value or "")),
             )
         conn.commit()
+    _invalidate_bootstrap(dsn)
 
 
 def bootstrap_status(dsn: str) -> dict[str, Any]:
     ensure_auth_schema(dsn)
-    with psycopg.connect(dsn, row_factory=dict_row) as conn:
+    with db_connection(dsn, row_factory=dict_row) as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT count(*)::int AS n FROM ui_users")
             users = int((cur.fetchone() or {}).get("n") or 0)
@@ -141,6 +216,21 @@ def bootstrap_status(dsn: str) -> dict[str, Any]:
     }
 
 
+def cached_bootstrap_status(dsn: str) -> dict[str, Any]:
+    now = time.monotonic()
+    with _BOOTSTRAP_LOCK:
+        hit = _BOOTSTRAP_CACHE.get(dsn)
+        if hit is not None and float(hit.get("deadline") or 0.0) > now:
+            return dict(hit["status"])
+    status = bootstrap_status(dsn)
+    # Only a configured status is cached: a stale "not configured" would leave /api
+    # open after an admin appears (racing register_first_admin, or a DB restore).
+    if bool(status.get("configured")):
+        with _BOOTSTRAP_LOCK:
+            _BOOTSTRAP_CACHE[dsn] = {"status": dict(status), "deadline": now + _BOOTSTRAP_TTL_S}
+    return status
+
+
 def register_first_admin(dsn: str, username: str, password: str, pepper: str = "") -> dict[str, Any]:
     user = str(username or "").strip()
     if len(user) < 3:
@@ -151,7 +241,7 @@ def register_first_admin(dsn: str, username: str, password: str, pepper: str = "
     encoded = _hash_password(password, pepper=pepper)
     uid = str(uuid.uuid4())
     now = _utcnow()
-    with psycopg.connect(dsn) as conn:
+    with db_connection(dsn) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 "INSERT INTO ui_users(uid, username, password_hash, role, created_at) VALUES (%s,%s,%s,%s,%s)",
@@ -163,6 +253,7 @@ def register_first_admin(dsn: str, username: str, password: str, pepper: str = "
                     (key, "1"),
                 )
         conn.commit()
+    _invalidate_bootstrap(dsn)
     return {"uid": uid, "username": user, "role": "admin", "registered_at": now.isoformat()}
 
 
@@ -171,7 +262,7 @@ def authenticate_user(dsn: str, username: str, password: str, pepper: str = "")
     if not user:
         return None
     ensure_auth_schema(dsn)
-    with psycopg.connect(dsn, row_factory=dict_row) as conn:
+    with db_connection(dsn, row_factory=dict_row) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 "SELECT uid::text AS uid, username, password_hash, role, created_at, disabled FROM ui_users WHERE username=%s LIMIT 1",
@@ -197,7 +288,7 @@ def create_session(dsn: str, uid: str, ttl_hours: int, ip: str = "", user_agent:
     now = _utcnow()
     expire = now.timestamp() + max(1, int(ttl_hours)) * 3600
     expires_at = datetime.fromtimestamp(expire, tz=timezone.utc)
-    with psycopg.connect(dsn) as conn:
+    with db_connection(dsn) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 "INSERT INTO ui_sessions(sid,uid,token_hash,created_at,expires_at,last_seen_at,ip,user_agent,revoked) VALUES (%s,%s::uuid,%s,%s,%s,%s,%s,%s,false)",
@@ -210,29 +301,35 @@ def create_session(dsn: str, uid: str, ttl_hours: int, ip: str = "", user_agent:
 
 def revoke_session(dsn: str, token: str) -> None:
     h = _token_hash(token)
-    with psycopg.connect(dsn) as conn:
+    with db_connection(dsn) as conn:
         with conn.cursor() as cur:
             cur.execute("UPDATE ui_sessions SET revoked=true WHERE token_hash=%s", (h,))
         conn.commit()
+    _session_cache_drop(h)
 
 
 def issue_csrf_token(dsn: str, token: str) -> str:
     h = _token_hash(token)
     csrf = secrets.token_urlsafe(24)
-    with psycopg.connect(dsn) as conn:
+    with db_connection(dsn) as conn:
         with conn.cursor() as cur:
             cur.execute("UPDATE ui_sessions SET csrf_hash=%s WHERE token_hash=%s", (_token_hash(csrf), h))
         conn.commit()
+    _session_cache_drop(h)
     return csrf
 
 
 def verify_csrf(dsn: str, token: str, csrf_token: str) -> bool:
     h = _token_hash(token)
-    with psycopg.connect(dsn, row_factory=dict_row) as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT csrf_hash FROM ui_sessions WHERE token_hash=%s LIMIT 1", (h,))
-            row = cur.fetchone() or {}
-    expected = str(row.get("csrf_hash") or "")
+    cached = _session_cache_get(dsn, h)
+    if cached is not None:
+        expected = str(cached.get("csrf_hash") or "")
+    else:
+        with db_connection(dsn, row_factory=dict_row) as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT csrf_hash FROM ui_sessions WHERE token_hash=%s LIMIT 1", (h,))
+                row = cur.fetchone() or {}
+        expected = str(row.get("csrf_hash") or "")
     if not expected:
         return False
     return hmac.compare_digest(expected, _token_hash(str(csrf_token or "")))
@@ -242,18 +339,19 @@ def update_username(dsn: str, uid: str, username: str) -> dict[str, Any]:
     name = str(username or "").strip()
     if len(name) < 3:
         raise ValueError("username must be at least 3 characters")
-    with psycopg.connect(dsn, row_factory=dict_row) as conn:
+    with db_connection(dsn, row_factory=dict_row) as conn:
         with conn.cursor() as cur:
             cur.execute("UPDATE ui_users SET username=%s WHERE uid=%s::uuid RETURNING uid::text AS uid, username, role, created_at", (name, uid))
             row = cur.fetchone()
         conn.commit()
+    _session_cache_drop_uid(uid)
     if not row:
         raise ValueError("user not found")
     return dict(row)
 
 
 def change_password(dsn: str, uid: str, old_password: str, new_password: str, pepper: str = "") -> None:
-    with psycopg.connect(dsn, row_factory=dict_row) as conn:
+    with db_connection(dsn, row_factory=dict_row) as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT password_hash FROM ui_users WHERE uid=%s::uuid LIMIT 1", (uid,))
             row = cur.fetchone() or {}
@@ -264,6 +362,7 @@ def change_password(dsn: str, uid: str, old_password: str, new_password: str, pe
             cur.execute("UPDATE ui_users SET password_hash=%s WHERE uid=%s::uuid", (new_hash, uid))
             cur.execute("UPDATE ui_sessions SET revoked=true WHERE uid=%s::uuid", (uid,))
         conn.commit()
+    _session_cache_drop_uid(uid)
 
 
 def force_change_password_by_username(dsn: str, username: str, new_password: str, pepper: str = "") -> None:
@@ -271,7 +370,7 @@ def force_change_password_by_username(dsn: str, username: str, new_password: str
     if len(user) < 1:
         raise ValueError("username is required")
     new_hash = _hash_password(new_password, pepper=pepper)
-    with psycopg.connect(dsn, row_factory=dict_row) as conn:
+    with db_connection(dsn, row_factory=dict_row) as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT uid::text AS uid FROM ui_users WHERE username=%s LIMIT 1", (user,))
             row = cur.fetchone() or {}
@@ -281,10 +380,11 @@ def force_change_password_by_username(dsn: str, username: str, new_password: str
             cur.execute("UPDATE ui_users SET password_hash=%s WHERE uid=%s::uuid", (new_hash, uid))
             cur.execute("UPDATE ui_sessions SET revoked=true WHERE uid=%s::uuid", (uid,))
         conn.commit()
+    _session_cache_drop_uid(uid)
 
 
 def delete_account(dsn: str, uid: str, password: str, pepper: str = "") -> None:
-    with psycopg.connect(dsn, row_factory=dict_row) as conn:
+    with db_connection(dsn, row_factory=dict_row) as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT password_hash FROM ui_users WHERE uid=%s::uuid LIMIT 1", (uid,))
             row = cur.fetchone() or {}
@@ -293,10 +393,14 @@ def delete_account(dsn: str, uid: str, password: str, pepper: str = "") -> None:
                 raise ValueError("password is invalid")
             cur.execute("DELETE FROM ui_users WHERE uid=%s::uuid", (uid,))
             cur.execute("DELETE FROM ui_sessions WHERE uid=%s::uuid", (uid,))
-            _set_meta(dsn, "user_confiured", "")
-            _set_meta(dsn, "user_configured", "")
-            _set_meta(dsn, "initialized", "")
+            for key in ("user_confiured", "user_configured", "initialized"):
+                cur.execute(
+                    "INSERT INTO ui_meta(key,value,updated_at) VALUES (%s,'',now()) ON CONFLICT (key) DO UPDATE SET value=EXCLUDED.value, updated_at=now()",
+                    (key,),
+                )
         conn.commit()
+    _session_cache_drop_uid(uid)
+    _invalidate_bootstrap(dsn)
 
 
 def set_initialized(dsn: str, value: bool = True) -> None:
@@ -401,11 +505,14 @@ def get_session_user(dsn: str, token: str) -> dict[str, Any] | None:
             }
         return None
     h = _token_hash(token)
+    cached = _session_cache_get(dsn, h)
+    if cached is not None:
+        return dict(cached["user"])
     now = _utcnow()
-    with psycopg.connect(dsn, row_factory=dict_row) as conn:
+    with db_connection(dsn, row_factory=dict_row) as conn:
         with conn.cursor() as cur:
             cur.execute(
-                "SELECT s.sid::text AS sid, s.uid::text AS uid, s.expires_at, s.revoked, u.username, u.role, u.disabled "
+                "SELECT s.sid::text AS sid, s.uid::text AS uid, s.expires_at, s.revoked, s.csrf_hash, u.username, u.role, u.disabled "
                 "FROM ui_sessions s JOIN ui_users u ON u.uid=s.uid "
                 "WHERE s.token_hash=%s LIMIT 1",
                 (h,),
@@ -420,13 +527,15 @@ def get_session_user(dsn: str, token: str) -> dict[str, Any] | None:
                 return None
             cur.execute("UPDATE ui_sessions SET last_seen_at=now() WHERE sid=%s::uuid", (str(row.get("sid") or ""),))
         conn.commit()
-    return {
+    user = {
         "sid": str(row.get("sid") or ""),
         "uid": str(row.get("uid") or ""),
         "username": str(row.get("username") or ""),
         "role": str(row.get("role") or "user"),
         "expires_at": exp.isoformat() if isinstance(exp, datetime) else "",
     }
+    _session_cache_put(dsn, h, user, str(row.get("csrf_hash") or ""), exp)
+    return user
 
 
 def generate_recovery_codes(count: int = 10) -> list[str]:
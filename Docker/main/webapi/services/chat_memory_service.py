@@ -3,10 +3,10 @@ import re
 from datetime import datetime
 from typing import Any
 
-import psycopg
+from hunterAgent.core.vector_codec import to_vector
 from psycopg.rows import dict_row
 
-from .db_service import db_dsn, query_rows
+from .db_service import db_connection, db_dsn, query_rows
 
 _PREF_RE = re.compile(r"(喜欢|不喜欢|讨厌|偏好|口味|别推|不要|不错|再来|黑名单)")
 
@@ -119,7 +119,7 @@ def load_chat_history(user_id: str, session_id: str, limit: int = 120) -> list[d
     uid = str(user_id or "default_user")
     sid = str(session_id or "default").strip() or "default"
     lim = max(1, min(400, int(limit)))
-    with psycopg.connect(dsn, row_factory=dict_row) as conn:
+    with db_connection(dsn, row_factory=dict_row) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 "SELECT id, role, content, tool_calls, created_at FROM chat_history "
@@ -147,7 +147,7 @@ def append_chat_message(
     if r not in {"user", "assistant", "system", "tool"}:
         r = "user"
     body = json.dumps(extra or {}, ensure_ascii=False)
-    with psycopg.connect(dsn) as conn:
+    with db_connection(dsn) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 "INSERT INTO chat_history(session_id, user_id, role, content, tool_calls) "
@@ -163,7 +163,7 @@ def update_chat_message(user_id: str, session_id: str, index: int, text: str) ->
         return []
     uid = str(user_id or "default_user")
     sid = str(session_id or "default").strip() or "default"
-    with psycopg.connect(dsn, row_factory=dict_row) as conn:
+    with db_connection(dsn, row_factory=dict_row) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 "SELECT id FROM chat_history WHERE user_id=%s AND session_id=%s "
@@ -186,7 +186,7 @@ def delete_chat_message_row(user_id: str, session_id: str, index: int) -> list[d
         return []
     uid = str(user_id or "default_user")
     sid = str(session_id or "default").strip() or "default"
-    with psycopg.connect(dsn, row_factory=dict_row) as conn:
+    with db_connection(dsn, row_factory=dict_row) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 "SELECT id FROM chat_history WHERE user_id=%s AND session_id=%s "
@@ -240,12 +240,11 @@ def collect_memory_data(user_id: str, query_text: str | None = None, cfg: dict[s
     if query_text and cfg:
         query_vec = _get_embedding_for_text(query_text.strip(), cfg)
     if query_vec:
-        emb_str = "[" + ",".join(str(float(x)) for x in query_vec) + "]"
         fact_rows = query_rows(
             "SELECT fact FROM semantic_memory "
             "WHERE user_id=%s AND embedding IS NOT NULL "
             "ORDER BY embedding <=> %s::vector LIMIT 8",
-            (uid, emb_str),
+            (uid, to_vector(query_vec)),
         )
     if not fact_rows:
         # Fallback: recency order (embedding unavailable or no embedded facts yet)
@@ -279,7 +278,7 @@ def maybe_store_semantic_fact(user_id: str, text: str, cfg: dict[str, Any] | Non
     uid = str(user_id or "default_user")
     # Compute embedding vector (best-effort, may return [] if provider not configured)
     emb_vec: list[float] = _get_embedding_for_text(q, cfg or {}) if cfg else []
-    with psycopg.connect(dsn, row_factory=dict_row) as conn:
+    with db_connection(dsn, row_factory=dict_row) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 "SELECT id FROM semantic_memory WHERE user_id=%s AND fact=%s ORDER BY created_at DESC LIMIT 1",
@@ -288,10 +287,9 @@ def maybe_store_semantic_fact(user_id: str, text: str, cfg: dict[str, Any] | Non
             if cur.fetchone():
                 return
             if emb_vec:
-                emb_str = "[" + ",".join(str(float(x)) for x in emb_vec) + "]"
                 cur.execute(
                     "INSERT INTO semantic_memory(user_id, fact, embedding) VALUES (%s, %s, %s::vector)",
-                    (uid, q, emb_str),
+                    (uid, q, to_vector(emb_vec)),
                 )
             else:
                 cur.execute("INSERT INTO semantic_memory(user_id, fact) VALUES (%s, %s)", (uid, q))
@@ -6,13 +6,14 @@ from datetime import datetime, timezone
 from typing import Any
 
 from fastapi import HTTPException
+from hunterAgent.core.vector_codec import to_vector
 
 from .ai_provider import _llm_max_tokens, _llm_timeout_s, _provider_chat_json
 from .chat_memory_service import append_chat_message, build_chat_payload, load_chat_history, maybe_store_semantic_fact
 from .config_service import now_iso, resolve_config
 from .db_service import query_rows
 from .rec_service import _build_recommendation_items
-from .search_service import _agent_nl_search, _item_from_work, _parse_vector_text, _search_by_visual_vector, _uploaded_image_search
+from .search_service import _agent_nl_search, _item_from_work, _search_by_visual_vector, _uploaded_image_search
 
 def _chat_bucket(session_id: str, user_id: str = "default_user") -> dict[str, Any]:
     sid = str(session_id or "default").strip() or "default"
@@ -230,10 +231,11 @@ def _chat_profile_payload(cfg: dict[str, Any], days: int = 30, limit: int = 24,
     now_ep = int(datetime.now(timezone.utc).timestamp())
     start_ep = now_ep - max(1, int(days)) * 86400
     rows = query_rows(
-        "SELECT e.arcid, max(e.read_time) as read_time, w.title, w.tags, w.eh_posted, w.date_added, w.lastreadtime "
+        "SELECT e.arcid, max(e.read_time) as read_time, w.title, w.tags, w.eh_posted, w.date_added, w.lastreadtime, "
+        "w.category, w.source_eh_url, w.source_ex_url "
         "FROM read_events e JOIN works w ON w.arcid = e.arcid "
         "WHERE e.read_time >= %s AND e.read_time <= %s "
-        "GROUP BY e.arcid, w.title, w.tags, w.eh_posted, w.date_added, w.lastreadtime "
+        "GROUP BY e.arcid, w.arcid "
         "ORDER BY max(e.read_time) DESC LIMIT %s",
         (int(start_ep), int(now_ep), int(max(12, limit))),
     )
@@ -275,7 +277,8 @@ def _chat_report_payload(cfg: dict[str, Any], report_type: str = "weekly", limit
     now_ep = int(datetime.now(timezone.utc).timestamp())
     start_ep = now_ep - hours * 3600
     rows = query_rows(
-        "SELECT e.arcid, e.read_time, w.title, w.tags, w.eh_posted, w.date_added, w.lastreadtime "
+        "SELECT e.arcid, e.read_time, w.title, w.tags, w.eh_posted, w.date_added, w.lastreadtime, "
+        "w.category, w.source_eh_url, w.source_ex_url "
         "FROM read_events e JOIN works w ON w.arcid = e.arcid "
         "WHERE e.read_time >= %s AND e.read_time <= %s ORDER BY e.read_time DESC LIMIT %s",
         (int(start_ep), int(now_ep), int(max(20, limit * 2))),
@@ -347,7 +350,7 @@ def _chat_message_core(
     tool = intent
     payload: dict[str, Any] | None = None
     if uploaded_image:
-        payload = _uploaded_image_search(uploaded_image, cfg=cfg, scope="both", limit=20, query=q)
+        payload = _uploaded_image_search(uploaded_image, cfg=cfg, scope="both", limit=20, query=q, paginate=False)
         payload["type"] = "search"
         payload["title"] = "图文检索结果" if q else "以图搜图结果"
         payload["home_tab"] = "search"
@@ -355,13 +358,14 @@ def _chat_message_core(
         tool = "search"
     elif mode_use == "search_image" and image_arcid_use:
         rows = query_rows(
-            "SELECT visual_embedding::text as vec FROM works WHERE arcid = %s AND visual_embedding IS NOT NULL LIMIT 1",
+            "SELECT visual_embedding as vec FROM works WHERE arcid = %s AND visual_embedding IS NOT NULL LIMIT 1",
             (image_arcid_use,),
+            binary=True,
         )
-        vec = _parse_vector_text(str(rows[0].get("vec") or "")) if rows else []
-        if not vec:
+        vec = to_vector(rows[0].get("vec") if rows else None)
+        if vec.size == 0:
             raise HTTPException(status_code=400, detail="reference image embedding not found")
-        payload = _search_by_visual_vector(vec, "both", 20, cfg)
+        payload = _search_by_visual_vector(vec, "both", 20, cfg, paginate=False)
         payload["type"] = "search"
         payload["title"] = "以图搜图结果"
         payload["home_tab"] = "search"
@@ -375,7 +379,7 @@ def _chat_message_core(
             limit_use = max(1, min(200, int(str(route.get("search_k") or 20))))
         except Exception:
             limit_use = 20
-        payload = _agent_nl_search(q, scope_use, limit_use, cfg, include_categories=[], include_tags=[], ui_lang=str(ui_lang or "zh"), scenario="plot")
+        payload = _agent_nl_search(q, scope_use, limit_use, cfg, include_categories=[], include_tags=[], ui_lang=str(ui_lang or "zh"), scenario="plot", paginate=False)
         payload["type"] = "search"
         payload["title"] = "自然语言检索结果"
         payload["home_tab"] = "search"
@@ -4,7 +4,7 @@ from fastapi import HTTPException
 
 from .chat_memory_service import collect_memory_data, delete_chat_message_row, load_chat_history, update_chat_message
 from .chat_service import _chat_message_core
-from .db_service import db_dsn, query_rows
+from .db_service import db_dsn, execute, query_rows
 
 
 def list_chat_sessions(*, user_id: str) -> dict[str, Any]:
@@ -35,7 +35,6 @@ def list_chat_sessions(*, user_id: str) -> dict[str, Any]:
 
 
 def delete_chat_session(*, user_id: str, session_id: str) -> dict[str, Any]:
-    import psycopg
     uid = str(user_id or "default_user")
     sid = str(session_id or "").strip()
     if not sid:
@@ -43,10 +42,7 @@ def delete_chat_session(*, user_id: str, session_id: str) -> dict[str, Any]:
     dsn = db_dsn()
     if not dsn:
         raise HTTPException(status_code=503, detail="db not available")
-    with psycopg.connect(dsn) as conn:
-        with conn.cursor() as cur:
-            cur.execute("DELETE FROM chat_history WHERE user_id=%s AND session_id=%s", (uid, sid))
-        conn.commit()
+    execute("DELETE FROM chat_history WHERE user_id=%s AND session_id=%s", (uid, sid))
     return {"ok": True}
 
 
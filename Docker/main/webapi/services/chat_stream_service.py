@@ -98,6 +98,7 @@ def chat_message_stream_response(
                     include_tags=[],
                     ui_lang=ui_lang_use,
                     scenario="plot",
+                    paginate=False,
                 )
                 payload["type"] = "search"
                 payload["title"] = "自然语言检索结果"
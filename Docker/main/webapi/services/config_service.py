@@ -1,6 +1,7 @@
 import base64
 import json
 import os
+import threading
 import time
 from datetime import datetime
 from typing import Any
@@ -25,6 +26,24 @@ from ..core.constants import (
 )
 from .db_service import _build_dsn, _parse_dsn_components
 
+_CONFIG_DB_POLL_S = max(0.5, float(os.getenv("DATA_UI_CONFIG_POLL_S", "5") or 5))
+_config_build_lock = threading.Lock()
+_config_snapshot_lock = threading.Lock()
+_config_snapshot: dict[str, Any] = {
+    "cfg": None,
+    "meta": {},
+    "json_sig": (0, 0),
+    "db_version": "",
+    "checked_at": 0.0,
+    "generation": 0,
+    "dirty": False,
+}
+# Keeps the snapshot polled off the request path, so event-loop callers can use
+# cached_config() without ever waiting on the app_config version query.
+_config_refresher_wake = threading.Event()
+_config_refresher_stop = threading.Event()
+_config_refresher: threading.Thread | None = None
+
 
 def _valid_timezone(name: str) -> str:
     candidate = str(name or "").strip() or "UTC"
@@ -156,6 +175,7 @@ def _save_json_config(values: dict[str, str]) -> None:
         raw = str(values.get(key, _normalize_value(key, spec.get("default", ""))))
         payload["values"][key] = _encrypt_secret(raw) if spec.get("secret", False) else _normalize_value(key, raw)
     APP_CONFIG_FILE.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    invalidate_config_snapshot()
 
 
 def _load_db_config(dsn: str) -> tuple[dict[str, str], str]:
@@ -207,12 +227,42 @@ def _save_db_config(dsn: str, values: dict[str, str]) -> tuple[bool, str]:
                         (CONFIG_SCOPE, key, stored, str(spec.get("type", "text")), bool(spec.get("secret", False))),
                     )
             conn.commit()
+        invalidate_config_snapshot()
         return (True, "")
     except Exception as e:
         return (False, str(e))
 
 
-def resolve_config() -> tuple[dict[str, str], dict[str, Any]]:
+def _json_config_signature() -> tuple[int, int]:
+    try:
+        st = APP_CONFIG_FILE.stat()
+    except OSError:
+        return (0, 0)
+    return (int(st.st_mtime_ns), int(st.st_size))
+
+
+def _db_config_version(dsn: str) -> str:
+    s = str(dsn or "").strip()
+    if not s:
+        return ""
+    sql = "SELECT count(*), max(updated_at) FROM app_config WHERE scope = %s"
+    try:
+        with psycopg.connect(s, connect_timeout=5) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (CONFIG_SCOPE,))
+                n, latest = cur.fetchone() or (0, None)
+        return f"{int(n or 0)}|{latest.isoformat() if isinstance(latest, datetime) else ''}"
+    except Exception:
+        return ""
+
+
+def invalidate_config_snapshot() -> None:
+    with _config_snapshot_lock:
+        _config_snapshot["dirty"] = True
+    _config_refresher_wake.set()
+
+
+def _build_config() -> tuple[dict[str, str], dict[str, Any], str]:
     merged: dict[str, str] = {k: _normalize_value(k, spec.get("default", "")) for k, spec in CONFIG_SPECS.items()}
     env_vals: dict[str, str] = {}
     for key in CONFIG_SPECS:
@@ -230,6 +280,7 @@ def resolve_config() -> tuple[dict[str, str], dict[str, Any]]:
     merged.update(json_vals)
     merged["POSTGRES_DSN"] = _build_dsn(merged)
 
+    db_version = _db_config_version(merged.get("POSTGRES_DSN", ""))
     db_vals, db_error = _load_db_config(merged.get("POSTGRES_DSN", ""))
     if db_vals.get("POSTGRES_DSN"):
         db_vals.update(_parse_dsn_components(db_vals["POSTGRES_DSN"]))
@@ -258,7 +309,103 @@ def resolve_config() -> tuple[dict[str, str], dict[str, Any]]:
         "db_error": db_error,
         "sources": "db > json > env",
     }
-    return merged, meta
+    return merged, meta, db_version
+
+
+def _snapshot_fresh(json_sig: tuple[int, int], now: float) -> tuple[dict[str, str], dict[str, Any]] | None:
+    with _config_snapshot_lock:
+        cfg = _config_snapshot.get("cfg")
+        if cfg is None or _config_snapshot.get("dirty") or _config_snapshot.get("json_sig") != json_sig:
+            return None
+        if now - float(_config_snapshot.get("checked_at") or 0.0) >= _CONFIG_DB_POLL_S:
+            return None
+        return dict(cfg), dict(_config_snapshot.get("meta") or {})
+
+
+def resolve_config() -> tuple[dict[str, str], dict[str, Any]]:
+    # Served from a process-wide snapshot. Rebuilt when app_config.json changes,
+    # when a local save invalidates it, or when the app_config table version
+    # moves (polled at most every DATA_UI_CONFIG_POLL_S seconds).
+    json_sig = _json_config_signature()
+    fresh = _snapshot_fresh(json_sig, time.monotonic())
+    if fresh is not None:
+        return fresh
+
+    if not _config_build_lock.acquire(blocking=False):
+        with _config_snapshot_lock:
+            stale = _config_snapshot.get("cfg")
+            if stale is not None and not _config_snapshot.get("dirty"):
+                return dict(stale), dict(_config_snapshot.get("meta") or {})
+        _config_build_lock.acquire()
+    try:
+        fresh = _snapshot_fresh(json_sig, time.monotonic())
+        if fresh is not None:
+            return fresh
+        with _config_snapshot_lock:
+            cur_cfg = _config_snapshot.get("cfg")
+            cur_sig = _config_snapshot.get("json_sig")
+            cur_version = str(_config_snapshot.get("db_version") or "")
+            dirty = bool(_config_snapshot.get("dirty"))
+        if cur_cfg is not None and cur_sig == json_sig and not dirty:
+            version = _db_config_version(str(cur_cfg.get("POSTGRES_DSN") or ""))
+            if version == cur_version:
+                with _config_snapshot_lock:
+                    _config_snapshot["checked_at"] = time.monotonic()
+                    return dict(cur_cfg), dict(_config_snapshot.get("meta") or {})
+        cfg, meta, version = _build_config()
+        with _config_snapshot_lock:
+            generation = int(_config_snapshot.get("generation") or 0) + 1
+            meta["version"] = generation
+            _config_snapshot.update(
+                {
+                    "cfg": cfg,
+                    "meta": meta,
+                    "json_sig": json_sig,
+                    "db_version": version,
+                    "checked_at": time.monotonic(),
+                    "generation": generation,
+                    "dirty": False,
+                }
+            )
+        return dict(cfg), dict(meta)
+    finally:
+        _config_build_lock.release()
+
+
+def cached_config() -> tuple[dict[str, str], dict[str, Any]]:
+    """Last built snapshot without the periodic version poll; for code running on the event loop.
+
+    Only the first call and the first call after a local save rebuild inline.
+    """
+    with _config_snapshot_lock:
+        cfg = _config_snapshot.get("cfg")
+        if cfg is not None and not _config_snapshot.get("dirty"):
+            return dict(cfg), dict(_config_snapshot.get("meta") or {})
+    return resolve_config()
+
+
+def _config_refresh_loop() -> None:
+    while not _config_refresher_stop.is_set():
+        _config_refresher_wake.wait(_CONFIG_DB_POLL_S)
+        _config_refresher_wake.clear()
+        try:
+            resolve_config()
+        except Exception:
+            pass
+
+
+def start_config_refresher() -> None:
+    global _config_refresher
+    if _config_refresher is not None and _config_refresher.is_alive():
+        return
+    _config_refresher_stop.clear()
+    _config_refresher = threading.Thread(target=_config_refresh_loop, name="config-refresh", daemon=True)
+    _config_refresher.start()
+
+
+def stop_config_refresher() -> None:
+    _config_refresher_stop.set()
+    _config_refresher_wake.set()
 
 
 def build_runtime_env() -> dict[str, str]:
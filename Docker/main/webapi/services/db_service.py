@@ -1,49 +1,65 @@
+import asyncio
 import threading
-import time
-from typing import Any
+from contextlib import contextmanager
+from typing import Any, Iterator
 from urllib.parse import quote_plus, urlparse
 
 import psycopg
-from psycopg.rows import dict_row
-from psycopg_pool import ConnectionPool
+from hunterAgent.core.vector_codec import ensure_vector, ensure_vector_async
+from psycopg.rows import dict_row, tuple_row
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
 
 from ..core.config_values import normalize_value as _normalize_value
 
-_cfg_lock = threading.Lock()
-_cfg_cache: dict[str, Any] = {"ts": 0.0, "dsn": ""}
-_CFG_TTL_S: float = 5.0
-
 
 def _cached_dsn() -> str:
-    now = time.monotonic()
-    with _cfg_lock:
-        if now - _cfg_cache["ts"] < _CFG_TTL_S and _cfg_cache["dsn"]:
-            return str(_cfg_cache["dsn"])
-    from .config_service import resolve_config
+    from .config_service import cached_config
+
+    cfg, _ = cached_config()
+    return str(cfg.get("POSTGRES_DSN", "")).strip()
+
+
+def _pool_settings(*, for_async: bool = False) -> tuple[str, int, int, float]:
+    from .config_service import cached_config
 
-    cfg, _ = resolve_config()
+    cfg, _ = cached_config()
     dsn = str(cfg.get("POSTGRES_DSN", "")).strip()
-    with _cfg_lock:
-        _cfg_cache["ts"] = time.monotonic()
-        _cfg_cache["dsn"] = dsn
-    return dsn
+    try:
+        min_size = max(0, int(str(cfg.get("POSTGRES_POOL_MIN") or "1")))
+    except Exception:
+        min_size = 1
+    if for_async:
+        try:
+            max_size = max(1, int(str(cfg.get("POSTGRES_ASYNC_POOL_MAX") or "4")))
+        except Exception:
+            max_size = 4
+    else:
+        try:
+            max_size = max(1, int(str(cfg.get("POSTGRES_POOL_MAX") or "8")))
+        except Exception:
+            max_size = 8
+    try:
+        timeout_s = max(1.0, float(str(cfg.get("POSTGRES_POOL_TIMEOUT_S") or "30")))
+    except Exception:
+        timeout_s = 30.0
+    # The async pool is sized separately (POSTGRES_ASYNC_POOL_MAX) so it never eats into
+    # the sync pool shared by the blocking and search-channel executors.
+    return dsn, min(min_size, max_size), max_size, timeout_s
+
 
 _pool_lock = threading.Lock()
 _pool: ConnectionPool | None = None
+_pool_key: tuple[str, int, int, float] = ("", 0, 0, 0.0)
 
 
 def _get_pool() -> ConnectionPool | None:
-    global _pool
-    dsn = _cached_dsn()
-    if not dsn:
+    global _pool, _pool_key
+    key = _pool_settings()
+    if not key[0]:
         return None
     with _pool_lock:
         if _pool is not None:
-            try:
-                existing_dsn = _pool.conninfo
-            except Exception:
-                existing_dsn = ""
-            if existing_dsn == dsn:
+            if _pool_key == key:
                 return _pool
             try:
                 _pool.close()
@@ -51,18 +67,101 @@ def _get_pool() -> ConnectionPool | None:
                 pass
             _pool = None
 
-        try:
-            _pool = ConnectionPool(
-                conninfo=dsn,
-                min_size=1,
-                max_size=8,
-                open=True,
-            )
-        except Exception:
-            _pool = None
+        dsn, min_size, max_size, timeout_s = key
+        _pool = ConnectionPool(
+            conninfo=dsn,
+            min_size=min_size,
+            max_size=max_size,
+            timeout=timeout_s,
+            check=ConnectionPool.check_connection,
+            name="webapi",
+            open=True,
+        )
+        _pool_key = key
     return _pool
 
 
+_async_pool_lock: asyncio.Lock | None = None
+_async_pool: AsyncConnectionPool | None = None
+_async_pool_key: tuple[str, int, int, float] = ("", 0, 0, 0.0)
+
+
+async def _get_async_pool() -> AsyncConnectionPool | None:
+    global _async_pool, _async_pool_key, _async_pool_lock
+    key = _pool_settings(for_async=True)
+    if not key[0]:
+        return None
+    if _async_pool is not None and _async_pool_key == key:
+        return _async_pool
+    if _async_pool_lock is None:
+        _async_pool_lock = asyncio.Lock()
+    async with _async_pool_lock:
+        if _async_pool is not None:
+            if _async_pool_key == key:
+                return _async_pool
+            try:
+                await _async_pool.close()
+            except Exception:
+                pass
+            _async_pool = None
+
+        dsn, min_size, max_size, timeout_s = key
+        pool = AsyncConnectionPool(
+            conninfo=dsn,
+            min_size=min_size,
+            max_size=max_size,
+            timeout=timeout_s,
+            check=AsyncConnectionPool.check_connection,
+            name="webapi-async",
+            open=False,
+        )
+        await pool.open()
+        _async_pool = pool
+        _async_pool_key = key
+    return _async_pool
+
+
+async def close_async_pool() -> None:
+    global _async_pool
+    pool = _async_pool
+    _async_pool = None
+    if pool is not None:
+        await pool.close()
+
+
+def _stats_payload(pool: Any, key: tuple[str, int, int, float]) -> dict[str, Any]:
+    _, min_size, max_size, timeout_s = key
+    try:
+        stats = dict(pool.get_stats())
+    except Exception:
+        stats = {}
+    return {
+        "open": True,
+        "min_size": min_size,
+        "max_size": max_size,
+        "timeout_s": timeout_s,
+        "size": int(stats.get("pool_size") or 0),
+        "available": int(stats.get("pool_available") or 0),
+        "waiting": int(stats.get("requests_waiting") or 0),
+        "requests": int(stats.get("requests_num") or 0),
+        "queued": int(stats.get("requests_queued") or 0),
+        "wait_ms_total": int(stats.get("requests_wait_ms") or 0),
+        "timeouts": int(stats.get("requests_errors") or 0),
+        "connection_errors": int(stats.get("connections_errors") or 0),
+        "connections_lost": int(stats.get("connections_lost") or 0),
+    }
+
+
+def pool_stats() -> dict[str, Any]:
+    with _pool_lock:
+        pool = _pool
+        key = _pool_key
+    out = _stats_payload(pool, key) if pool is not None else {"open": False}
+    apool = _async_pool
+    out["async"] = _stats_payload(apool, _async_pool_key) if apool is not None else {"open": False}
+    return out
+
+
 def _parse_dsn_components(dsn: str) -> dict[str, str]:
     out: dict[str, str] = {}
     s = str(dsn or "").strip()
@@ -106,21 +205,73 @@ def db_dsn() -> str:
     return _cached_dsn()
 
 
-def query_rows(sql: str, params: tuple[Any, ...] = ()) -> list[dict[str, Any]]:
+@contextmanager
+def db_connection(dsn: str = "", *, row_factory: Any = None) -> Iterator[psycopg.Connection]:
+    target = str(dsn or "").strip() or _cached_dsn()
+    if not target:
+        raise RuntimeError("POSTGRES_DSN is not configured")
     pool = _get_pool()
-    if pool is not None:
-        try:
-            with pool.connection() as conn:
-                conn.row_factory = dict_row
-                with conn.cursor() as cur:
-                    cur.execute(sql, params)
-                    return [dict(r) for r in (cur.fetchall() or [])]
-        except Exception:
-            pass
-    dsn = _cached_dsn()
-    if not dsn:
+    if pool is not None and str(pool.conninfo or "") == target:
+        with pool.connection() as conn:
+            ensure_vector(conn)
+            conn.row_factory = row_factory or tuple_row
+            yield conn
+        return
+    with psycopg.connect(target, row_factory=row_factory or tuple_row) as conn:
+        ensure_vector(conn)
+        yield conn
+
+
+@contextmanager
+def db_transaction(dsn: str = "", *, row_factory: Any = None) -> Iterator[psycopg.Connection]:
+    with db_connection(dsn, row_factory=row_factory) as conn:
+        with conn.transaction():
+            yield conn
+
+
+def query_rows(sql: str, params: tuple[Any, ...] | list[Any] = (), *, binary: bool = False) -> list[dict[str, Any]]:
+    if not _cached_dsn():
         return []
-    with psycopg.connect(dsn, row_factory=dict_row) as conn:
-        with conn.cursor() as cur:
+    with db_connection(row_factory=dict_row) as conn:
+        with conn.cursor(binary=binary) as cur:
             cur.execute(sql, params)
             return [dict(r) for r in (cur.fetchall() or [])]
+
+
+def query_one(sql: str, params: tuple[Any, ...] | list[Any] = ()) -> dict[str, Any] | None:
+    if not _cached_dsn():
+        return None
+    with db_connection(row_factory=dict_row) as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            row = cur.fetchone()
+    return dict(row) if row else None
+
+
+def execute(sql: str, params: tuple[Any, ...] | list[Any] = ()) -> int:
+    with db_transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            return int(cur.rowcount or 0)
+
+
+def execute_many(sql: str, rows: list[tuple[Any, ...]] | list[list[Any]]) -> int:
+    if not rows:
+        return 0
+    with db_transaction() as conn:
+        with conn.cursor() as cur:
+            cur.executemany(sql, rows)
+            return int(cur.rowcount or 0)
+
+
+async def aquery_rows(sql: str, params: tuple[Any, ...] | list[Any] = (), *, binary: bool = False) -> list[dict[str, Any]]:
+    pool = await _get_async_pool()
+    if pool is None:
+        return []
+    async with pool.connection() as conn:
+        await ensure_vector_async(conn)
+        conn.row_factory = dict_row
+        async with conn.cursor(binary=binary) as cur:
+            await cur.execute(sql, params)
+            return [dict(r) for r in (await cur.fetchall() or [])]
+
@@ -4,7 +4,7 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any
 
-import psycopg
+from .db_service import db_transaction
 
 
 def schema_file_path(runtime_dir: Path) -> Path:
@@ -53,8 +53,7 @@ def inject_schema_sql(dsn: str, runtime_dir: Path) -> dict[str, Any]:
     sql = p.read_text(encoding="utf-8", errors="replace").strip()
     if not sql:
         raise ValueError("schema file is empty")
-    with psycopg.connect(s) as conn:
+    with db_transaction(s) as conn:
         with conn.cursor() as cur:
             cur.execute(sql)
-        conn.commit()
     return {"ok": True, "status": schema_status(runtime_dir)}
@@ -11,9 +11,13 @@ from typing import Any
 
 import psycopg
 import requests
+from hunterAgent.core.vector_codec import to_vector
 
+from ..core.config_values import as_bool as _as_bool
 from .config_service import resolve_config
-from .db_service import db_dsn
+from .db_service import db_dsn, db_transaction, execute
+from .image_search_cache import bump_embedding_generation
+from .rec_service_local import mark_local_work_dirty
 from .vision_service import _embed_image_siglip
 
 
@@ -71,10 +75,6 @@ def _record_worker_error(*, table: str, item: str, err: Exception) -> None:
         )
 
 
-def _vector_literal(vec: list[float]) -> str:
-    return "[" + ",".join(repr(float(x)) for x in vec) + "]"
-
-
 def _l2_normalize(vec: list[float]) -> list[float]:
     if not vec:
         return []
@@ -243,7 +243,7 @@ def _fetch_cover_bytes(session: requests.Session, thumb_url: str, referer: str,
 
 
 def _refresh_thumb_from_api(
-    conn: psycopg.Connection,
+    dsn: str,
     session: requests.Session,
     gid: int,
     token: str,
@@ -271,16 +271,17 @@ def _refresh_thumb_from_api(
 
     eh_url = f"https://e-hentai.org/g/{int(gid)}/{safe_token}/"
     ex_url = f"https://exhentai.org/g/{int(gid)}/{safe_token}/"
-    with conn.cursor() as cur:
-        cur.execute(
-            "UPDATE eh_works "
-            "SET raw = COALESCE(raw, '{}'::jsonb) || %s::jsonb, "
-            "eh_url = %s, ex_url = %s, last_fetched_at = now(), updated_at = now() "
-            "WHERE gid = %s AND token = %s "
-            "RETURNING raw->>'thumb', eh_url, ex_url",
-            (json.dumps(row, ensure_ascii=False), eh_url, ex_url, int(gid), safe_token),
-        )
-        got = cur.fetchone()
+    with db_transaction(dsn) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "UPDATE eh_works "
+                "SET raw = COALESCE(raw, '{}'::jsonb) || %s::jsonb, "
+                "eh_url = %s, ex_url = %s, last_fetched_at = now(), updated_at = now() "
+                "WHERE gid = %s AND token = %s "
+                "RETURNING raw->>'thumb', eh_url, ex_url",
+                (json.dumps(row, ensure_ascii=False), eh_url, ex_url, int(gid), safe_token),
+            )
+            got = cur.fetchone()
     if got:
         return str(got[0] or new_thumb), str(got[1] or eh_url), str(got[2] or ex_url)
     return new_thumb, eh_url, ex_url
@@ -292,7 +293,7 @@ def _mark_success(conn: psycopg.Connection, gid: int, token: str, vec: list[floa
             "UPDATE eh_works "
             "SET cover_embedding = %s::vector, cover_embedding_status = 'complete', updated_at = now() "
             "WHERE gid = %s AND token = %s",
-            (_vector_literal(vec), int(gid), str(token)),
+            (to_vector(vec), int(gid), str(token)),
         )
 
 
@@ -312,7 +313,21 @@ def _mark_work_success(conn: psycopg.Connection, arcid: str, cover_vec: list[flo
             "UPDATE works "
             "SET visual_embedding = %s::vector, page_visual_embedding = %s::vector, cover_embedding_status = 'complete' "
             "WHERE arcid = %s",
-            (_vector_literal(cover_vec), _vector_literal(page_vec), str(arcid)),
+            (to_vector(cover_vec), to_vector(page_vec), str(arcid)),
+        )
+
+
+def _store_work_pages(conn: psycopg.Connection, arcid: str, page_vecs: list[tuple[int, list[float]]]) -> None:
+    # Replace the work's sampled pages; unchanged page numbers are updated in place.
+    with conn.cursor() as cur:
+        cur.execute(
+            "DELETE FROM work_page_embeddings WHERE arcid = %s AND NOT (page_no = ANY(%s))",
+            (str(arcid), [int(p) for p, _ in page_vecs]),
+        )
+        cur.executemany(
+            "INSERT INTO work_page_embeddings (arcid, page_no, embedding) VALUES (%s, %s, %s::vector) "
+            "ON CONFLICT (arcid, page_no) DO UPDATE SET embedding = EXCLUDED.embedding, updated_at = now()",
+            [(str(arcid), int(p), to_vector(v)) for p, v in page_vecs],
         )
 
 
@@ -421,6 +436,7 @@ def run_eh_cover_embedding_once(*, include_fail: bool = False, limit: int = 12)
     timeout_s = int(float(cfg.get("EH_REQUEST_SLEEP", 4.0)) * 8 + 20)
     model_id = str(cfg.get("SIGLIP_MODEL") or "google/siglip-so400m-patch14-384").strip()
     page_pick_n = max(1, int(float(cfg.get("WORKS_PAGE_SAMPLE_COUNT", 4)) or 4))
+    store_pages = _as_bool(cfg.get("WORKS_PAGE_MAXSIM_ENABLED"), False)
     user_agent = str(cfg.get("EH_USER_AGENT") or "AutoEhHunter/1.0").strip()
     cookie = str(cfg.get("EH_COOKIE") or "").strip()
     http_proxy = str(cfg.get("EH_HTTP_PROXY") or "").strip()
@@ -446,126 +462,135 @@ def run_eh_cover_embedding_once(*, include_fail: bool = False, limit: int = 12)
     failed_works = 0
 
     try:
-        with psycopg.connect(dsn) as conn:
-            _acquire_table_slot("eh_works")
-            try:
+        # Connections are checked out per statement group only: the loop spends most of its
+        # time sleeping, fetching images and running SigLIP, and must not pin a pool slot.
+        _acquire_table_slot("eh_works")
+        try:
+            with db_transaction(dsn) as conn:
                 pending_eh = _count_pending_eh(conn)
                 candidates = _pick_candidates(conn, include_fail=include_fail, limit=limit)
-                conn.commit()
-                picked_eh = len(candidates)
-                for i, item in enumerate(candidates, start=1):
+            picked_eh = len(candidates)
+            for i, item in enumerate(candidates, start=1):
+                if _worker_stop.is_set():
+                    break
+                gid = int(item.get("gid") or 0)
+                token = str(item.get("token") or "")
+                raw = item.get("raw") or {}
+                thumb = str((raw.get("thumb") if isinstance(raw, dict) else "") or "").strip()
+                referer = str(item.get("eh_url") or item.get("ex_url") or "").strip()
+                _update_worker_status(
+                    running=True,
+                    table="eh_works",
+                    phase="processing",
+                    picked=picked_eh,
+                    completed=completed_eh,
+                    failed=failed_eh,
+                    current=i,
+                    total=pending_eh,
+                )
+                try:
+                    if not thumb:
+                        thumb, eh_ref, ex_ref = _refresh_thumb_from_api(dsn, session, gid, token, timeout_s=timeout_s)
+                        referer = str(eh_ref or ex_ref or referer).strip()
+                        if not thumb:
+                            raise RuntimeError("thumb missing")
+                    if sleep_s > 0:
+                        time.sleep(sleep_s)
+                    try:
+                        img = _fetch_cover_bytes(session, thumb, referer, timeout_s=timeout_s)
+                    except Exception:
+                        refreshed_thumb, eh_ref, ex_ref = _refresh_thumb_from_api(dsn, session, gid, token, timeout_s=timeout_s)
+                        if not refreshed_thumb or refreshed_thumb == thumb:
+                            raise
+                        thumb = refreshed_thumb
+                        referer = str(eh_ref or ex_ref or referer).strip()
+                        img = _fetch_cover_bytes(session, thumb, referer, timeout_s=timeout_s)
+                    vec = _embed_image_siglip(img, model_id)
+                    if not vec:
+                        raise RuntimeError("embedding empty")
+                    with db_transaction(dsn) as conn:
+                        _mark_success(conn, gid, token, vec)
+                    bump_embedding_generation()
+                    completed_eh += 1
+                    _update_worker_status(completed=completed_eh, failed=failed_eh)
+                except Exception as e:
+                    print(f"[eh_cover_embedding] gid={gid} token={token} failed: {e}", file=sys.stderr)
+                    print(traceback.format_exc(), file=sys.stderr)
+                    _record_worker_error(table="eh_works", item=f"gid={gid}, token={token}", err=e)
+                    with db_transaction(dsn) as conn:
+                        _mark_fail(conn, gid, token)
+                    failed_eh += 1
+                    _update_worker_status(completed=completed_eh, failed=failed_eh)
+        finally:
+            _release_table_slot("eh_works")
+
+        if lrr_base and not _worker_stop.is_set():
+            rng = random.Random()
+            _acquire_table_slot("works")
+            try:
+                with db_transaction(dsn) as conn:
+                    pending_works = _count_pending_works(conn)
+                    work_candidates = _pick_work_candidates(conn, include_fail=include_fail, limit=limit)
+                picked_works = len(work_candidates)
+                for i, item in enumerate(work_candidates, start=1):
                     if _worker_stop.is_set():
                         break
-                    gid = int(item.get("gid") or 0)
-                    token = str(item.get("token") or "")
-                    raw = item.get("raw") or {}
-                    thumb = str((raw.get("thumb") if isinstance(raw, dict) else "") or "").strip()
-                    referer = str(item.get("eh_url") or item.get("ex_url") or "").strip()
+                    arcid = str(item.get("arcid") or "").strip()
+                    if not arcid:
+                        continue
                     _update_worker_status(
                         running=True,
-                        table="eh_works",
+                        table="works",
                         phase="processing",
-                        picked=picked_eh,
-                        completed=completed_eh,
-                        failed=failed_eh,
+                        picked=picked_works,
+                        completed=completed_works,
+                        failed=failed_works,
                         current=i,
-                        total=pending_eh,
+                        total=pending_works,
                     )
                     try:
-                        if not thumb:
-                            thumb, eh_ref, ex_ref = _refresh_thumb_from_api(conn, session, gid, token, timeout_s=timeout_s)
-                            referer = str(eh_ref or ex_ref or referer).strip()
-                            if not thumb:
-                                raise RuntimeError("thumb missing")
-                        if sleep_s > 0:
-                            time.sleep(sleep_s)
-                        try:
-                            img = _fetch_cover_bytes(session, thumb, referer, timeout_s=timeout_s)
-                        except Exception:
-                            refreshed_thumb, eh_ref, ex_ref = _refresh_thumb_from_api(conn, session, gid, token, timeout_s=timeout_s)
-                            if not refreshed_thumb or refreshed_thumb == thumb:
-                                raise
-                            thumb = refreshed_thumb
-                            referer = str(eh_ref or ex_ref or referer).strip()
-                            img = _fetch_cover_bytes(session, thumb, referer, timeout_s=timeout_s)
-                        vec = _embed_image_siglip(img, model_id)
-                        if not vec:
-                            raise RuntimeError("embedding empty")
-                        _mark_success(conn, gid, token, vec)
-                        conn.commit()
-                        completed_eh += 1
-                        _update_worker_status(completed=completed_eh, failed=failed_eh)
+                        cover_img = _fetch_lrr_thumb(session, lrr_base, arcid, lrr_api_key, timeout_s=timeout_s)
+                        cover_vec = _embed_image_siglip(cover_img, model_id)
+                        if not cover_vec:
+                            raise RuntimeError("cover embedding empty")
+
+                        pages = _lrr_get_archive_pages(session, lrr_base, arcid, lrr_api_key, timeout_s=timeout_s)
+                        _cover_url, inner_urls = _pick_lrr_page_urls(pages, rng, inner_k=page_pick_n)
+                        if not inner_urls:
+                            raise RuntimeError("no usable inner pages")
+                        page_no = {u: n for n, u in enumerate(pages, start=1)}
+                        inner_vecs: list[list[float]] = []
+                        page_vecs: list[tuple[int, list[float]]] = []
+                        for u in inner_urls:
+                            if _worker_stop.is_set():
+                                break
+                            b = _fetch_lrr_page_bytes(session, u, lrr_api_key, timeout_s=timeout_s)
+                            v = _embed_image_siglip(b, model_id)
+                            if v:
+                                inner_vecs.append(v)
+                                page_vecs.append((page_no[u], v))
+                        page_vec = _average_l2(inner_vecs)
+                        if not page_vec:
+                            raise RuntimeError("inner page embedding empty")
+
+                        with db_transaction(dsn) as conn:
+                            _mark_work_success(conn, arcid, cover_vec, page_vec)
+                            if store_pages:
+                                _store_work_pages(conn, arcid, page_vecs)
+                        mark_local_work_dirty(arcid)
+                        bump_embedding_generation()
+                        completed_works += 1
+                        _update_worker_status(completed=completed_works, failed=failed_works)
                     except Exception as e:
-                        print(f"[eh_cover_embedding] gid={gid} token={token} failed: {e}", file=sys.stderr)
+                        print(f"[work_cover_embedding] arcid={arcid} failed: {e}", file=sys.stderr)
                         print(traceback.format_exc(), file=sys.stderr)
-                        _record_worker_error(table="eh_works", item=f"gid={gid}, token={token}", err=e)
-                        _mark_fail(conn, gid, token)
-                        conn.commit()
-                        failed_eh += 1
-                        _update_worker_status(completed=completed_eh, failed=failed_eh)
-            finally:
-                _release_table_slot("eh_works")
-
-            if lrr_base and not _worker_stop.is_set():
-                rng = random.Random()
-                _acquire_table_slot("works")
-                try:
-                    pending_works = _count_pending_works(conn)
-                    work_candidates = _pick_work_candidates(conn, include_fail=include_fail, limit=limit)
-                    conn.commit()
-                    picked_works = len(work_candidates)
-                    for i, item in enumerate(work_candidates, start=1):
-                        if _worker_stop.is_set():
-                            break
-                        arcid = str(item.get("arcid") or "").strip()
-                        if not arcid:
-                            continue
-                        _update_worker_status(
-                            running=True,
-                            table="works",
-                            phase="processing",
-                            picked=picked_works,
-                            completed=completed_works,
-                            failed=failed_works,
-                            current=i,
-                            total=pending_works,
-                        )
-                        try:
-                            cover_img = _fetch_lrr_thumb(session, lrr_base, arcid, lrr_api_key, timeout_s=timeout_s)
-                            cover_vec = _embed_image_siglip(cover_img, model_id)
-                            if not cover_vec:
-                                raise RuntimeError("cover embedding empty")
-
-                            pages = _lrr_get_archive_pages(session, lrr_base, arcid, lrr_api_key, timeout_s=timeout_s)
-                            _cover_url, inner_urls = _pick_lrr_page_urls(pages, rng, inner_k=page_pick_n)
-                            if not inner_urls:
-                                raise RuntimeError("no usable inner pages")
-                            inner_vecs: list[list[float]] = []
-                            for u in inner_urls:
-                                if _worker_stop.is_set():
-                                    break
-                                b = _fetch_lrr_page_bytes(session, u, lrr_api_key, timeout_s=timeout_s)
-                                v = _embed_image_siglip(b, model_id)
-                                if v:
-                                    inner_vecs.append(v)
-                            page_vec = _average_l2(inner_vecs)
-                            if not page_vec:
-                                raise RuntimeError("inner page embedding empty")
-
-                            _mark_work_success(conn, arcid, cover_vec, page_vec)
-                            conn.commit()
-                            completed_works += 1
-                            _update_worker_status(completed=completed_works, failed=failed_works)
-                        except Exception as e:
-                            print(f"[work_cover_embedding] arcid={arcid} failed: {e}", file=sys.stderr)
-                            print(traceback.format_exc(), file=sys.stderr)
-                            _record_worker_error(table="works", item=f"arcid={arcid}", err=e)
+                        _record_worker_error(table="works", item=f"arcid={arcid}", err=e)
+                        with db_transaction(dsn) as conn:
                             _mark_work_fail(conn, arcid)
-                            conn.commit()
-                            failed_works += 1
-                            _update_worker_status(completed=completed_works, failed=failed_works)
-                finally:
-                    _release_table_slot("works")
+                        failed_works += 1
+                        _update_worker_status(completed=completed_works, failed=failed_works)
+            finally:
+                _release_table_slot("works")
     except psycopg.OperationalError:
         return {"picked": 0, "completed": 0, "failed": 0}
 
@@ -655,9 +680,4 @@ def reset_failed_eh_cover_embeddings() -> int:
         "SET cover_embedding_status = 'pending', updated_at = now() "
         "WHERE cover_embedding IS NULL AND cover_embedding_status = 'fail'"
     )
-    with psycopg.connect(dsn) as conn:
-        with conn.cursor() as cur:
-            cur.execute(sql)
-            n = int(cur.rowcount or 0)
-        conn.commit()
-    return n
+    return execute(sql)
@@ -0,0 +1,50 @@
+"""Query-embedding cache keyed by (model id, normalized text).
+
+An in-memory LRU sits in front of an optional SQLite store under RUNTIME_DIR,
+so repeated searches, result paging and chat-routed searches reuse vectors
+instead of re-running SigLIP or calling the embedding provider again.
+"""
+
+import json
+import os
+import unicodedata
+from typing import Any, Callable
+
+import numpy as np
+
+from ..core.constants import EMBED_CACHE_FILE
+from .sqlite_lru import SqliteLRU
+
+_cache = SqliteLRU(
+    "embedding_cache",
+    EMBED_CACHE_FILE,
+    mem_max=max(16, int(os.getenv("DATA_UI_EMBED_CACHE_MAX", "2048") or 2048)),
+    disk_enabled=str(os.getenv("DATA_UI_EMBED_CACHE_DISK", "1") or "1").strip().lower() in ("1", "true", "yes", "on"),
+    disk_max=max(1000, int(os.getenv("DATA_UI_EMBED_CACHE_DISK_MAX", "100000") or 100000)),
+    prune_every=500,
+    encode=lambda vec: vec.tobytes(),
+    decode=lambda raw: np.frombuffer(raw, dtype=np.float32).copy(),
+)
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", str(text or "")).split())
+
+
+def cached_embedding(model_id: str, text: str, compute: Callable[[str], list[float]]) -> list[float]:
+    """Return the cached vector for (model_id, text), computing it from the normalized text on a miss."""
+    norm = normalize_text(text)
+    if not norm:
+        return []
+    key = json.dumps([str(model_id), norm], ensure_ascii=False)
+    hit = _cache.get(key)
+    if hit is not None and hit.size:
+        return hit.tolist()
+    out = compute(norm)
+    if out:
+        _cache.put(key, np.asarray(out, dtype=np.float32))
+    return out
+
+
+def embedding_cache_stats() -> dict[str, Any]:
+    return _cache.stats()
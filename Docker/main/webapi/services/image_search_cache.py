@@ -0,0 +1,77 @@
+"""Result cache for image search by a reference item (arcid or gid:token).
+
+A ranking only changes when stored visual vectors do, so entries are tagged with
+the embedding generation current when the search started. The cover-embedding
+worker and the ANN index sync bump that counter whenever they write vectors,
+which invalidates every cached ranking at once; a TTL bounds staleness from
+anything else (deleted works, metadata edits).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+_TTL_S = max(5.0, float(os.getenv("DATA_UI_IMAGE_SEARCH_CACHE_TTL_S", "600") or 600))
+_MAX = max(8, int(os.getenv("DATA_UI_IMAGE_SEARCH_CACHE_MAX", "256") or 256))
+
+_lock = threading.Lock()
+_cache: OrderedDict[Hashable, tuple[int, float, list[dict[str, Any]], dict[str, Any]]] = OrderedDict()
+_stats: dict[str, int] = {"hits": 0, "misses": 0, "stale": 0, "stores": 0}
+_generation = 0
+
+
+def embedding_generation() -> int:
+    with _lock:
+        return _generation
+
+
+def bump_embedding_generation() -> None:
+    global _generation
+    with _lock:
+        _generation += 1
+
+
+def get_cached_search(key: Hashable) -> tuple[list[dict[str, Any]], dict[str, Any]] | None:
+    now = time.monotonic()
+    with _lock:
+        hit = _cache.get(key)
+        if hit is None:
+            _stats["misses"] += 1
+            return None
+        gen, expires_at, items, meta = hit
+        if gen != _generation or expires_at <= now:
+            _cache.pop(key, None)
+            _stats["stale"] += 1
+            return None
+        _cache.move_to_end(key)
+        _stats["hits"] += 1
+        return list(items), dict(meta)
+
+
+def put_cached_search(key: Hashable, generation: int, items: list[dict[str, Any]], meta: dict[str, Any]) -> None:
+    with _lock:
+        if generation != _generation:
+            return
+        _cache[key] = (generation, time.monotonic() + _TTL_S, list(items), dict(meta))
+        _cache.move_to_end(key)
+        _stats["stores"] += 1
+        while len(_cache) > _MAX:
+            _cache.popitem(last=False)
+
+
+def image_search_cache_stats() -> dict[str, Any]:
+    with _lock:
+        stats = dict(_stats)
+        size = len(_cache)
+        generation = _generation
+    lookups = stats["hits"] + stats["misses"] + stats["stale"]
+    return {
+        **stats,
+        "size": size,
+        "max": _MAX,
+        "ttl_s": _TTL_S,
+        "generation": generation,
+        "hit_rate": round(stats["hits"] / lookups, 4) if lookups else 0.0,
+    }
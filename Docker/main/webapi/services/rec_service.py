@@ -9,8 +9,10 @@ from datetime import datetime, timezone
 from typing import Any
 
 import numpy as np
+from hunterAgent.core.vector_codec import mix_work_visual, normalize_l2, stack_vectors, to_vector
 from plotly import figure_factory as ff
 from plotly.utils import PlotlyJSONEncoder
+from scipy import sparse
 from scipy.cluster import hierarchy as sch
 from scipy.stats import gaussian_kde
 from sklearn.cluster import KMeans
@@ -280,80 +282,11 @@ def _compute_xp_map(
     }
 
 
-def _parse_vector_text(text: str) -> list[float]:
-    s = str(text or "").strip()
-    if not s:
-        return []
-    if s.startswith("[") and s.endswith("]"):
-        s = s[1:-1]
-    out: list[float] = []
-    for part in [x.strip() for x in s.split(",") if x.strip()]:
-        try:
-            out.append(float(part))
-        except Exception:
-            continue
-    return out
-
-
-def _l2(a: list[float], b: list[float]) -> float:
-    n = min(len(a), len(b))
+def _l2(a: np.ndarray, b: np.ndarray) -> float:
+    n = min(a.size, b.size)
     if n <= 0:
         return 1e9
-    s = 0.0
-    for i in range(n):
-        d = float(a[i]) - float(b[i])
-        s += d * d
-    return math.sqrt(s)
-
-
-def _cosine(a: list[float], b: list[float]) -> float:
-    n = min(len(a), len(b))
-    if n <= 0:
-        return 0.0
-    dot = 0.0
-    na = 0.0
-    nb = 0.0
-    for i in range(n):
-        av = float(a[i])
-        bv = float(b[i])
-        dot += av * bv
-        na += av * av
-        nb += bv * bv
-    if na <= 0 or nb <= 0:
-        return 0.0
-    return float(dot / math.sqrt(na * nb))
-
-
-def _project_1024(vec: list[float]) -> list[float]:
-    if len(vec) >= 1024:
-        return vec[:1024]
-    if not vec:
-        return []
-    return vec + [0.0] * (1024 - len(vec))
-
-
-def _normalize_l2(vec: list[float]) -> list[float]:
-    if not vec:
-        return []
-    s = 0.0
-    for x in vec:
-        s += float(x) * float(x)
-    if s <= 0:
-        return vec
-    inv = 1.0 / math.sqrt(s)
-    return [float(x) * inv for x in vec]
-
-
-def _mix_work_visual(cover_vec: list[float], page_vec: list[float]) -> list[float]:
-    c = list(cover_vec or [])
-    p = list(page_vec or [])
-    if c and p and len(c) == len(p):
-        return _normalize_l2([(0.6 * float(c[i]) + 0.4 * float(p[i])) for i in range(len(c))])
-    if c:
-        return _normalize_l2(c)
-    if p:
-        return _normalize_l2(p)
-    return []
+    return float(np.linalg.norm(a[:n] - b[:n]))
 
 
 def _jitter_rng(user_id: str, nonce: str) -> random.Random:
@@ -362,51 +295,50 @@ def _jitter_rng(user_id: str, nonce: str) -> random.Random:
     return random.Random(int(seed_hex, 16))
 
 
-def _with_gaussian_jitter(vec: list[float], sigma: float, rng: random.Random) -> list[float]:
-    if not vec:
-        return []
+def _with_gaussian_jitter(vec: np.ndarray, sigma: float, rng: random.Random) -> np.ndarray:
+    if vec.size == 0:
+        return vec
     sig = max(0.0, min(0.25, float(sigma)))
     if sig <= 0:
         return vec
-    out = [float(x) + float(rng.gauss(0.0, sig)) for x in vec]
-    return _normalize_l2(out)
+    noise = np.array([rng.gauss(0.0, sig) for _ in range(vec.size)], dtype=np.float32)
+    return normalize_l2(vec + noise)
 
 
-def _rec_profile_and_scores(cfg: dict[str, Any]) -> tuple[dict[str, float], list[list[float]], str, int]:
+def _rec_profile_and_scores(cfg: dict[str, Any]) -> tuple[dict[str, float], list[np.ndarray], str, int]:
     profile_days = max(1, min(365, int(cfg.get("REC_PROFILE_DAYS", 30))))
     now_ep = int(time.time())
     start_ep = now_ep - profile_days * 86400
     samples = query_rows(
-        "SELECT e.arcid, e.read_time, w.tags, w.visual_embedding::text as visual_vec, w.page_visual_embedding::text as page_visual_vec "
+        "SELECT e.arcid, e.read_time, w.tags, w.visual_embedding as visual_vec, w.page_visual_embedding as page_visual_vec "
         "FROM read_events e JOIN works w ON w.arcid = e.arcid "
         "WHERE e.read_time >= %s AND e.read_time < %s ORDER BY e.read_time DESC LIMIT 800",
         (int(start_ep), int(now_ep)),
+        binary=True,
     )
     source = "reads"
     if len(samples) < 20:
         inv_start = now_ep - 30 * 86400
         samples = query_rows(
-            "SELECT arcid, tags, visual_embedding::text as visual_vec, page_visual_embedding::text as page_visual_vec "
+            "SELECT arcid, tags, visual_embedding as visual_vec, page_visual_embedding as page_visual_vec "
             "FROM works WHERE date_added IS NOT NULL "
             "AND (CASE WHEN date_added >= 100000000000 THEN date_added / 1000 ELSE date_added END) >= %s "
             "AND (CASE WHEN date_added >= 100000000000 THEN date_added / 1000 ELSE date_added END) < %s "
             "ORDER BY (CASE WHEN date_added >= 100000000000 THEN date_added / 1000 ELSE date_added END) DESC LIMIT 800",
             (int(inv_start), int(now_ep)),
+            binary=True,
         )
         source = "inventory_date_added_30d"
 
     counts: dict[str, int] = {}
-    points: list[list[float]] = []
+    points: list[np.ndarray] = []
     for s in samples:
         for t in (s.get("tags") or []):
             tag = str(t or "").strip()
             if tag:
                 counts[tag] = counts.get(tag, 0) + 1
-        vec = _mix_work_visual(
-            _parse_vector_text(str(s.get("visual_vec") or "")),
-            _parse_vector_text(str(s.get("page_visual_vec") or "")),
-        )
-        if vec:
+        vec = mix_work_visual(s.get("visual_vec"), s.get("page_visual_vec"))
+        if vec.size:
             points.append(vec)
 
     max_freq = max(counts.values()) if counts else 0
@@ -419,10 +351,11 @@ def _rec_profile_and_scores(cfg: dict[str, Any]) -> tuple[dict[str, float], list
         step = max(1, len(points) // 320)
         points = points[::step]
     k_clusters = max(1, min(8, int(cfg.get("REC_CLUSTER_K", 3))))
-    if points and len(points) >= k_clusters:
+    dims = {int(p.size) for p in points}
+    if points and len(dims) == 1 and len(points) >= k_clusters:
         km = KMeans(n_clusters=k_clusters, n_init=10, random_state=42)
-        km.fit(points)
-        centroids = km.cluster_centers_.tolist()
+        km.fit(np.vstack(points))
+        centroids = [np.asarray(c, dtype=np.float32) for c in km.cluster_centers_]
     else:
         centroids = []
     return tag_scores, centroids, source, len(samples)
@@ -443,6 +376,62 @@ def _library_existing_keys(candidate_keys: set[str]) -> set[str]:
     return {str(r.get("k") or "").strip().lower() for r in rows if str(r.get("k") or "").strip()}
 
 
+def _candidate_tag_scores(candidates: list[dict[str, Any]], tag_scores: dict[str, float], floor: float) -> np.ndarray:
+    vocab: dict[str, int] = {}
+    indices: list[int] = []
+    indptr = [0]
+    for c in candidates:
+        for x in (c.get("tags") or []):
+            t = str(x)
+            if t.strip():
+                indices.append(vocab.setdefault(t, len(vocab)))
+        indptr.append(len(indices))
+    out = np.full(len(candidates), float(floor))
+    if not vocab:
+        return out
+    tag_index = sparse.csr_matrix(
+        (np.ones(len(indices)), np.asarray(indices), np.asarray(indptr)),
+        shape=(len(candidates), len(vocab)),
+    )
+    weights = np.array([float(tag_scores.get(t, floor)) for t in vocab])
+    counts = np.diff(tag_index.indptr)
+    has_tags = counts > 0
+    out[has_tags] = (tag_index @ weights)[has_tags] / counts[has_tags]
+    return out
+
+
+def _min_centroid_distances(vecs: list[np.ndarray], centroids: list[np.ndarray]) -> np.ndarray:
+    out = np.full(len(vecs), np.nan)
+    if not centroids:
+        return out
+    cmat = np.vstack(centroids).astype(np.float64)
+    dim = cmat.shape[1]
+    rows = [i for i, v in enumerate(vecs) if v.size == dim]
+    if rows:
+        x = np.vstack([vecs[i] for i in rows]).astype(np.float64)
+        d2 = (x * x).sum(axis=1)[:, None] + (cmat * cmat).sum(axis=1)[None, :] - 2.0 * (x @ cmat.T)
+        out[rows] = np.sqrt(np.maximum(d2, 0.0)).min(axis=1)
+    for i, v in enumerate(vecs):
+        if v.size and v.size != dim:
+            out[i] = min(_l2(v, center) for center in centroids)
+    return out
+
+
+def _profile_similarities(vecs: list[np.ndarray], profile_vec: np.ndarray) -> np.ndarray:
+    out = np.full(len(vecs), np.nan)
+    if profile_vec.size != 1024:
+        return out
+    rows = [i for i, v in enumerate(vecs) if v.size]
+    if not rows:
+        return out
+    x = stack_vectors([vecs[i] for i in rows], 1024).astype(np.float64)
+    p = profile_vec.astype(np.float64)
+    dots = x @ p
+    denom = np.linalg.norm(x, axis=1) * float(np.linalg.norm(p))
+    out[rows] = np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0)
+    return out
+
+
 def _build_recommendation_items(
     cfg: dict[str, Any],
     mode: str = "",
@@ -495,10 +484,11 @@ def _build_recommendation_items(
     start_ep = now_ep - rec_hours * 3600
     candidates = query_rows(
         "SELECT gid, token, eh_url, ex_url, title, title_jpn, category, tags, tags_translated, posted, filecount, "
-        "cover_embedding::text as cover_vec "
+        "cover_embedding as cover_vec "
         "FROM eh_works WHERE posted IS NOT NULL AND posted >= %s AND posted < %s "
         "ORDER BY posted DESC LIMIT %s",
         (int(start_ep), int(now_ep), int(rec_limit)),
+        binary=True,
     )
 
     candidate_key_map: dict[str, str] = {}
@@ -527,116 +517,117 @@ def _build_recommendation_items(
     # Formula: U_max = 1 - 0.55*(1-T/2.0), clamped to [0.4, 1.0]
     U_max = max(0.4, min(1.0, 1.0 - 0.55 * (1.0 - T / 2.0)))
 
-    scored: list[dict[str, Any]] = []
-    skipped_in_library = 0
-    skipped_touch = 0
-    skipped_dislike = 0
-    skipped_read = 0
-    for c in candidates:
+    n = len(candidates)
+    in_lib = np.zeros(n, dtype=bool)
+    rec_keys: list[str] = []
+    vecs: list[np.ndarray] = []
+    for i, c in enumerate(candidates):
         gid = int(c.get("gid") or 0)
         token = str(c.get("token") or "").strip().lower()
         if gid and token and f"{gid}:{token}" in in_library:
-            skipped_in_library += 1
-            continue
-
-        tags = [str(x) for x in (c.get("tags") or []) if str(x).strip()]
-        tscore = float(sum(float(tag_scores.get(t, floor)) for t in tags) / len(tags)) if tags else float(floor)
-
-        # --- MAP Potential energies (both normalised to [0,1]) ---
-        # U_tag: distance from perfect tag match.  tscore=1 → U=0 (attractor well), tscore=0 → U=1 (repelled)
-        U_tag = 1.0 - tscore
-
-        # U_vis: 1 - 1/(1+d) keeps U_vis ∈ [0,1) with the same topology as 1/(1+d) but inverted.
-        # This ensures U_tag and U_vis live in the same unit interval so their weighted sum is meaningful.
-        vscore = 0.45
-        U_vis = 1.0 - vscore  # default when no visual embedding available
-        min_dist = None
-        vec = _parse_vector_text(str(c.get("cover_vec") or ""))
-        if centroids and vec:
-            dists = [_l2(vec, center) for center in centroids]
-            if dists:
-                min_dist = min(dists)
-                vscore = 1.0 / (1.0 + float(min_dist))
-                U_vis = 1.0 - vscore  # ∈ [0,1): d→0 gives U_vis→0, d→∞ gives U_vis→1
-
-        rec_key = recommendation_key(gid, token) if (gid and token) else ""
-        touch_n = int(touch_counts.get(rec_key, 0)) if rec_key else 0
-        impression_n = int(impression_counts.get(rec_key, 0)) if rec_key else 0
-        dislike_n = int(dislike_counts.get(rec_key, 0)) if rec_key else 0
-        read_n = int(read_counts.get(rec_key, 0)) if rec_key else 0
-        if dislike_n > 0:
-            skipped_dislike += 1
-            continue
-        if read_n > 0:
-            skipped_read += 1
-            continue
-        touch_factor = 1.0
-        impression_factor = 1.0
-        if touch_n > 0 and touch_penalty > 0:
-            touch_factor = max(0.0, (1.0 - touch_penalty) ** touch_n)
-            if touch_factor <= 0:
-                skipped_touch += 1
-                continue
-        if impression_n > 0 and impression_penalty > 0:
-            impression_factor = max(0.0, (1.0 - impression_penalty) ** impression_n)
-        # --- U_profile: third potential field from long-term user profile vector ---
-        # Cosine similarity ∈ [-1,1] → mapped to [0,1] → inverted to energy U_profile ∈ [0,1]
-        # This keeps all three potentials dimensionally consistent before the Boltzmann integral.
-        profile_score = 0.0
-        U_profile = 0.5  # neutral default when no profile vector available (U=0.5 ≈ unknown)
-        if len(profile_vec) == 1024 and vec:
-            sim = _cosine(profile_vec, _project_1024(vec))
-            profile_score = max(0.0, min(1.0, (float(sim) + 1.0) * 0.5))
-            U_profile = 1.0 - profile_score  # ∈ [0,1]: high similarity → low energy
-
-        # --- MAP additive potential (three independent fields, cond. independence) ---
-        # U_total = w_tag·U_tag + w_vis·U_vis + w_profile·U_profile
-        # All weights are re-normalised so the triple sum is still in [0,1].
-        triple_w = tag_weight + visual_weight + profile_weight
-        U_total = (tag_weight * U_tag + visual_weight * U_vis + profile_weight * U_profile) / triple_w
-
-        # Re-apply energy cutoff after incorporating profile potential.
-        if U_total > U_max:
-            continue
-
-        # --- MAP Boltzmann base probability ---
-        # P(x) ∝ exp(-U_total / T)   — one Boltzmann mapping, no external linear terms.
-        # High T → flat landscape (exploration); Low T → sharp well (precision)
-        base_prob = math.exp(-U_total / T)
-
-        # Interaction decay factors (touch/impression penalties) multiply the probability —
-        # these are analogous to absorption cross-sections in a scattering model.
-        final = base_prob * float(touch_factor) * float(impression_factor)
-
-        # Thermal jitter: equivalent to Langevin noise term sqrt(2T)dW_t at sampling time.
-        # max(0.0, ...) enforces the physical constraint that probability must be non-negative.
-        if jitter_enabled and jitter_rng is not None:
-            final = max(0.0, final + float(jitter_rng.gauss(0.0, 0.022)))
-
+            in_lib[i] = True
+        rec_keys.append(recommendation_key(gid, token) if (gid and token) else "")
+        vecs.append(to_vector(c.get("cover_vec")))
+
+    def _counts(src: dict[str, int]) -> np.ndarray:
+        return np.array([int(src.get(k, 0)) if k else 0 for k in rec_keys], dtype=np.int64)
+
+    touch_n = _counts(touch_counts)
+    impression_n = _counts(impression_counts)
+    dislike_n = _counts(dislike_counts)
+    read_n = _counts(read_counts)
+
+    # --- MAP Potential energies (both normalised to [0,1]) ---
+    # U_tag: distance from perfect tag match.  tscore=1 → U=0 (attractor well), tscore=0 → U=1 (repelled)
+    tscore = _candidate_tag_scores(candidates, tag_scores, floor)
+    U_tag = 1.0 - tscore
+
+    # U_vis: 1 - 1/(1+d) keeps U_vis ∈ [0,1) with the same topology as 1/(1+d) but inverted.
+    # This ensures U_tag and U_vis live in the same unit interval so their weighted sum is meaningful.
+    # Candidates without a visual embedding keep the default vscore of 0.45.
+    min_dist = _min_centroid_distances(vecs, centroids)
+    has_dist = ~np.isnan(min_dist)
+    vscore = np.full(n, 0.45)
+    vscore[has_dist] = 1.0 / (1.0 + min_dist[has_dist])
+    U_vis = 1.0 - vscore
+
+    # --- U_profile: third potential field from long-term user profile vector ---
+    # Cosine similarity ∈ [-1,1] → mapped to [0,1] → inverted to energy U_profile ∈ [0,1]
+    # This keeps all three potentials dimensionally consistent before the Boltzmann integral.
+    # U=0.5 is the neutral default when no profile vector is available.
+    sim = _profile_similarities(vecs, profile_vec)
+    has_sim = ~np.isnan(sim)
+    profile_score = np.zeros(n)
+    profile_score[has_sim] = np.clip((sim[has_sim] + 1.0) * 0.5, 0.0, 1.0)
+    U_profile = np.where(has_sim, 1.0 - profile_score, 0.5)
+
+    # --- MAP additive potential (three independent fields, cond. independence) ---
+    # U_total = w_tag·U_tag + w_vis·U_vis + w_profile·U_profile
+    # All weights are re-normalised so the triple sum is still in [0,1].
+    triple_w = tag_weight + visual_weight + profile_weight
+    U_total = (tag_weight * U_tag + visual_weight * U_vis + profile_weight * U_profile) / triple_w
+
+    # --- MAP Boltzmann base probability ---
+    # P(x) ∝ exp(-U_total / T)   — one Boltzmann mapping, no external linear terms.
+    # High T → flat landscape (exploration); Low T → sharp well (precision)
+    base_prob = np.exp(-U_total / T)
+
+    # Interaction decay factors (touch/impression penalties) multiply the probability —
+    # these are analogous to absorption cross-sections in a scattering model.
+    touch_factor = np.ones(n)
+    if touch_penalty > 0:
+        m = touch_n > 0
+        touch_factor[m] = np.maximum(0.0, (1.0 - touch_penalty) ** touch_n[m])
+    impression_factor = np.ones(n)
+    if impression_penalty > 0:
+        m = impression_n > 0
+        impression_factor[m] = np.maximum(0.0, (1.0 - impression_penalty) ** impression_n[m])
+    final = base_prob * touch_factor * impression_factor
+
+    # Exclusions are counted in precedence order: library, dislike, read, fully decayed touch.
+    excl_dislike = ~in_lib & (dislike_n > 0)
+    excl_read = ~in_lib & ~excl_dislike & (read_n > 0)
+    excl_touch = ~in_lib & ~excl_dislike & ~excl_read & (touch_factor <= 0)
+    # Re-apply energy cutoff after incorporating profile potential.
+    keep = ~(in_lib | excl_dislike | excl_read | excl_touch) & (U_total <= U_max)
+    skipped_in_library = int(in_lib.sum())
+    skipped_dislike = int(excl_dislike.sum())
+    skipped_read = int(excl_read.sum())
+    skipped_touch = int(excl_touch.sum())
+
+    kept = np.flatnonzero(keep)
+    # Thermal jitter: equivalent to Langevin noise term sqrt(2T)dW_t at sampling time.
+    # max(0.0, ...) enforces the physical constraint that probability must be non-negative.
+    if jitter_enabled and jitter_rng is not None and kept.size:
+        noise = np.array([jitter_rng.gauss(0.0, 0.022) for _ in range(kept.size)])
+        final[kept] = np.maximum(0.0, final[kept] + noise)
+
+    order = kept[np.argsort(-final[kept], kind="stable")]
+    scored: list[dict[str, Any]] = []
+    for i in order.tolist():
         scored.append(
             {
-                **c,
-                "score": float(final),
+                **candidates[i],
+                "score": float(final[i]),
                 "signals": {
-                    "tag_score": float(tscore),
-                    "visual_score": float(vscore),
-                    "u_tag": float(U_tag),
-                    "u_vis": float(U_vis),
-                    "u_total": float(U_total),
+                    "tag_score": float(tscore[i]),
+                    "visual_score": float(vscore[i]),
+                    "u_tag": float(U_tag[i]),
+                    "u_vis": float(U_vis[i]),
+                    "u_total": float(U_total[i]),
                     "temperature": float(T),
-                    "base_prob": float(base_prob),
-                    "min_cluster_distance": min_dist,
-                    "touch_count": touch_n,
-                    "touch_factor": float(touch_factor),
-                    "impression_count": impression_n,
-                    "impression_factor": float(impression_factor),
-                    "profile_score": float(profile_score),
-                    "dislike_count": dislike_n,
-                    "read_count": read_n,
+                    "base_prob": float(base_prob[i]),
+                    "min_cluster_distance": float(min_dist[i]) if has_dist[i] else None,
+                    "touch_count": int(touch_n[i]),
+                    "touch_factor": float(touch_factor[i]),
+                    "impression_count": int(impression_n[i]),
+                    "impression_factor": float(impression_factor[i]),
+                    "profile_score": float(profile_score[i]),
+                    "dislike_count": int(dislike_n[i]),
+                    "read_count": int(read_n[i]),
                 },
             }
         )
-    scored.sort(key=lambda x: float(x.get("score") or 0.0), reverse=True)
     out_items = [_item_from_eh(x, cfg) | {"signals": x.get("signals") or {}} for x in scored]
     return {
         "items": out_items,
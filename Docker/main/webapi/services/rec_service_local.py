@@ -3,66 +3,19 @@ import threading
 import time
 from typing import Any
 
+import numpy as np
+from hunterAgent.core.vector_codec import mix_work_visual, normalize_l2, project_dim
+from scipy import sparse
+
 from .db_service import query_rows
 from .recommend_profile_service import get_user_profile_vector
-from .search_service import _item_from_work
-
+from .search_service import _category_from_tags, _item_from_work, _prefer_ex
 
-def _parse_vector_text(text: str) -> list[float]:
-    s = str(text or "").strip()
-    if not s:
-        return []
-    if s.startswith("[") and s.endswith("]"):
-        s = s[1:-1]
-    out: list[float] = []
-    for part in [x.strip() for x in s.split(",") if x.strip()]:
-        try:
-            out.append(float(part))
-        except Exception:
-            continue
-    return out
-
-
-def _normalize_l2(vec: list[float]) -> list[float]:
-    if not vec:
-        return []
-    s = 0.0
-    for x in vec:
-        s += float(x) * float(x)
-    if s <= 0:
-        return []
-    inv = 1.0 / math.sqrt(s)
-    return [float(x) * inv for x in vec]
-
-
-def _mix_work_visual(cover_vec: list[float], page_vec: list[float]) -> list[float]:
-    c = list(cover_vec or [])
-    p = list(page_vec or [])
-    if c and p and len(c) == len(p):
-        return _normalize_l2([(0.6 * float(c[i]) + 0.4 * float(p[i])) for i in range(len(c))])
-    if c:
-        return _normalize_l2(c)
-    if p:
-        return _normalize_l2(p)
-    return []
-
-
-def _cosine(a: list[float], b: list[float]) -> float:
-    n = min(len(a), len(b))
-    if n <= 0:
-        return 0.0
-    dot = 0.0
-    na = 0.0
-    nb = 0.0
-    for i in range(n):
-        av = float(a[i])
-        bv = float(b[i])
-        dot += av * bv
-        na += av * av
-        nb += bv * bv
-    if na <= 0 or nb <= 0:
-        return 0.0
-    return float(dot / math.sqrt(na * nb))
+# Profile vectors are 1024-dim; work vectors are truncated to match before normalising,
+# which is what the scalar cosine did per row.
+_LIBRARY_DIM = 1024
+_LIBRARY_REFRESH_MIN_S = 30.0
+_LIBRARY_FETCH_CHUNK = 1000
 
 
 def _tag_profile_scores() -> dict[str, float]:
@@ -86,15 +39,183 @@ def _tag_profile_scores() -> dict[str, float]:
     return {k: math.log1p(float(v)) / math.log1p(float(mx)) for k, v in counts.items()}
 
 
-def build_local_recommendation_items(
-    cfg: dict[str, Any],
-    *,
-    user_id: str = "default_user",
-    sort_order: str = "desc",
+def _empty_library() -> dict[str, Any]:
+    return {
+        "checked_at": 0.0,
+        "version": 0,
+        "arcids": [],
+        "sig": {},
+        "rows": [],
+        "filter_keys": [],
+        "tag_ids": [],
+        "vocab": {},
+        "tag_index": sparse.csr_matrix((0, 0)),
+        "matrix": np.zeros((0, _LIBRARY_DIM), dtype=np.float32),
+        "has_vec": np.zeros(0, dtype=bool),
+    }
+
+
+_library_lock = threading.Lock()
+_library_refresh_lock = threading.Lock()
+_library: dict[str, Any] = _empty_library()
+_library_dirty: set[str] = set()
+
+
+def mark_local_work_dirty(arcid: str) -> None:
+    """Force a work's vectors to be reloaded on the next library refresh."""
+    key = str(arcid or "").strip()
+    if not key:
+        return
+    with _library_lock:
+        _library_dirty.add(key)
+
+
+def _work_vector(row: dict[str, Any]) -> np.ndarray | None:
+    vec = mix_work_visual(row.get("cover_vec"), row.get("page_vec"))
+    if not vec.size or not np.any(vec):
+        return None
+    return normalize_l2(project_dim(vec, _LIBRARY_DIM))
+
+
+def _tag_matrix(tag_ids: list[list[int]], width: int) -> sparse.csr_matrix:
+    indptr = np.zeros(len(tag_ids) + 1, dtype=np.int64)
+    if tag_ids:
+        indptr[1:] = np.cumsum([len(x) for x in tag_ids])
+    indices = np.fromiter((i for ids in tag_ids for i in ids), dtype=np.int64, count=int(indptr[-1]))
+    return sparse.csr_matrix((np.ones(indices.size), indices, indptr), shape=(len(tag_ids), width))
+
+
+def _apply_library_delta(
+    lib: dict[str, Any],
+    sigs: dict[str, tuple[Any, ...]],
+    fetched: dict[str, dict[str, Any]],
+    gone: set[str],
 ) -> dict[str, Any]:
+    keep = [i for i, a in enumerate(lib["arcids"]) if a not in gone]
+    keep_idx = np.asarray(keep, dtype=np.intp)
+    arcids = [lib["arcids"][i] for i in keep]
+    rows = [lib["rows"][i] for i in keep]
+    filter_keys = [lib["filter_keys"][i] for i in keep]
+    tag_ids = [lib["tag_ids"][i] for i in keep]
+    matrix = lib["matrix"][keep_idx]
+    has_vec = lib["has_vec"][keep_idx]
+    pos = {a: i for i, a in enumerate(arcids)}
+    vocab = dict(lib["vocab"])
+
+    added_vecs: list[np.ndarray] = []
+    added_has: list[bool] = []
+    for arcid, r in fetched.items():
+        tags = [str(x) for x in (r.get("tags") or [])]
+        meta = {
+            "arcid": arcid,
+            "title": r.get("title"),
+            "tags": tags,
+            "eh_posted": r.get("eh_posted"),
+            "date_added": r.get("date_added"),
+            "lastreadtime": r.get("lastreadtime"),
+            "category": r.get("category"),
+            "source_eh_url": r.get("source_eh_url"),
+            "source_ex_url": r.get("source_ex_url"),
+        }
+        # Same matching as the SQL filters (_filter_conds): category, then substrings of the full tag text.
+        category = r.get("category")
+        fkey = (
+            str(category) if category is not None else _category_from_tags(tags),
+            " ".join(x for x in (t.strip().lower() for t in tags) if x),
+        )
+        ids = [vocab.setdefault(t, len(vocab)) for t in tags if t.strip()]
+        vec = _work_vector(r)
+        i = pos.get(arcid)
+        if i is None:
+            arcids.append(arcid)
+            rows.append(meta)
+            filter_keys.append(fkey)
+            tag_ids.append(ids)
+            added_vecs.append(vec if vec is not None else np.zeros(_LIBRARY_DIM, dtype=np.float32))
+            added_has.append(vec is not None)
+            continue
+        rows[i] = meta
+        filter_keys[i] = fkey
+        tag_ids[i] = ids
+        matrix[i] = vec if vec is not None else 0.0
+        has_vec[i] = vec is not None
+    if added_vecs:
+        matrix = np.vstack([matrix, np.vstack(added_vecs)])
+        has_vec = np.concatenate([has_vec, np.asarray(added_has, dtype=bool)])
+
+    return {
+        "checked_at": lib["checked_at"],
+        "version": int(lib["version"]) + 1,
+        "arcids": arcids,
+        "sig": {a: sigs[a] for a in arcids if a in sigs},
+        "rows": rows,
+        "filter_keys": filter_keys,
+        "tag_ids": tag_ids,
+        "vocab": vocab,
+        "tag_index": _tag_matrix(tag_ids, len(vocab)),
+        "matrix": matrix,
+        "has_vec": has_vec,
+    }
+
+
+def _library_snapshot() -> dict[str, Any]:
+    global _library
+    with _library_refresh_lock:
+        with _library_lock:
+            lib = _library
+            dirty = set(_library_dirty)
+            _library_dirty.clear()
+        now = time.monotonic()
+        if not dirty and lib["checked_at"] and now - float(lib["checked_at"]) < _LIBRARY_REFRESH_MIN_S:
+            return lib
+        try:
+            # updated_at is bumped by trigger only when a vector changes (from any writer);
+            # the digest covers the metadata the snapshot keeps. LRR syncs touch neither.
+            sig_rows = query_rows(
+                "SELECT arcid, updated_at, "
+                "md5(row(title, tags, eh_posted, date_added, lastreadtime, "
+                "category, source_eh_url, source_ex_url)::text) AS meta_md5 "
+                "FROM works "
+                "WHERE visual_embedding IS NOT NULL OR page_visual_embedding IS NOT NULL"
+            )
+            sigs = {
+                str(r.get("arcid") or ""): (str(r.get("updated_at") or ""), str(r.get("meta_md5") or ""))
+                for r in sig_rows
+            }
+            old_sigs = lib["sig"]
+            changed = [a for a, s in sigs.items() if a in dirty or old_sigs.get(a) != s]
+            gone = {a for a in old_sigs if a not in sigs}
+            fetched: dict[str, dict[str, Any]] = {}
+            for i in range(0, len(changed), _LIBRARY_FETCH_CHUNK):
+                chunk = changed[i : i + _LIBRARY_FETCH_CHUNK]
+                for r in query_rows(
+                    "SELECT arcid, title, tags, eh_posted, date_added, lastreadtime, "
+                    "category, source_eh_url, source_ex_url, "
+                    "visual_embedding as cover_vec, page_visual_embedding as page_vec "
+                    "FROM works WHERE arcid = ANY(%s)",
+                    (chunk,),
+                    binary=True,
+                ):
+                    fetched[str(r.get("arcid") or "")] = r
+        except Exception:
+            with _library_lock:
+                _library_dirty.update(dirty)
+            raise
+        gone.update(a for a in changed if a not in fetched)
+        if fetched or gone:
+            lib = _apply_library_delta(lib, sigs, fetched, gone)
+        else:
+            lib = dict(lib)
+        lib["checked_at"] = now
+        with _library_lock:
+            _library = lib
+        return lib
+
+
+def _library_scores(lib: dict[str, Any], cfg: dict[str, Any], user_id: str) -> np.ndarray:
     tag_scores = _tag_profile_scores()
-    profile_vec = list(get_user_profile_vector(str(user_id or "default_user")) or [])
-    profile_vec = _normalize_l2(profile_vec)
+    profile_vec = normalize_l2(get_user_profile_vector(str(user_id or "default_user")))
+    has_profile = bool(profile_vec.size and np.any(profile_vec))
 
     tag_weight = max(0.0, float(cfg.get("REC_TAG_WEIGHT", 0.55)))
     visual_weight = max(0.0, float(cfg.get("REC_VISUAL_WEIGHT", 0.45)))
@@ -106,61 +227,149 @@ def build_local_recommendation_items(
     visual_weight /= total_w
     floor = max(0.0, min(0.4, float(cfg.get("REC_TAG_FLOOR_SCORE", 0.08))))
 
-    rows = query_rows(
-        "SELECT arcid, title, tags, eh_posted, date_added, lastreadtime, "
-        "visual_embedding::text as cover_vec, page_visual_embedding::text as page_vec "
-        "FROM works "
-        "WHERE visual_embedding IS NOT NULL OR page_visual_embedding IS NOT NULL"
-    )
-    scored: list[dict[str, Any]] = []
-    for r in rows:
-        tags = [str(x) for x in (r.get("tags") or []) if str(x).strip()]
-        tscore = float(sum(float(tag_scores.get(t, floor)) for t in tags) / len(tags)) if tags else float(floor)
-        vec = _mix_work_visual(_parse_vector_text(str(r.get("cover_vec") or "")), _parse_vector_text(str(r.get("page_vec") or "")))
-        vscore = 0.0
-        if profile_vec and vec:
-            vscore = max(0.0, min(1.0, (_cosine(profile_vec, vec) + 1.0) * 0.5))
-        score = (tag_weight * tscore) + (visual_weight * vscore)
-        scored.append({**r, "score": float(score)})
+    n = len(lib["arcids"])
+    tscore = np.full(n, float(floor))
+    tag_index = lib["tag_index"]
+    if n and lib["vocab"]:
+        weights = np.array([float(tag_scores.get(t, floor)) for t in lib["vocab"]])
+        counts = np.diff(tag_index.indptr)
+        has_tags = counts > 0
+        tscore[has_tags] = (tag_index @ weights)[has_tags] / counts[has_tags]
+
+    vscore = np.zeros(n)
+    if has_profile and n:
+        p = normalize_l2(project_dim(profile_vec, _LIBRARY_DIM))
+        sims = lib["matrix"] @ p
+        vscore = np.where(lib["has_vec"], np.clip((sims + 1.0) * 0.5, 0.0, 1.0), 0.0)
+    return (tag_weight * tscore) + (visual_weight * vscore)
+
+
+def _ranked_slice(scores: np.ndarray, idx: np.ndarray, start: int, stop: int | None, descending: bool) -> np.ndarray:
+    keys = -scores[idx] if descending else scores[idx]
+    m = int(keys.size)
+    stop_use = m if stop is None else min(int(stop), m)
+    start_use = max(0, int(start))
+    if start_use >= stop_use:
+        return np.zeros(0, dtype=np.intp)
+    cand = np.arange(m) if stop_use >= m else np.argpartition(keys, stop_use - 1)[:stop_use]
+    # Ties keep library order, as the stable sort over query rows used to.
+    order = cand[np.lexsort((cand, keys[cand]))]
+    return idx[order[start_use:stop_use]]
+
+
+def _filter_index(lib: dict[str, Any], categories: list[str], tags: list[str]) -> np.ndarray:
+    n = len(lib["arcids"])
+    if not categories and not tags:
+        return np.arange(n)
+    cats = set(categories)
+    out = [
+        i
+        for i, (cat, joined) in enumerate(lib["filter_keys"])
+        if (not cats or cat in cats) and all(t in joined for t in tags)
+    ]
+    return np.asarray(out, dtype=np.intp)
+
 
+def _page_payload(
+    lib: dict[str, Any],
+    scores: np.ndarray,
+    cfg: dict[str, Any],
+    *,
+    sort_order: str,
+    offset: int,
+    limit: int | None,
+    categories: list[str] | None,
+    tags: list[str] | None,
+) -> dict[str, Any]:
     rev = str(sort_order or "desc").strip().lower() != "asc"
-    scored.sort(key=lambda x: float(x.get("score") or 0.0), reverse=rev)
+    idx = _filter_index(lib, list(categories or []), list(tags or []))
+    stop = None if limit is None else int(offset) + int(limit)
+    picked = _ranked_slice(scores, idx, int(offset), stop, rev)
+    pex = _prefer_ex(cfg)
+    items = []
+    for i in picked.tolist():
+        s = float(scores[i])
+        items.append(_item_from_work({**lib["rows"][i], "score": s}, prefer_ex=pex) | {"signals": {"mode": "local_xp", "score": s}})
     return {
-        "items": [_item_from_work(x, cfg) | {"signals": {"mode": "local_xp", "score": float(x.get("score") or 0.0)}} for x in scored],
+        "items": items,
+        "matched": int(idx.size),
         "meta": {
             "mode": "local_xp_sort",
             "sort_order": "desc" if rev else "asc",
-            "total": len(scored),
+            "total": len(lib["arcids"]),
         },
     }
 
 
+def build_local_recommendation_items(
+    cfg: dict[str, Any],
+    *,
+    user_id: str = "default_user",
+    sort_order: str = "desc",
+) -> dict[str, Any]:
+    lib = _library_snapshot()
+    scores = _library_scores(lib, cfg, user_id)
+    payload = _page_payload(lib, scores, cfg, sort_order=sort_order, offset=0, limit=None, categories=None, tags=None)
+    return {"items": payload["items"], "meta": payload["meta"]}
+
+
 _local_cache_lock = threading.Lock()
-_local_cache: dict[str, Any] = {"built_at": 0.0, "key": "", "payload": {"items": [], "meta": {}}}
+_local_cache: dict[str, Any] = {"built_at": 0.0, "key": "", "version": -1, "scores": None}
 
 
-def get_local_recommendation_items_cached(cfg: dict[str, Any], *, user_id: str = "default_user", sort_order: str = "desc") -> dict[str, Any]:
+def _cached_library_scores(cfg: dict[str, Any], user_id: str) -> tuple[dict[str, Any], np.ndarray]:
     ttl = max(60, int(cfg.get("REC_CLUSTER_CACHE_TTL_S", 900)))
     key = "|".join(
         [
             str(user_id or "default_user"),
-            str(sort_order or "desc"),
             str(cfg.get("REC_TAG_WEIGHT")),
             str(cfg.get("REC_VISUAL_WEIGHT")),
             str(cfg.get("REC_TAG_FLOOR_SCORE")),
             str(cfg.get("REC_PROFILE_DAYS")),
         ]
     )
+    lib = _library_snapshot()
     now_t = time.time()
     with _local_cache_lock:
-        if _local_cache.get("key") == key and (now_t - float(_local_cache.get("built_at") or 0.0) <= ttl):
-            return {
-                "items": list((_local_cache.get("payload") or {}).get("items") or []),
-                "meta": dict((_local_cache.get("payload") or {}).get("meta") or {}),
-            }
-    payload = build_local_recommendation_items(cfg, user_id=user_id, sort_order=sort_order)
+        if (
+            _local_cache.get("key") == key
+            and _local_cache.get("version") == lib["version"]
+            and (now_t - float(_local_cache.get("built_at") or 0.0) <= ttl)
+        ):
+            return lib, _local_cache["scores"]
+    scores = _library_scores(lib, cfg, user_id)
     with _local_cache_lock:
         _local_cache["built_at"] = now_t
         _local_cache["key"] = key
-        _local_cache["payload"] = payload
-    return payload
+        _local_cache["version"] = lib["version"]
+        _local_cache["scores"] = scores
+    return lib, scores
+
+
+def get_local_recommendation_page(
+    cfg: dict[str, Any],
+    *,
+    user_id: str = "default_user",
+    sort_order: str = "desc",
+    offset: int = 0,
+    limit: int = 24,
+    categories: list[str] | None = None,
+    tags: list[str] | None = None,
+) -> dict[str, Any]:
+    lib, scores = _cached_library_scores(cfg, user_id)
+    return _page_payload(
+        lib,
+        scores,
+        cfg,
+        sort_order=sort_order,
+        offset=max(0, int(offset)),
+        limit=max(0, int(limit)),
+        categories=categories,
+        tags=tags,
+    )
+
+
+def get_local_recommendation_items_cached(cfg: dict[str, Any], *, user_id: str = "default_user", sort_order: str = "desc") -> dict[str, Any]:
+    lib, scores = _cached_library_scores(cfg, user_id)
+    payload = _page_payload(lib, scores, cfg, sort_order=sort_order, offset=0, limit=None, categories=None, tags=None)
+    return {"items": payload["items"], "meta": payload["meta"]}
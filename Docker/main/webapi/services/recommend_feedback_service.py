@@ -2,9 +2,7 @@ import re
 import threading
 from typing import Any
 
-import psycopg
-
-from .db_service import db_dsn, query_rows
+from .db_service import db_connection, db_dsn, execute, execute_many, query_rows
 from .recommend_profile_service import apply_feedback_events, clear_user_interactions, clear_user_profile
 
 _GALLERY_RE = re.compile(r"/g/(\d+)/([A-Za-z0-9]+)/")
@@ -19,7 +17,7 @@ def _ensure_action_types(dsn: str) -> None:
     with _ACTION_TYPES_LOCK:
         if _ACTION_TYPES_READY:
             return
-        with psycopg.connect(dsn) as conn:
+        with db_connection(dsn) as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     "DO $$ "
@@ -132,13 +130,10 @@ def record_recommend_click(*, user_id: str, gid: int | None, token: str, eh_url:
     if w > 10.0:
         w = 10.0
 
-    with psycopg.connect(dsn) as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                "INSERT INTO user_interactions(user_id, arcid, action_type, weight) VALUES (%s, %s, 'click', %s)",
-                (str(user_id or "default_user"), key, float(w)),
-            )
-        conn.commit()
+    execute(
+        "INSERT INTO user_interactions(user_id, arcid, action_type, weight) VALUES (%s, %s, 'click', %s)",
+        (str(user_id or "default_user"), key, float(w)),
+    )
     apply_feedback_events(str(user_id or "default_user"), [{"arcid": key, "action_type": "click", "weight": float(w)}])
     return {"ok": True, "recorded": True, "arcid": key}
 
@@ -169,13 +164,10 @@ def record_recommend_impressions(*, user_id: str, items: list[dict[str, Any]], w
         rows.append((str(user_id or "default_user"), key, float(w)))
     if not rows:
         return {"ok": True, "recorded": 0}
-    with psycopg.connect(dsn) as conn:
-        with conn.cursor() as cur:
-            cur.executemany(
-                "INSERT INTO user_interactions(user_id, arcid, action_type, weight) VALUES (%s, %s, 'impression', %s)",
-                rows,
-            )
-        conn.commit()
+    execute_many(
+        "INSERT INTO user_interactions(user_id, arcid, action_type, weight) VALUES (%s, %s, 'impression', %s)",
+        rows,
+    )
     apply_feedback_events(
         str(user_id or "default_user"),
         [{"arcid": arcid, "action_type": "impression", "weight": float(v)} for _, arcid, v in rows],
@@ -197,13 +189,10 @@ def record_recommend_dislike(*, user_id: str, gid: int | None, token: str, eh_ur
         w = 1.0
     if w > 10.0:
         w = 10.0
-    with psycopg.connect(dsn) as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                "INSERT INTO user_interactions(user_id, arcid, action_type, weight) VALUES (%s, %s, 'dislike', %s)",
-                (str(user_id or "default_user"), key, float(w)),
-            )
-        conn.commit()
+    execute(
+        "INSERT INTO user_interactions(user_id, arcid, action_type, weight) VALUES (%s, %s, 'dislike', %s)",
+        (str(user_id or "default_user"), key, float(w)),
+    )
     apply_feedback_events(str(user_id or "default_user"), [{"arcid": key, "action_type": "dislike", "weight": float(w)}])
     return {"ok": True, "recorded": True, "arcid": key}
 
@@ -1,57 +1,15 @@
-import math
 import re
 from typing import Any
 
-import psycopg
+import numpy as np
+from hunterAgent.core.vector_codec import mix_work_visual, normalize_l2, project_dim, to_vector
 from psycopg.rows import dict_row
 
-from .db_service import db_dsn
+from .db_service import db_connection, db_dsn, execute
 
 _KEY_RE = re.compile(r"^eh:(\d+):([a-zA-Z0-9]+)$")
 
 
-def _parse_vector_text(text: str) -> list[float]:
-    s = str(text or "").strip()
-    if not s:
-        return []
-    if s.startswith("[") and s.endswith("]"):
-        s = s[1:-1]
-    out: list[float] = []
-    for p in s.split(","):
-        v = str(p or "").strip()
-        if not v:
-            continue
-        try:
-            out.append(float(v))
-        except Exception:
-            continue
-    return out
-
-
-def _vector_literal(vec: list[float]) -> str:
-    return "[" + ",".join(f"{float(x):.8f}" for x in vec) + "]"
-
-
-def _normalize_l2(vec: list[float]) -> list[float]:
-    if not vec:
-        return []
-    s = 0.0
-    for x in vec:
-        s += float(x) * float(x)
-    if s <= 0:
-        return vec
-    inv = 1.0 / math.sqrt(s)
-    return [float(x) * inv for x in vec]
-
-
-def _project_1024(vec: list[float]) -> list[float]:
-    if len(vec) >= 1024:
-        return [float(x) for x in vec[:1024]]
-    if not vec:
-        return []
-    return [float(x) for x in vec] + [0.0] * (1024 - len(vec))
-
-
 def _feedback_alpha(action_type: str) -> float:
     t = str(action_type or "").strip().lower()
     if t == "click":
@@ -72,28 +30,16 @@ def _parse_key(key: str) -> tuple[int, str]:
     return int(m.group(1)), str(m.group(2) or "").strip()
 
 
-def _mix_visual_vectors(cover: list[float], page: list[float]) -> list[float]:
-    c = list(cover or [])
-    p = list(page or [])
-    if c and p and len(c) == len(p):
-        return _normalize_l2([(0.6 * float(c[i]) + 0.4 * float(p[i])) for i in range(len(c))])
-    if c:
-        return _normalize_l2(c)
-    if p:
-        return _normalize_l2(p)
-    return []
-
-
-def get_user_profile_vector(user_id: str) -> list[float]:
+def get_user_profile_vector(user_id: str) -> np.ndarray:
     dsn = db_dsn()
     if not dsn:
-        return []
-    with psycopg.connect(dsn, row_factory=dict_row) as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT base_vector::text AS vec FROM user_profiles WHERE user_id = %s LIMIT 1", (str(user_id or "default_user"),))
+        return to_vector(None)
+    with db_connection(dsn, row_factory=dict_row) as conn:
+        with conn.cursor(binary=True) as cur:
+            cur.execute("SELECT base_vector AS vec FROM user_profiles WHERE user_id = %s LIMIT 1", (str(user_id or "default_user"),))
             row = cur.fetchone() or {}
-    vec = _parse_vector_text(str(row.get("vec") or ""))
-    return vec if len(vec) == 1024 else []
+    vec = to_vector(row.get("vec"))
+    return vec if vec.size == 1024 else to_vector(None)
 
 
 def apply_feedback_events(user_id: str, events: list[dict[str, Any]]) -> None:
@@ -131,59 +77,55 @@ def apply_feedback_events(user_id: str, events: list[dict[str, Any]]) -> None:
         else:
             work_arcids.append(str(key).strip())
 
-    vec_map: dict[str, list[float]] = {}
-    with psycopg.connect(dsn, row_factory=dict_row) as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT base_vector::text AS vec FROM user_profiles WHERE user_id = %s LIMIT 1", (uid,))
+    vec_map: dict[str, np.ndarray] = {}
+    with db_connection(dsn, row_factory=dict_row) as conn:
+        with conn.cursor(binary=True) as cur:
+            cur.execute("SELECT base_vector AS vec FROM user_profiles WHERE user_id = %s LIMIT 1", (uid,))
             row = cur.fetchone() or {}
-            base = _parse_vector_text(str(row.get("vec") or ""))
-            if len(base) != 1024:
-                base = [0.0] * 1024
+            base = to_vector(row.get("vec"))
+            if base.size != 1024:
+                base = np.zeros(1024, dtype=np.float32)
 
             for gid, tok in gid_tok:
                 cur.execute(
-                    "SELECT cover_embedding::text AS vec FROM eh_works WHERE gid = %s AND token = %s LIMIT 1",
+                    "SELECT cover_embedding AS vec FROM eh_works WHERE gid = %s AND token = %s LIMIT 1",
                     (int(gid), str(tok)),
                 )
                 r = cur.fetchone() or {}
-                v = _project_1024(_parse_vector_text(str(r.get("vec") or "")))
-                if len(v) == 1024:
-                    vec_map[f"eh:{gid}:{tok.lower()}"] = _normalize_l2(v)
+                v = project_dim(r.get("vec"), 1024)
+                if v.size == 1024:
+                    vec_map[f"eh:{gid}:{tok.lower()}"] = normalize_l2(v)
 
             for arcid in work_arcids:
                 cur.execute(
-                    "SELECT visual_embedding::text AS cover_vec, page_visual_embedding::text AS page_vec "
+                    "SELECT visual_embedding AS cover_vec, page_visual_embedding AS page_vec "
                     "FROM works WHERE arcid = %s LIMIT 1",
                     (str(arcid),),
                 )
                 r = cur.fetchone() or {}
-                cover_v = _parse_vector_text(str(r.get("cover_vec") or ""))
-                page_v = _parse_vector_text(str(r.get("page_vec") or ""))
-                mixed = _mix_visual_vectors(cover_v, page_v)
-                v = _project_1024(mixed)
-                if len(v) == 1024 and any(abs(float(x)) > 1e-12 for x in v):
-                    vec_map[str(arcid).lower()] = _normalize_l2(v)
+                v = project_dim(mix_work_visual(r.get("cover_vec"), r.get("page_vec")), 1024)
+                if v.size == 1024 and bool(np.any(np.abs(v) > 1e-12)):
+                    vec_map[str(arcid).lower()] = normalize_l2(v)
 
             changed = False
             for e in valid_events:
                 key = str(e.get("arcid") or "").strip().lower()
                 vec = vec_map.get(key)
-                if not vec:
+                if vec is None:
                     continue
                 alpha = _feedback_alpha(str(e.get("action_type") or "")) * float(e.get("weight") or 1.0)
                 if alpha == 0.0:
                     continue
-                for i in range(1024):
-                    base[i] = float(base[i]) + alpha * float(vec[i])
+                base = base + np.float32(alpha) * vec
                 changed = True
 
             if not changed:
                 return
-            base = _normalize_l2(base)
+            base = normalize_l2(base)
             cur.execute(
                 "INSERT INTO user_profiles(user_id, base_vector, updated_at) VALUES (%s, %s::vector, now()) "
                 "ON CONFLICT (user_id) DO UPDATE SET base_vector = EXCLUDED.base_vector, updated_at = now()",
-                (uid, _vector_literal(base)),
+                (uid, base),
             )
         conn.commit()
 
@@ -196,12 +138,7 @@ def clear_user_interactions(user_id: str, action_types: tuple[str, ...] | list[s
     acts = [str(x or "").strip().lower() for x in (action_types or []) if str(x or "").strip()]
     if not acts:
         return 0
-    with psycopg.connect(dsn) as conn:
-        with conn.cursor() as cur:
-            cur.execute("DELETE FROM user_interactions WHERE user_id = %s AND action_type = ANY(%s)", (uid, acts))
-            deleted = int(cur.rowcount or 0)
-        conn.commit()
-    return deleted
+    return execute("DELETE FROM user_interactions WHERE user_id = %s AND action_type = ANY(%s)", (uid, acts))
 
 
 def clear_user_profile(user_id: str) -> int:
@@ -209,9 +146,4 @@ def clear_user_profile(user_id: str) -> int:
     if not dsn:
         return 0
     uid = str(user_id or "default_user")
-    with psycopg.connect(dsn) as conn:
-        with conn.cursor() as cur:
-            cur.execute("DELETE FROM user_profiles WHERE user_id = %s", (uid,))
-            deleted = int(cur.rowcount or 0)
-        conn.commit()
-    return deleted
+    return execute("DELETE FROM user_profiles WHERE user_id = %s", (uid,))
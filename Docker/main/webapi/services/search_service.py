@@ -1,91 +1,27 @@
-import hashlib
-import os
 import re
 import threading
 import time
-from datetime import datetime
-from difflib import SequenceMatcher
-from typing import Any
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable
 from urllib.parse import quote
 
+import numpy as np
 from fastapi import HTTPException
+from hunterAgent.core import ann_index
+from hunterAgent.core.vector_codec import to_vector
+from psycopg.rows import dict_row
 
 from ..core.config_values import as_bool as _as_bool
-from ..core.constants import THUMB_CACHE_DIR
+from ..core.runtime_state import search_channel_executor
 from .ai_provider import _extract_tags_by_llm, _llm_timeout_s, _provider_embedding
-from .config_service import ensure_dirs, resolve_config, _runtime_tzinfo
-from .db_service import query_rows
+from .config_service import resolve_config
+from .db_service import db_dsn, db_transaction, query_rows
+from .search_session_service import create_session, get_session, make_cursor, parse_cursor, session_depth
+from .tag_matcher import get_tag_matcher, title_similarity
 from .vision_service import _embed_image_siglip, _embed_text_siglip, _model_status
 
 
-def _thumb_cache_file(key: str):
-    digest = hashlib.sha256(str(key).encode("utf-8", errors="ignore")).hexdigest()
-    return THUMB_CACHE_DIR / f"{digest}.bin"
-
-
-def _cache_read(key: str) -> bytes | None:
-    p = _thumb_cache_file(key)
-    try:
-        if p.exists() and p.is_file() and p.stat().st_size > 0:
-            return p.read_bytes()
-    except Exception:
-        return None
-    return None
-
-
-def _cache_write(key: str, data: bytes) -> None:
-    if not data:
-        return
-    ensure_dirs()
-    p = _thumb_cache_file(key)
-    tmp = p.with_suffix(f".{time.time_ns()}.tmp")
-    try:
-        tmp.write_bytes(data)
-        os.replace(tmp, p)
-    except Exception:
-        try:
-            tmp.unlink(missing_ok=True)
-        except Exception:
-            pass
-        return
-
-
-def _thumb_cache_stats() -> dict[str, Any]:
-    ensure_dirs()
-    total = 0
-    count = 0
-    latest = 0.0
-    for p in THUMB_CACHE_DIR.glob("*.bin"):
-        try:
-            st = p.stat()
-            total += int(st.st_size)
-            count += 1
-            latest = max(latest, float(st.st_mtime))
-        except Exception:
-            continue
-    return {
-        "files": count,
-        "bytes": total,
-        "mb": round(total / (1024 * 1024), 2),
-        "latest_at": datetime.fromtimestamp(latest, tz=_runtime_tzinfo()).isoformat(timespec="seconds") if latest > 0 else "-",
-    }
-
-
-def _clear_thumb_cache() -> dict[str, Any]:
-    ensure_dirs()
-    deleted = 0
-    freed = 0
-    for p in THUMB_CACHE_DIR.glob("*.bin"):
-        try:
-            st = p.stat()
-            freed += int(st.st_size)
-            p.unlink(missing_ok=True)
-            deleted += 1
-        except Exception:
-            continue
-    return {"deleted": deleted, "freed_bytes": freed, "freed_mb": round(freed / (1024 * 1024), 2)}
-
-
 def _contains_cjk(s: str) -> bool:
     for ch in str(s or ""):
         o = ord(ch)
@@ -120,30 +56,13 @@ def _flatten_floats(values: Any) -> list[float]:
     return out
 
 
-def _vector_literal(vec: list[float]) -> str:
-    flat = _flatten_floats(vec)
-    return "[" + ",".join(repr(float(x)) for x in flat) + "]"
-
-
-def _parse_vector_text(text: str) -> list[float]:
-    s = str(text or "").strip()
-    if not s:
-        return []
-    if s.startswith("[") and s.endswith("]"):
-        s = s[1:-1]
-    if not s.strip():
-        return []
-    out: list[float] = []
-    for part in re.split(r"\s*,\s*", s.strip()):
-        if not part:
-            continue
-        try:
-            out.append(float(part))
-        except Exception:
-            continue
-    return out
+def _query_vector(vec: Any) -> np.ndarray:
+    if isinstance(vec, (list, tuple)):
+        return to_vector(_flatten_floats(vec))
+    return to_vector(vec)
 
 
+# Kept in sync with tags_source_url() in textIngest/schema.sql.
 def _extract_source_urls(tags: list[str]) -> tuple[str, str]:
     eh_url = ""
     ex_url = ""
@@ -169,18 +88,19 @@ def _prefer_ex(cfg: dict[str, Any]) -> bool:
     return ("exhentai.org" in base) and bool(cookie)
 
 
-def _prefer_link(eh_url: str, ex_url: str, cfg: dict[str, Any]) -> str:
+def _link_for(eh_url: str, ex_url: str, prefer_ex: bool) -> str:
     eh_u = str(eh_url or "").strip()
     ex_u = str(ex_url or "").strip()
-    if _prefer_ex(cfg):
+    if prefer_ex:
         if not ex_u and eh_u and "e-hentai.org" in eh_u:
             ex_u = eh_u.replace("https://e-hentai.org/", "https://exhentai.org/")
         return ex_u or eh_u
     return eh_u or ex_u
 
 
-def _category_from_tags(tags: list[str], fallback: str = "") -> str:
-    cat_set = {
+# Kept in sync with tags_category() in textIngest/schema.sql.
+_CATEGORY_SET = frozenset(
+    {
         "doujinshi",
         "manga",
         "image set",
@@ -192,6 +112,11 @@ def _category_from_tags(tags: list[str], fallback: str = "") -> str:
         "western",
         "misc",
     }
+)
+
+
+def _category_from_tags(tags: list[str], fallback: str = "") -> str:
+    cat_set = _CATEGORY_SET
     fb = str(fallback or "").strip().lower()
     if fb in cat_set:
         return fb
@@ -220,11 +145,18 @@ def _norm_epoch(v: Any) -> int | None:
     return n
 
 
-def _item_from_work(row: dict[str, Any], cfg: dict[str, Any] | None = None) -> dict[str, Any]:
+def _item_from_work(row: dict[str, Any], cfg: dict[str, Any] | None = None, *, prefer_ex: bool | None = None) -> dict[str, Any]:
     tags = [str(x) for x in (row.get("tags") or [])]
-    eh_url, ex_url = _extract_source_urls(tags)
-    cfg_use = cfg or resolve_config()[0]
-    category = _category_from_tags(tags)
+    # category/source_* are maintained by a works trigger; rows selected without them fall back to tags.
+    if row.get("category") is not None:
+        category = str(row.get("category") or "")
+        eh_url = str(row.get("source_eh_url") or "")
+        ex_url = str(row.get("source_ex_url") or "")
+    else:
+        category = _category_from_tags(tags)
+        eh_url, ex_url = _extract_source_urls(tags)
+    if prefer_ex is None:
+        prefer_ex = _prefer_ex(cfg or resolve_config()[0])
     return {
         "id": f"work:{str(row.get('arcid') or '')}",
         "source": "works",
@@ -235,7 +167,7 @@ def _item_from_work(row: dict[str, Any], cfg: dict[str, Any] | None = None) -> d
         "tags_translated": [],
         "eh_url": eh_url,
         "ex_url": ex_url,
-        "link_url": _prefer_link(eh_url, ex_url, cfg_use),
+        "link_url": _link_for(eh_url, ex_url, prefer_ex),
         "category": category,
         "thumb_url": f"/api/thumb/lrr/{quote(str(row.get('arcid') or ''), safe='')}",
         "reader_url": "",
@@ -249,8 +181,9 @@ def _item_from_work(row: dict[str, Any], cfg: dict[str, Any] | None = None) -> d
     }
 
 
-def _item_from_eh(row: dict[str, Any], cfg: dict[str, Any] | None = None) -> dict[str, Any]:
-    cfg_use = cfg or resolve_config()[0]
+def _item_from_eh(row: dict[str, Any], cfg: dict[str, Any] | None = None, *, prefer_ex: bool | None = None) -> dict[str, Any]:
+    if prefer_ex is None:
+        prefer_ex = _prefer_ex(cfg or resolve_config()[0])
     gid = int(row.get("gid") or 0)
     token = str(row.get("token") or "")
     eh_url = str(row.get("eh_url") or "")
@@ -267,7 +200,7 @@ def _item_from_eh(row: dict[str, Any], cfg: dict[str, Any] | None = None) -> dic
         "tags_translated": [str(x) for x in (row.get("tags_translated") or [])][:16],
         "eh_url": eh_url,
         "ex_url": ex_url,
-        "link_url": _prefer_link(eh_url, ex_url, cfg_use),
+        "link_url": _link_for(eh_url, ex_url, prefer_ex),
         "category": category,
         "thumb_url": f"/api/thumb/eh/{gid}/{quote(token, safe='')}",
         "reader_url": "",
@@ -297,15 +230,7 @@ def _tag_candidates(ttl_s: int = 900) -> list[str]:
         built = float(_tag_cache.get("built_at") or 0.0)
         if now_t - built <= ttl_s:
             return list(_tag_cache.get("tags") or [])
-    rows = query_rows(
-        "SELECT tag FROM ("
-        "SELECT unnest(tags) AS tag FROM works "
-        "UNION ALL "
-        "SELECT unnest(tags) AS tag FROM eh_works "
-        "UNION ALL "
-        "SELECT unnest(tags_translated) AS tag FROM eh_works"
-        ") x WHERE tag IS NOT NULL AND length(tag) > 0 GROUP BY tag ORDER BY count(*) DESC LIMIT 5000"
-    )
+    rows = query_rows("SELECT tag FROM tag_stats WHERE source = 'all' ORDER BY frequency DESC LIMIT 5000")
     tags = [str(r.get("tag") or "").strip() for r in rows if str(r.get("tag") or "").strip()]
     with _tag_cache_lock:
         _tag_cache["built_at"] = now_t
@@ -317,42 +242,12 @@ def _fuzzy_tags(query: str, threshold: float = 0.62, max_tags: int = 10) -> list
     tokens = _tokenize_query(query)
     if not tokens:
         return []
-    all_tags = _tag_candidates()
-    scored: dict[str, float] = {}
     th = max(0.2, min(1.0, float(threshold)))
-    for token in tokens:
-        if len(token) < 2:
-            continue
-        for tag in all_tags:
-            t = tag.lower()
-            if token in t or t in token:
-                scored[tag] = max(scored.get(tag, 0.0), 1.0)
-                continue
-            ratio = SequenceMatcher(None, token, t).ratio()
-            if ratio >= th:
-                scored[tag] = max(scored.get(tag, 0.0), ratio)
-    best = sorted(scored.items(), key=lambda kv: kv[1], reverse=True)
-    return [k for k, _ in best[: max(1, int(max_tags))]]
+    return get_tag_matcher(_tag_candidates()).match_tokens(tokens, th, max_tags)
 
 
 def _fuzzy_pick_tags(candidates: list[str], valid: list[str], threshold: float) -> list[str]:
-    out: list[str] = []
-    for c in candidates:
-        s = str(c or "").strip().lower()
-        if not s:
-            continue
-        best = ""
-        best_score = 0.0
-        for v in valid:
-            vv = str(v or "").strip().lower()
-            if not vv:
-                continue
-            sc = SequenceMatcher(None, s, vv).ratio()
-            if sc > best_score:
-                best = v
-                best_score = sc
-        if best and best_score >= float(threshold):
-            out.append(best)
+    out = get_tag_matcher(valid).best_matches(candidates, float(threshold))
     uniq: list[str] = []
     seen: set[str] = set()
     for t in out:
@@ -386,11 +281,7 @@ def _expand_tag_aliases(tags: list[str]) -> list[str]:
 
 def _hot_tags(limit: int = 1500, min_freq: int = 5) -> list[str]:
     rows = query_rows(
-        "SELECT tag FROM ("
-        "SELECT unnest(tags) AS tag FROM works "
-        "UNION ALL SELECT unnest(tags) AS tag FROM eh_works "
-        "UNION ALL SELECT unnest(tags_translated) AS tag FROM eh_works"
-        ") t GROUP BY tag HAVING count(*) >= %s ORDER BY count(*) DESC LIMIT %s",
+        "SELECT tag FROM tag_stats WHERE source = 'all' AND frequency >= %s ORDER BY frequency DESC LIMIT %s",
         (int(min_freq), int(limit)),
     )
     return [str(r.get("tag") or "").strip() for r in rows if str(r.get("tag") or "").strip()]
@@ -406,7 +297,7 @@ def _score_text_hit(title: str, query: str, tags: list[str], matched_tags: list[
         elif q in ttl:
             score += 1.2
         else:
-            score += SequenceMatcher(None, q, ttl).ratio() * 0.6
+            score += title_similarity(q, ttl) * 0.6
     if tags and matched_tags:
         tag_set = {str(x).lower() for x in tags}
         m = sum(1 for x in matched_tags if str(x).lower() in tag_set)
@@ -423,9 +314,8 @@ def _norm_words(values: list[str] | None) -> list[str]:
     return out
 
 
-def _item_passes_filters(item: dict[str, Any], include_categories: list[str], include_tags: list[str]) -> bool:
-    cats = _norm_words(include_categories)
-    tags_need = _norm_words(include_tags)
+def _item_passes_filters(item: dict[str, Any], cats: list[str], tags_need: list[str]) -> bool:
+    # Expects filters already normalized by _norm_words.
     if cats:
         cat = str(item.get("category") or "").strip().lower()
         if cat not in cats:
@@ -440,9 +330,149 @@ def _item_passes_filters(item: dict[str, Any], include_categories: list[str], in
 
 
 def _filter_items(items: list[dict[str, Any]], include_categories: list[str], include_tags: list[str]) -> list[dict[str, Any]]:
-    if not include_categories and not include_tags:
+    cats = _norm_words(include_categories)
+    tags_need = _norm_words(include_tags)
+    if not cats and not tags_need:
         return items
-    return [it for it in items if _item_passes_filters(it, include_categories, include_tags)]
+    return [it for it in items if _item_passes_filters(it, cats, tags_need)]
+
+
+def _like_escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _filter_conds(
+    include_categories: list[str] | None,
+    include_tags: list[str] | None,
+    *,
+    source: str = "works",
+    alias: str = "",
+) -> tuple[list[str], list[Any]]:
+    """SQL predicates for the category/tag filters on works or eh_works rows.
+
+    Categories match the precomputed work category (or tags_category() for EH rows,
+    which has an expression index). Each tag must be a substring of the row's tag
+    text: the trigram-indexed search_text LIKE narrows the rows and position()
+    drops hits that only occur in a title.
+    """
+    p = f"{alias}." if alias else ""
+    cats = _norm_words(include_categories)
+    tags_need = _norm_words(include_tags)
+    conds: list[str] = []
+    params: list[Any] = []
+    if cats:
+        conds.append(f"(tags_category({p}tags, {p}category) = ANY(%s))" if source == "eh" else f"({p}category = ANY(%s))")
+        params.append(cats)
+    if source == "eh":
+        tag_text = f"lower(array_to_string({p}tags, ' ') || ' ' || array_to_string({p}tags_translated, ' '))"
+    else:
+        tag_text = f"lower(array_to_string({p}tags, ' '))"
+    for t in tags_need:
+        conds.append(f"({p}search_text LIKE %s AND position(%s IN {tag_text}) > 0)")
+        params.extend([f"%{_like_escape(t)}%", t])
+    return conds, params
+
+
+def _and_conds(conds: list[str]) -> str:
+    return "".join(f" AND {c}" for c in conds)
+
+
+# Filtered vector searches start at this many hits per wanted row and multiply by it
+# until enough rows pass the filters, the candidates run out, or the ceiling is hit.
+_FILTERED_VECTOR_FETCH_FACTOR = 4
+_FILTERED_VECTOR_FETCH_MAX = 20000
+
+# Work columns _item_from_work reads; category/source_* come precomputed from the works trigger.
+_WORK_ITEM_COLS = "arcid, title, tags, eh_posted, date_added, lastreadtime, category, source_eh_url, source_ex_url"
+
+
+def _hydrate_ids(
+    ids: list[str],
+    cfg: dict[str, Any],
+    include_categories: list[str] | None = None,
+    include_tags: list[str] | None = None,
+) -> dict[str, dict[str, Any]]:
+    work_ids = [x.split(":", 1)[1] for x in ids if x.startswith("work:")]
+    fconds, fparams = _filter_conds(include_categories, include_tags)
+    work_rows = query_rows(
+        f"SELECT {_WORK_ITEM_COLS} FROM works WHERE arcid = ANY(%s){_and_conds(fconds)}",
+        (work_ids, *fparams),
+    ) if work_ids else []
+    eh_rows = _eh_rows_by_keys([x for x in ids if x.startswith("eh:")], include_categories, include_tags)
+    pex = _prefer_ex(cfg)
+    out: dict[str, dict[str, Any]] = {}
+    for r in work_rows:
+        it = _item_from_work(r, prefer_ex=pex)
+        out[str(it.get("id"))] = it
+    for r in eh_rows:
+        it = _item_from_eh(r, prefer_ex=pex)
+        out[str(it.get("id"))] = it
+    return out
+
+
+def _paged_result(
+    items: list[dict[str, Any]],
+    limit: int,
+    meta: dict[str, Any],
+    *,
+    offset: int = 0,
+    paginate: bool = True,
+    depth: int = 0,
+    fingerprint: str = "",
+) -> dict[str, Any]:
+    if not paginate:
+        return {"items": items[: int(limit)], "next_cursor": "", "has_more": False, "meta": meta}
+    ids = [str(it.get("id")) for it in items]
+    # A ranking that filled its depth was cut short; its last cursor re-runs the search deeper.
+    more = int(depth) > 0 and len(ids) >= int(depth)
+    sid = create_session(
+        ids,
+        {str(it.get("id")): float(it.get("score") or 0.0) for it in items},
+        meta,
+        more=more,
+        fingerprint=fingerprint,
+    )
+    page = items[int(offset) : int(offset) + int(limit)]
+    end = int(offset) + len(page)
+    next_cursor = make_cursor(sid, end) if end < len(ids) or (more and page) else ""
+    return {
+        "items": page,
+        "next_cursor": next_cursor,
+        "has_more": bool(next_cursor),
+        "meta": {**meta, "session": sid, "offset": int(offset)},
+    }
+
+
+def _search_session_page(cursor: str, limit: int, cfg: dict[str, Any], fingerprint: str = "") -> dict[str, Any] | None:
+    """Serve a page from a cached result session.
+
+    None when the session has expired, was cut at its depth, or was ranked for a
+    different endpoint or request (see search_fingerprint); the caller then searches afresh.
+    """
+    sid, offset = parse_cursor(cursor)
+    sess = get_session(sid)
+    if sess is None or str(sess.get("fingerprint") or "") != str(fingerprint or ""):
+        return None
+    if sess.get("more") and offset + int(limit) > len(sess.get("ids") or []):
+        return None
+    ids = list(sess.get("ids") or [])[offset : offset + int(limit)]
+    scores = sess.get("scores") or {}
+    hydrated = _hydrate_ids(ids, cfg)
+    items: list[dict[str, Any]] = []
+    for rid in ids:
+        it = hydrated.get(rid)
+        if it is None:
+            continue
+        it["score"] = float(scores.get(rid) or 0.0)
+        items.append(it)
+    end = offset + len(ids)
+    next_cursor = make_cursor(sid, end) if end < len(sess.get("ids") or []) or sess.get("more") else ""
+    return {
+        "items": items,
+        "next_cursor": next_cursor,
+        "has_more": bool(next_cursor),
+        "meta": {**(sess.get("meta") or {}), "session": sid, "offset": offset},
+    }
 
 
 def _search_text_non_llm(
@@ -452,69 +482,247 @@ def _search_text_non_llm(
     cfg: dict[str, Any],
     include_categories: list[str] | None = None,
     include_tags: list[str] | None = None,
+    *,
+    offset: int = 0,
+    paginate: bool = True,
+    fingerprint: str = "",
 ) -> dict[str, Any]:
+    depth = session_depth(limit, offset) if paginate else int(limit)
     fuzzy_threshold = float(cfg.get("SEARCH_TAG_FUZZY_THRESHOLD", 0.62))
     matched_tags = _fuzzy_tags(query, threshold=fuzzy_threshold)
-    like = f"%{str(query or '').strip()}%"
+    q = str(query or "").strip()
+    like = f"%{q}%"
+    pex = _prefer_ex(cfg)
     items: list[dict[str, Any]] = []
 
+    # Filters are part of the WHERE clause so LIMIT counts only rows that pass them.
     if scope in ("works", "both"):
+        fconds, fparams = _filter_conds(include_categories, include_tags)
         rows = query_rows(
-            "SELECT arcid, title, tags, eh_posted, date_added, lastreadtime "
+            f"SELECT {_WORK_ITEM_COLS} "
             "FROM works "
-            "WHERE (title ILIKE %s OR array_to_string(tags, ' ') ILIKE %s) "
-            "OR (tags && %s::text[]) "
-            "ORDER BY lastreadtime DESC NULLS LAST LIMIT %s",
-            (like, like, matched_tags or [""], int(limit * 3)),
+            f"WHERE (search_text LIKE lower(%s) OR (tags && %s::text[])){_and_conds(fconds)} "
+            "ORDER BY word_similarity(lower(%s), search_text) DESC, lastreadtime DESC NULLS LAST LIMIT %s",
+            (like, matched_tags or [""], *fparams, q, int(depth * 3)),
         )
         for r in rows:
             score = _score_text_hit(str(r.get("title") or ""), query, [str(x) for x in (r.get("tags") or [])], matched_tags)
-            items.append(_item_from_work({**r, "score": score}, cfg))
+            items.append(_item_from_work({**r, "score": score}, prefer_ex=pex))
 
     if scope in ("eh", "both"):
+        fconds, fparams = _filter_conds(include_categories, include_tags, source="eh")
         rows = query_rows(
             "SELECT gid, token, eh_url, ex_url, title, title_jpn, category, tags, tags_translated, posted, filecount "
             "FROM eh_works "
-            "WHERE (title ILIKE %s OR title_jpn ILIKE %s OR array_to_string(tags, ' ') ILIKE %s OR array_to_string(tags_translated, ' ') ILIKE %s) "
-            "OR (tags && %s::text[]) OR (tags_translated && %s::text[]) "
-            "ORDER BY posted DESC NULLS LAST LIMIT %s",
-            (like, like, like, like, matched_tags or [""], matched_tags or [""], int(limit * 3)),
+            "WHERE (search_text LIKE lower(%s) OR (tags && %s::text[]) OR (tags_translated && %s::text[]))"
+            f"{_and_conds(fconds)} "
+            "ORDER BY word_similarity(lower(%s), search_text) DESC, posted DESC NULLS LAST LIMIT %s",
+            (like, matched_tags or [""], matched_tags or [""], *fparams, q, int(depth * 3)),
         )
         for r in rows:
             tags_all = [str(x) for x in (r.get("tags") or [])] + [str(x) for x in (r.get("tags_translated") or [])]
             score = _score_text_hit(str(r.get("title") or r.get("title_jpn") or ""), query, tags_all, matched_tags)
-            items.append(_item_from_eh({**r, "score": score}, cfg))
+            items.append(_item_from_eh({**r, "score": score}, prefer_ex=pex))
 
     items.sort(key=lambda x: float(x.get("score") or 0.0), reverse=True)
     dedup: dict[str, dict[str, Any]] = {}
     for it in items:
         dedup[str(it.get("id"))] = it
-        if len(dedup) >= int(limit):
+        if len(dedup) >= int(depth):
             break
-    filtered = _filter_items(list(dedup.values()), include_categories or [], include_tags or [])
-    return {
-        "items": filtered[: int(limit)],
-        "next_cursor": "",
-        "has_more": False,
-        "meta": {
-            "mode": "text_search",
-            "llm_used": False,
-            "fuzzy_tags": matched_tags,
-            "scope": scope,
-            "filters": {"categories": include_categories or [], "tags": include_tags or []},
-        },
+    meta = {
+        "mode": "text_search",
+        "llm_used": False,
+        "fuzzy_tags": matched_tags,
+        "scope": scope,
+        "filters": {"categories": include_categories or [], "tags": include_tags or []},
     }
+    return _paged_result(list(dedup.values()), limit, meta, offset=offset, paginate=paginate, depth=depth, fingerprint=fingerprint)
+
+
+def _ann_channel(name: str, vec: Any, k: int, prefix: str) -> list[str] | None:
+    hits = ann_index.search(name, vec, k)
+    if hits is None:
+        return None
+    return [f"{prefix}:{key}" for key, _ in hits]
+
+
+def _eh_rows_by_keys(
+    ids: list[str],
+    include_categories: list[str] | None = None,
+    include_tags: list[str] | None = None,
+) -> list[dict[str, Any]]:
+    parts = [x.split(":", 2) for x in ids]
+    pairs = [(int(p[1]), p[2]) for p in parts if len(p) == 3 and p[1].isdigit() and p[2]]
+    if not pairs:
+        return []
+    fconds, fparams = _filter_conds(include_categories, include_tags, source="eh")
+    return query_rows(
+        "SELECT gid, token, eh_url, ex_url, title, title_jpn, category, tags, tags_translated, posted, filecount "
+        "FROM eh_works WHERE (gid, token) IN (SELECT * FROM unnest(%s::bigint[], %s::text[]))"
+        f"{_and_conds(fconds)}",
+        ([x[0] for x in pairs], [x[1] for x in pairs], *fparams),
+    )
+
+
+# An HNSW scan yields at most ef_search rows (default 40), and pgvector caps ef_search here.
+_HNSW_EF_SEARCH_MAX = 1000
+_pgvector_iterative_scan: bool | None = None
+
+
+def _has_iterative_scan(cur: Any) -> bool:
+    """Whether the installed pgvector (0.8.0+) supports hnsw.iterative_scan; checked once per process."""
+    global _pgvector_iterative_scan
+    if _pgvector_iterative_scan is None:
+        cur.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        row = cur.fetchone()
+        ver = str((row.get("extversion") if isinstance(row, dict) else row[0]) or "") if row else ""
+        _pgvector_iterative_scan = tuple(int(x) for x in re.findall(r"\d+", ver)[:3]) >= (0, 8, 0)
+    return _pgvector_iterative_scan
+
+
+def _set_ef_search(cur: Any, k: int) -> None:
+    k = int(k)
+    cur.execute("SELECT set_config('hnsw.ef_search', %s, true)", (str(max(40, min(_HNSW_EF_SEARCH_MAX, k))),))
+    if k <= _HNSW_EF_SEARCH_MAX:
+        return
+    # Past the ef_search cap a plain HNSW scan would silently stop at 1000 rows, which
+    # callers would read as an exhausted pool: keep scanning iteratively, or fall back
+    # to an exact scan on pgvector builds without iterative scans.
+    if _has_iterative_scan(cur):
+        cur.execute("SELECT set_config('hnsw.iterative_scan', 'strict_order', true)")
+        cur.execute("SELECT set_config('hnsw.max_scan_tuples', %s, true)", (str(max(20000, k * 4)),))
+    else:
+        cur.execute("SELECT set_config('enable_indexscan', 'off', true)")
+
+
+def _work_vector_sql(column: str) -> str:
+    """Top-K scan over one works vector column, shaped so its HNSW index can serve it."""
+    return (
+        f"SELECT arcid, ({column} <=> (%s)::vector) AS dist FROM works "
+        f"WHERE {column} IS NOT NULL "
+        f"ORDER BY {column} <=> (%s)::vector LIMIT %s"
+    )
+
+
+def _topk_rows(sql: str, params: tuple[Any, ...], k: int, deadline: float = 0.0) -> list[dict[str, Any]]:
+    """Run a vector top-K query; inside an NL channel the deadline bounds it via statement_timeout."""
+    if deadline:
+        return _channel_rows(deadline, sql, params, ef_search=int(k))
+    with db_transaction(row_factory=dict_row) as conn:
+        with conn.cursor() as cur:
+            _set_ef_search(cur, k)
+            cur.execute(sql, params)
+            return [dict(r) for r in (cur.fetchall() or [])]
+
+
+def _work_vector_hits(index_name: str, column: str, vec: Any, k: int, deadline: float = 0.0) -> list[tuple[str, float]]:
+    hits = ann_index.search(index_name, vec, k)
+    if hits is not None:
+        return hits
+    if not db_dsn():
+        return []
+    rows = _topk_rows(_work_vector_sql(column), (vec, vec, int(k)), k, deadline)
+    return [(str(r.get("arcid") or ""), float(r.get("dist") or 0.0)) for r in rows if str(r.get("arcid") or "")]
+
+
+def _eh_cover_hits(vec: Any, k: int) -> list[tuple[str, float]]:
+    """Nearest EH covers as ("gid:token", dist); filters are applied by the caller's row lookup."""
+    hits = ann_index.search("eh_cover", vec, k)
+    if hits is not None:
+        return hits
+    if not db_dsn():
+        return []
+    rows = _topk_rows(
+        "SELECT gid, token, (cover_embedding <=> (%s)::vector) AS dist FROM eh_works "
+        "WHERE cover_embedding IS NOT NULL "
+        "ORDER BY cover_embedding <=> (%s)::vector LIMIT %s",
+        (vec, vec, int(k)),
+        k,
+    )
+    return [(f"{int(r.get('gid') or 0)}:{str(r.get('token') or '')}", float(r.get("dist") or 0.0)) for r in rows]
+
+
+# Page hits read per wanted work in max-sim mode, so a work still surfaces when
+# several of another work's pages outrank its best one.
+_PAGE_HITS_PER_WORK = 4
+
+
+def _work_page_maxsim_hits(vec: Any, k: int, deadline: float = 0.0) -> list[tuple[str, float]]:
+    """Works ranked by their best-matching sampled page (max-sim over work_page_embeddings)."""
+    n = int(k) * _PAGE_HITS_PER_WORK
+    hits = ann_index.search("works_pages", vec, n)
+    if hits is not None:
+        pages = [(key.rpartition(":")[0], float(dist)) for key, dist in hits]
+    elif db_dsn():
+        rows = _topk_rows(
+            "SELECT arcid, (embedding <=> (%s)::vector) AS dist FROM work_page_embeddings "
+            "ORDER BY embedding <=> (%s)::vector LIMIT %s",
+            (vec, vec, n),
+            n,
+            deadline,
+        )
+        pages = [(str(r.get("arcid") or ""), float(r.get("dist") or 0.0)) for r in rows]
+    else:
+        return []
+    best: dict[str, float] = {}
+    for arcid, dist in pages:
+        if arcid and dist < best.get(arcid, float("inf")):
+            best[arcid] = dist
+    return sorted(best.items(), key=lambda kv: kv[1])[: int(k)]
+
+
+def _work_page_hits(vec: Any, k: int, cfg: dict[str, Any], deadline: float = 0.0) -> list[tuple[str, float]]:
+    hits = _work_vector_hits("works_page_visual", "page_visual_embedding", vec, k, deadline)
+    if not _as_bool(cfg.get("WORKS_PAGE_MAXSIM_ENABLED"), False):
+        return hits
+    # Works without per-page rows keep competing on their averaged page vector.
+    best = dict(hits)
+    for arcid, dist in _work_page_maxsim_hits(vec, k, deadline):
+        best[arcid] = min(dist, best.get(arcid, dist))
+    return sorted(best.items(), key=lambda kv: kv[1])[: int(k)]
+
+
+def _widening_vector_rows(
+    want: int,
+    filtered: bool,
+    hits: Callable[[int], tuple[list[str], bool]],
+    rows: Callable[[list[str]], list[dict[str, Any]]],
+) -> list[dict[str, Any]]:
+    """Look up rows for vector hits, widening the top-K until `want` rows pass the filters.
+
+    `hits(k)` returns the candidate keys and whether the candidate pool is exhausted;
+    `rows(keys)` applies the filters in SQL. Each key is looked up once.
+    """
+    fetch = int(want) * (_FILTERED_VECTOR_FETCH_FACTOR if filtered else 1)
+    seen: set[str] = set()
+    out: list[dict[str, Any]] = []
+    while True:
+        keys, exhausted = hits(fetch)
+        new = [x for x in keys if x not in seen]
+        seen.update(new)
+        if new:
+            out.extend(rows(new))
+        if not filtered or exhausted or len(out) >= int(want) or fetch >= _FILTERED_VECTOR_FETCH_MAX:
+            return out
+        fetch = min(_FILTERED_VECTOR_FETCH_MAX, fetch * _FILTERED_VECTOR_FETCH_FACTOR)
 
 
 def _search_by_visual_vector(
-    vec: list[float],
+    vec: Any,
     scope: str,
     limit: int,
     cfg: dict[str, Any],
     include_categories: list[str] | None = None,
     include_tags: list[str] | None = None,
+    *,
+    offset: int = 0,
+    paginate: bool = True,
+    fingerprint: str = "",
 ) -> dict[str, Any]:
-    vtxt = _vector_literal(vec)
+    depth = session_depth(limit, offset) if paginate else int(limit)
+    vtxt = _query_vector(vec)
+    pex = _prefer_ex(cfg)
     items: list[dict[str, Any]] = []
     work_cover_w = max(0.0, float(cfg.get("SEARCH_WORK_COVER_WEIGHT", 0.6) or 0.6))
     work_page_w = max(0.0, float(cfg.get("SEARCH_WORK_PAGE_WEIGHT", 0.4) or 0.4))
@@ -524,17 +732,44 @@ def _search_by_visual_vector(
         wp_sum = 1.0
     work_cover_w /= wp_sum
     work_page_w /= wp_sum
+    # Vector top-K cannot apply the filters, so filtered searches widen the top-K until
+    # the row lookups below, which filter in SQL, return enough rows.
+    filtered = bool(_norm_words(include_categories) or _norm_words(include_tags))
     if scope in ("works", "both"):
-        works_rows = query_rows(
-            "SELECT arcid, title, tags, eh_posted, date_added, lastreadtime, "
-            "(CASE WHEN visual_embedding IS NOT NULL THEN (visual_embedding <=> (%s)::vector) END) AS dist_cover, "
-            "(CASE WHEN page_visual_embedding IS NOT NULL THEN (page_visual_embedding <=> (%s)::vector) END) AS dist_page "
-            "FROM works "
-            "WHERE visual_embedding IS NOT NULL OR page_visual_embedding IS NOT NULL "
-            "ORDER BY LEAST(COALESCE(visual_embedding <=> (%s)::vector, 1e9), COALESCE(page_visual_embedding <=> (%s)::vector, 1e9)) "
-            "LIMIT %s",
-            (vtxt, vtxt, vtxt, vtxt, int(limit * 2)),
+        # Two index-backed top-K scans (cover, page) instead of ordering by LEAST(...),
+        # which no HNSW index can serve. The union contains every row the LEAST ordering
+        # would have returned; exact distances for both vectors come from one batched lookup.
+        k = int(depth * 2)
+
+        def _work_hits(n: int) -> tuple[list[str], bool]:
+            cover = _work_vector_hits("works_visual", "visual_embedding", vtxt, n)
+            page = _work_page_hits(vtxt, n, cfg)
+            keys = list(dict.fromkeys([a for a, _ in cover] + [a for a, _ in page]))
+            return keys, len(cover) < n and len(page) < n
+
+        fconds, fparams = _filter_conds(include_categories, include_tags)
+        page_dist = "(CASE WHEN page_visual_embedding IS NOT NULL THEN (page_visual_embedding <=> (%s)::vector) END)"
+        page_params: tuple[Any, ...] = (vtxt,)
+        if _as_bool(cfg.get("WORKS_PAGE_MAXSIM_ENABLED"), False):
+            # Max-sim: the closest sampled page wins; the averaged vector covers works without page rows.
+            page_dist = (
+                "COALESCE((SELECT min(p.embedding <=> (%s)::vector) FROM work_page_embeddings p "
+                f"WHERE p.arcid = works.arcid), {page_dist})"
+            )
+            page_params = (vtxt, vtxt)
+        works_rows = _widening_vector_rows(
+            int(depth),
+            filtered,
+            _work_hits,
+            lambda arcids: query_rows(
+                f"SELECT {_WORK_ITEM_COLS}, "
+                "(CASE WHEN visual_embedding IS NOT NULL THEN (visual_embedding <=> (%s)::vector) END) AS dist_cover, "
+                f"{page_dist} AS dist_page "
+                f"FROM works WHERE arcid = ANY(%s){_and_conds(fconds)}",
+                (vtxt, *page_params, arcids, *fparams),
+            ),
         )
+        work_items: list[dict[str, Any]] = []
         for r in works_rows:
             cover_sim = 0.0
             page_sim = 0.0
@@ -550,26 +785,35 @@ def _search_by_visual_vector(
                 score = page_sim
             else:
                 score = (work_cover_w * cover_sim) + (work_page_w * page_sim)
-            items.append(_item_from_work({**r, "score": score}, cfg))
+            work_items.append(_item_from_work({**r, "score": score}, prefer_ex=pex))
+        work_items.sort(key=lambda x: float(x.get("score") or 0.0), reverse=True)
+        items.extend(work_items[:k])
     if scope in ("eh", "both"):
-        eh_rows = query_rows(
-            "SELECT gid, token, eh_url, ex_url, title, title_jpn, category, tags, tags_translated, posted, filecount, "
-            "(cover_embedding <=> (%s)::vector) AS dist "
-            "FROM eh_works WHERE cover_embedding IS NOT NULL "
-            "ORDER BY cover_embedding <=> (%s)::vector LIMIT %s",
-            (vtxt, vtxt, int(limit)),
-        )
+        # The SQL fallback orders unfiltered so the HNSW scan is not starved by a WHERE
+        # it applies after the fact; filters run in the row lookup, as for the ANN index.
+        dist_by_key: dict[str, float] = {}
+
+        def _eh_hits(n: int) -> tuple[list[str], bool]:
+            hits = _eh_cover_hits(vtxt, n)
+            dist_by_key.update(hits)
+            return [f"eh:{key}" for key, _ in hits], len(hits) < n
+
+        eh_rows = [
+            {**r, "dist": dist_by_key.get(f"{int(r.get('gid') or 0)}:{str(r.get('token') or '')}")}
+            for r in _widening_vector_rows(
+                int(depth),
+                filtered,
+                _eh_hits,
+                lambda keys: _eh_rows_by_keys(keys, include_categories, include_tags),
+            )
+        ]
         for r in eh_rows:
             score = 1.0 / (1.0 + float(r.get("dist") or 0.0))
-            items.append(_item_from_eh({**r, "score": score}, cfg))
+            items.append(_item_from_eh({**r, "score": score}, prefer_ex=pex))
     items.sort(key=lambda x: float(x.get("score") or 0.0), reverse=True)
-    items = _filter_items(items, include_categories or [], include_tags or [])
-    return {
-        "items": items[: int(limit)],
-        "next_cursor": "",
-        "has_more": False,
-        "meta": {"mode": "image_search", "scope": scope, "filters": {"categories": include_categories or [], "tags": include_tags or []}},
-    }
+    items = items[: int(depth)]
+    meta = {"mode": "image_search", "scope": scope, "filters": {"categories": include_categories or [], "tags": include_tags or []}}
+    return _paged_result(items, limit, meta, offset=offset, paginate=paginate, depth=depth, fingerprint=fingerprint)
 
 
 def _scenario_weights(cfg: dict[str, Any], scenario: str) -> dict[str, float]:
@@ -616,6 +860,173 @@ def _rrf_merge_weighted(channels: dict[str, list[str]], weights: dict[str, float
     return [x for x, _ in sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[: int(topn)]]
 
 
+# Floor for the text channel, which can only start after tag extraction returns.
+_NL_TEXT_MIN_S = 2.0
+
+
+class _ChannelTimeout(Exception):
+    pass
+
+
+def _remaining_s(deadline: float) -> float:
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise _ChannelTimeout("deadline exceeded")
+    return left
+
+
+def _channel_rows(deadline: float, sql: str, params: tuple[Any, ...], *, ef_search: int = 0) -> list[dict[str, Any]]:
+    # statement_timeout lets Postgres abandon the query once the channel is past its deadline.
+    timeout_ms = max(1, int(_remaining_s(deadline) * 1000))
+    with db_transaction(row_factory=dict_row) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT set_config('statement_timeout', %s, true)", (str(timeout_ms),))
+            if ef_search:
+                _set_ef_search(cur, ef_search)
+            cur.execute(sql, params)
+            return [dict(r) for r in (cur.fetchall() or [])]
+
+
+def _work_ids(rows: list[dict[str, Any]]) -> list[str]:
+    return [f"work:{str(r.get('arcid') or '').strip()}" for r in rows if str(r.get("arcid") or "").strip()]
+
+
+def _eh_ids(rows: list[dict[str, Any]]) -> list[str]:
+    return [
+        f"eh:{int(r.get('gid') or 0)}:{str(r.get('token') or '').strip()}"
+        for r in rows
+        if int(r.get("gid") or 0) > 0 and str(r.get("token") or "").strip()
+    ]
+
+
+def _nl_tag_channel(q: str, cfg: dict[str, Any], ui_lang: str, deadline: float) -> tuple[list[str], list[str]]:
+    hot = _hot_tags(limit=1600, min_freq=5)
+    # A future cannot be cancelled once running, so the LLM call itself must end by the
+    # deadline or it keeps holding a search_channel_executor worker.
+    timeout_s = max(1, min(_llm_timeout_s(cfg), int(_remaining_s(deadline) + 0.999)))
+    llm_tags = _extract_tags_by_llm(q, cfg, hot, timeout_s=timeout_s)
+    final_tags = _fuzzy_pick_tags(llm_tags, hot, float(cfg.get("SEARCH_TAG_FUZZY_THRESHOLD", 0.62) or 0.62))
+    return llm_tags, _tags_for_ui_lang(_expand_tag_aliases(final_tags), ui_lang)
+
+
+def _nl_text_channel(
+    q: str,
+    scope: str,
+    include_categories: list[str],
+    filter_tags: list[str],
+    n: int,
+    deadline: float,
+) -> dict[str, list[str]]:
+    out: dict[str, list[str]] = {}
+    if scope in ("works", "both"):
+        fconds, fparams = _filter_conds(include_categories, filter_tags)
+        rows = _channel_rows(
+            deadline,
+            "SELECT arcid FROM works "
+            f"WHERE (search_text LIKE lower(%s) OR (tags && %s::text[])){_and_conds(fconds)} "
+            "ORDER BY word_similarity(lower(%s), search_text) DESC, lastreadtime DESC NULLS LAST LIMIT %s",
+            (f"%{q}%", filter_tags or [""], *fparams, q, int(n)),
+        )
+        out["text"] = _work_ids(rows)
+    if scope in ("eh", "both"):
+        fconds, fparams = _filter_conds(include_categories, filter_tags, source="eh")
+        rows = _channel_rows(
+            deadline,
+            "SELECT gid, token FROM eh_works "
+            "WHERE (search_text LIKE lower(%s) OR (tags && %s::text[]) OR (tags_translated && %s::text[]))"
+            f"{_and_conds(fconds)} "
+            "ORDER BY word_similarity(lower(%s), search_text) DESC, posted DESC NULLS LAST LIMIT %s",
+            (f"%{q}%", filter_tags or [""], filter_tags or [""], *fparams, q, int(n)),
+        )
+        out["eh_text"] = _eh_ids(rows)
+    return out
+
+
+def _nl_desc_channel(q: str, scope: str, n: int, cfg: dict[str, Any], deadline: float) -> dict[str, list[str]]:
+    if scope not in ("works", "both"):
+        return {}
+    emb_model = str(cfg.get("EMB_MODEL_CUSTOM") or cfg.get("EMB_MODEL") or "").strip()
+    emb_key = str(cfg.get("LLM_API_KEY") or "").strip()
+    timeout_s = max(1, min(_llm_timeout_s(cfg), int(_remaining_s(deadline) + 0.999)))
+    vec = _provider_embedding(str(cfg.get("LLM_API_BASE") or ""), emb_key, emb_model, q, timeout_s=timeout_s)
+    if not vec:
+        return {}
+    vtxt = _query_vector(vec)
+    ids = _ann_channel("works_desc", vtxt, int(n), "work")
+    if ids is None:
+        ids = _work_ids(
+            _channel_rows(
+                deadline,
+                "SELECT w.arcid FROM works w WHERE w.desc_embedding IS NOT NULL "
+                "ORDER BY w.desc_embedding <=> (%s)::vector LIMIT %s",
+                (vtxt, int(n)),
+                ef_search=int(n),
+            )
+        )
+    return {"desc": ids}
+
+
+def _nl_visual_channel(q: str, scope: str, n: int, cfg: dict[str, Any], deadline: float) -> dict[str, list[str]]:
+    model_id = str(cfg.get("SIGLIP_MODEL") or "google/siglip-so400m-patch14-384").strip()
+    vtxt = _query_vector(_embed_text_siglip(q, model_id))
+    out: dict[str, list[str]] = {}
+    if scope in ("works", "both"):
+        for name, index_name, column in (
+            ("visual", "works_visual", "visual_embedding"),
+            ("page_visual", "works_page_visual", "page_visual_embedding"),
+        ):
+            if name == "page_visual" and _as_bool(cfg.get("WORKS_PAGE_MAXSIM_ENABLED"), False):
+                out[name] = [f"work:{a}" for a, _ in _work_page_hits(vtxt, int(n), cfg, deadline)]
+                continue
+            ids = _ann_channel(index_name, vtxt, int(n), "work")
+            if ids is None:
+                ids = _work_ids(
+                    _channel_rows(
+                        deadline,
+                        f"SELECT arcid FROM works WHERE {column} IS NOT NULL "
+                        f"ORDER BY {column} <=> (%s)::vector LIMIT %s",
+                        (vtxt, int(n)),
+                        ef_search=int(n),
+                    )
+                )
+            out[name] = ids
+    if scope in ("eh", "both"):
+        ids = _ann_channel("eh_cover", vtxt, int(n), "eh")
+        if ids is None:
+            ids = _eh_ids(
+                _channel_rows(
+                    deadline,
+                    "SELECT gid, token FROM eh_works WHERE cover_embedding IS NOT NULL "
+                    "ORDER BY cover_embedding <=> (%s)::vector LIMIT %s",
+                    (vtxt, int(n)),
+                    ef_search=int(n),
+                )
+            )
+        out["eh_visual"] = ids
+    return out
+
+
+def _timed_channel(timings: dict[str, int], name: str, fn: Any, *args: Any) -> Any:
+    t0 = time.monotonic()
+    try:
+        return fn(*args)
+    finally:
+        timings[name] = int((time.monotonic() - t0) * 1000)
+
+
+def _await_channel(fut: Future, deadline: float, name: str, errors: list[str]) -> Any:
+    try:
+        return fut.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeoutError:
+        fut.cancel()
+        errors.append(f"{name}:timeout")
+    except _ChannelTimeout:
+        errors.append(f"{name}:timeout")
+    except Exception as e:
+        errors.append(f"{name}:{e}")
+    return None
+
+
 def _agent_nl_search(
     query: str,
     scope: str,
@@ -626,23 +1037,33 @@ def _agent_nl_search(
     include_tags: list[str],
     ui_lang: str = "zh",
     scenario: str = "plot",
+    offset: int = 0,
+    paginate: bool = True,
+    fingerprint: str = "",
 ) -> dict[str, Any]:
+    depth = session_depth(limit, offset) if paginate else int(limit)
     q = str(query or "").strip()
     if not q:
         return {"items": [], "next_cursor": "", "has_more": False, "meta": {"mode": "nl_search", "empty": True}}
 
-    hot = _hot_tags(limit=1600, min_freq=5)
+    # Channels run concurrently against one deadline; the text channel waits for tag
+    # extraction (it filters by the extracted tags) and the merge uses whatever finished.
+    timeout_s = max(1, int(cfg.get("SEARCH_NL_CHANNEL_TIMEOUT_S", 20) or 20))
+    t0 = time.monotonic()
+    deadline = t0 + timeout_s
+    n = max(30, int(depth) * 2)
+    timings: dict[str, int] = {}
+    errors: list[str] = []
+    ex = search_channel_executor
+    tag_f = ex.submit(_timed_channel, timings, "tag_extract", _nl_tag_channel, q, cfg, ui_lang, deadline)
+    desc_f = ex.submit(_timed_channel, timings, "desc_channel", _nl_desc_channel, q, scope, n, cfg, deadline)
+    visual_f = ex.submit(_timed_channel, timings, "visual_channel", _nl_visual_channel, q, scope, n, cfg, deadline)
+
     llm_tags: list[str] = []
     final_tags: list[str] = []
-    errors: list[str] = []
-    try:
-        llm_tags = _extract_tags_by_llm(q, cfg, hot)
-        final_tags = _fuzzy_pick_tags(llm_tags, hot, float(cfg.get("SEARCH_TAG_FUZZY_THRESHOLD", 0.62) or 0.62))
-    except Exception as e:
-        errors.append(f"tag_extract:{e}")
-        final_tags = []
-    final_tags = _expand_tag_aliases(final_tags)
-    final_tags = _tags_for_ui_lang(final_tags, ui_lang)
+    tag_res = _await_channel(tag_f, deadline, "tag_extract", errors)
+    if tag_res is not None:
+        llm_tags, final_tags = tag_res
 
     merged_tags: list[str] = []
     for t in list(include_tags or []) + list(final_tags or []):
@@ -653,113 +1074,36 @@ def _agent_nl_search(
     hard_filter = _as_bool(cfg.get("SEARCH_TAG_HARD_FILTER"), True)
     filter_tags = merged_tags if hard_filter else []
 
-    n = max(30, int(limit) * 2)
-    channels: dict[str, list[str]] = {"text": [], "eh_text": [], "desc": [], "visual": [], "page_visual": [], "eh_visual": []}
-    try:
-        if scope in ("works", "both"):
-            rows = query_rows(
-                "SELECT arcid FROM works "
-                "WHERE (title ILIKE %s OR array_to_string(tags, ' ') ILIKE %s) "
-                "OR (tags && %s::text[]) "
-                "ORDER BY lastreadtime DESC NULLS LAST LIMIT %s",
-                (f"%{q}%", f"%{q}%", filter_tags or [""], int(n)),
-            )
-            channels["text"] = [f"work:{str(r.get('arcid') or '').strip()}" for r in rows if str(r.get("arcid") or "").strip()]
-        if scope in ("eh", "both"):
-            rows = query_rows(
-                "SELECT gid, token FROM eh_works "
-                "WHERE (title ILIKE %s OR title_jpn ILIKE %s OR array_to_string(tags, ' ') ILIKE %s OR array_to_string(tags_translated, ' ') ILIKE %s) "
-                "OR (tags && %s::text[]) OR (tags_translated && %s::text[]) "
-                "ORDER BY posted DESC NULLS LAST LIMIT %s",
-                (f"%{q}%", f"%{q}%", f"%{q}%", f"%{q}%", filter_tags or [""], filter_tags or [""], int(n)),
-            )
-            channels["eh_text"] = [f"eh:{int(r.get('gid') or 0)}:{str(r.get('token') or '').strip()}" for r in rows if int(r.get("gid") or 0) > 0 and str(r.get("token") or "").strip()]
-    except Exception as e:
-        errors.append(f"text_channel:{e}")
+    # Text SQL is cheap; give it a short floor even when tag extraction used the whole budget.
+    text_deadline = max(deadline, time.monotonic() + _NL_TEXT_MIN_S)
+    text_f = ex.submit(_timed_channel, timings, "text_channel", _nl_text_channel, q, scope, include_categories, filter_tags, n, text_deadline)
 
-    try:
-        emb_model = str(cfg.get("EMB_MODEL_CUSTOM") or cfg.get("EMB_MODEL") or "").strip()
-        emb_key = str(cfg.get("LLM_API_KEY") or "").strip()
-        vec = _provider_embedding(str(cfg.get("LLM_API_BASE") or ""), emb_key, emb_model, q, timeout_s=_llm_timeout_s(cfg))
-        if vec:
-            vtxt = _vector_literal(vec)
-            if scope in ("works", "both"):
-                rows = query_rows(
-                    "SELECT w.arcid FROM works w WHERE w.desc_embedding IS NOT NULL "
-                    "ORDER BY w.desc_embedding <=> (%s)::vector LIMIT %s",
-                    (vtxt, int(max(30, limit * 2))),
-                )
-                channels["desc"] = [f"work:{str(r.get('arcid') or '').strip()}" for r in rows if str(r.get("arcid") or "").strip()]
-    except Exception as e:
-        errors.append(f"desc_channel:{e}")
-
-    try:
-        model_id = str(cfg.get("SIGLIP_MODEL") or "google/siglip-so400m-patch14-384").strip()
-        qv = _embed_text_siglip(q, model_id)
-        vtxt2 = _vector_literal(qv)
-        if scope in ("works", "both"):
-            rows = query_rows(
-                "SELECT arcid FROM works WHERE visual_embedding IS NOT NULL "
-                "ORDER BY visual_embedding <=> (%s)::vector LIMIT %s",
-                (vtxt2, int(n)),
-            )
-            channels["visual"] = [f"work:{str(r.get('arcid') or '').strip()}" for r in rows if str(r.get("arcid") or "").strip()]
-            rows = query_rows(
-                "SELECT arcid FROM works WHERE page_visual_embedding IS NOT NULL "
-                "ORDER BY page_visual_embedding <=> (%s)::vector LIMIT %s",
-                (vtxt2, int(n)),
-            )
-            channels["page_visual"] = [f"work:{str(r.get('arcid') or '').strip()}" for r in rows if str(r.get("arcid") or "").strip()]
-        if scope in ("eh", "both"):
-            rows = query_rows(
-                "SELECT gid, token FROM eh_works WHERE cover_embedding IS NOT NULL "
-                "ORDER BY cover_embedding <=> (%s)::vector LIMIT %s",
-                (vtxt2, int(n)),
-            )
-            channels["eh_visual"] = [f"eh:{int(r.get('gid') or 0)}:{str(r.get('token') or '').strip()}" for r in rows if int(r.get("gid") or 0) > 0 and str(r.get("token") or "").strip()]
-    except Exception as e:
-        errors.append(f"visual_channel:{e}")
+    channels: dict[str, list[str]] = {"text": [], "eh_text": [], "desc": [], "visual": [], "page_visual": [], "eh_visual": []}
+    for fut, dl, name in ((text_f, text_deadline, "text_channel"), (desc_f, deadline, "desc_channel"), (visual_f, deadline, "visual_channel")):
+        res = _await_channel(fut, dl, name, errors)
+        if res:
+            channels.update(res)
 
     weights = _scenario_weights(cfg, scenario)
-    ranked_ids = _rrf_merge_weighted(channels, weights, k=60, topn=max(int(limit) * 3, 60))
-    work_ids = [x.split(":", 1)[1] for x in ranked_ids if x.startswith("work:")]
-    eh_parts = [x.split(":", 2) for x in ranked_ids if x.startswith("eh:")]
-    eh_pairs = [(int(p[1]), p[2]) for p in eh_parts if len(p) == 3 and p[1].isdigit() and p[2]]
-    work_rows = query_rows(
-        "SELECT arcid, title, tags, eh_posted, date_added, lastreadtime FROM works WHERE arcid = ANY(%s)",
-        (work_ids or [""],),
-    ) if work_ids else []
-    eh_rows = query_rows(
-        "SELECT gid, token, eh_url, ex_url, title, title_jpn, category, tags, tags_translated, posted, filecount "
-        "FROM eh_works WHERE (gid, token) IN (SELECT * FROM unnest(%s::int[], %s::text[]))",
-        ([x[0] for x in eh_pairs] or [0], [x[1] for x in eh_pairs] or ["_"]),
-    ) if eh_pairs else []
-    wm = {f"work:{str(r.get('arcid') or '').strip()}": _item_from_work(r, cfg) for r in work_rows}
-    em = {f"eh:{int(r.get('gid') or 0)}:{str(r.get('token') or '').strip()}": _item_from_eh(r, cfg) for r in eh_rows}
-    ordered: list[dict[str, Any]] = []
-    for rid in ranked_ids:
-        it = wm.get(rid) or em.get(rid)
-        if it:
-            ordered.append(it)
-    items = _filter_items(ordered, include_categories, filter_tags)[: int(limit)]
-    return {
-        "items": items,
-        "next_cursor": "",
-        "has_more": False,
-        "meta": {
-            "mode": "nl_search",
-            "llm_used": True,
-            "llm_tags_raw": llm_tags,
-            "tags_extracted": final_tags,
-            "query": q,
-            "ui_lang": ui_lang,
-            "scenario": scenario,
-            "hard_filter": hard_filter,
-            "weights": weights,
-            "channels": {k: len(v) for k, v in channels.items()},
-            "errors": errors,
-        },
+    ranked_ids = _rrf_merge_weighted(channels, weights, k=60, topn=max(int(depth) * 3, 60))
+    hydrated = _hydrate_ids(ranked_ids, cfg, include_categories, filter_tags)
+    items = [hydrated[rid] for rid in ranked_ids if rid in hydrated][: int(depth)]
+    meta = {
+        "mode": "nl_search",
+        "llm_used": True,
+        "llm_tags_raw": llm_tags,
+        "tags_extracted": final_tags,
+        "query": q,
+        "ui_lang": ui_lang,
+        "scenario": scenario,
+        "hard_filter": hard_filter,
+        "weights": weights,
+        "channels": {k: len(v) for k, v in channels.items()},
+        "channel_ms": dict(timings),
+        "elapsed_ms": int((time.monotonic() - t0) * 1000),
+        "errors": errors,
     }
+    return _paged_result(items, limit, meta, offset=offset, paginate=paginate, depth=depth, fingerprint=fingerprint)
 
 
 def _uploaded_image_search(
@@ -773,6 +1117,9 @@ def _uploaded_image_search(
     visual_weight: float = 0.5,
     include_categories: list[str] | None = None,
     include_tags: list[str] | None = None,
+    offset: int = 0,
+    paginate: bool = True,
+    fingerprint: str = "",
 ) -> dict[str, Any]:
     if not body:
         raise HTTPException(status_code=400, detail="empty image")
@@ -784,6 +1131,7 @@ def _uploaded_image_search(
     if scope_use not in ("works", "eh", "both"):
         scope_use = "both"
     limit_use = max(1, min(500, int(limit or 24)))
+    depth = session_depth(limit_use, offset) if paginate else limit_use * 2
 
     model_id = str(cfg.get("SIGLIP_MODEL") or "google/siglip-so400m-patch14-384").strip()
     status = _model_status()
@@ -796,12 +1144,11 @@ def _uploaded_image_search(
     if not vec:
         raise HTTPException(status_code=500, detail="siglip produced empty vector")
 
-    visual_part = _search_by_visual_vector(vec, scope_use, limit_use * 2, cfg, include_categories=cats, include_tags=tags)
+    visual_part = _search_by_visual_vector(vec, scope_use, depth, cfg, include_categories=cats, include_tags=tags, paginate=False)
     q = str(query or "").strip()
     if not q:
-        visual_part["items"] = (visual_part.get("items") or [])[:limit_use]
-        visual_part["meta"] = {**(visual_part.get("meta") or {}), "uploaded": True, "query": ""}
-        return visual_part
+        meta = {**(visual_part.get("meta") or {}), "uploaded": True, "query": ""}
+        return _paged_result((visual_part.get("items") or [])[:depth], limit_use, meta, offset=offset, paginate=paginate, depth=depth, fingerprint=fingerprint)
 
     tw = max(0.0, float(text_weight or 0.0))
     vw = max(0.0, float(visual_weight or 0.0))
@@ -809,7 +1156,7 @@ def _uploaded_image_search(
         tw, vw = 0.5, 0.5
     sw = tw + vw
     tw, vw = tw / sw, vw / sw
-    text_part = _search_text_non_llm(q, scope_use, limit_use * 2, cfg, include_categories=cats, include_tags=tags)
+    text_part = _search_text_non_llm(q, scope_use, depth, cfg, include_categories=cats, include_tags=tags, paginate=False)
     merged: dict[str, dict[str, Any]] = {}
     for idx, it in enumerate(text_part.get("items") or []):
         key = str(it.get("id"))
@@ -826,16 +1173,12 @@ def _uploaded_image_search(
             row = dict(it)
             row["score"] = score
             merged[key] = row
-    items = sorted(merged.values(), key=lambda x: float(x.get("score") or 0.0), reverse=True)[:limit_use]
-    return {
-        "items": items,
-        "next_cursor": "",
-        "has_more": False,
-        "meta": {
-            "mode": "hybrid_search",
-            "uploaded": True,
-            "query": q,
-            "weights": {"text": round(tw, 4), "visual": round(vw, 4)},
-            "filters": {"categories": cats, "tags": tags},
-        },
+    items = sorted(merged.values(), key=lambda x: float(x.get("score") or 0.0), reverse=True)[:depth]
+    meta = {
+        "mode": "hybrid_search",
+        "uploaded": True,
+        "query": q,
+        "weights": {"text": round(tw, 4), "visual": round(vw, 4)},
+        "filters": {"categories": cats, "tags": tags},
     }
+    return _paged_result(items, limit_use, meta, offset=offset, paginate=paginate, depth=depth, fingerprint=fingerprint)
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+# A result session keeps the fused, filtered ranking of one search so later pages
+# only hydrate their own rows instead of re-running LLM/embedding/SQL retrieval.
+_SEARCH_SESSION_TTL_S = max(30.0, float(os.getenv("DATA_UI_SEARCH_SESSION_TTL_S", "900") or 900))
+_SEARCH_SESSION_MAX = max(16, int(os.getenv("DATA_UI_SEARCH_SESSION_MAX", "256") or 256))
+_SEARCH_SESSION_LOCK = threading.Lock()
+_SEARCH_SESSIONS: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+# Each ranking covers this many pages past the requested offset (at most
+# _SESSION_MAX_DEPTH rows ahead). A session that filled its depth may have more
+# matches; paging past its end re-runs the search from that offset.
+_SESSION_PAGES = 5
+_SESSION_MAX_DEPTH = 500
+
+
+def session_depth(limit: int, offset: int = 0) -> int:
+    lim = max(1, int(limit))
+    return max(0, int(offset)) + min(max(_SESSION_MAX_DEPTH, lim), lim * _SESSION_PAGES)
+
+
+def parse_cursor(cursor: str) -> tuple[str, int]:
+    sid, _, off = str(cursor or "").strip().rpartition(":")
+    try:
+        return sid, max(0, int(off))
+    except ValueError:
+        return "", 0
+
+
+def cursor_offset(cursor: str, fingerprint: str) -> int:
+    """Offset to re-run a search from; 0 when the cursor belongs to a different search."""
+    sid, offset = parse_cursor(cursor)
+    with _SEARCH_SESSION_LOCK:
+        entry = _SEARCH_SESSIONS.get(sid)
+    if entry is not None and str(entry.get("fingerprint") or "") != str(fingerprint or ""):
+        return 0
+    return offset
+
+
+def make_cursor(sid: str, offset: int) -> str:
+    return f"{sid}:{int(offset)}"
+
+
+def search_fingerprint(endpoint: str, params: dict[str, Any]) -> str:
+    """Digest of the endpoint and request parameters a session was ranked for."""
+    raw = json.dumps([str(endpoint), params], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def create_session(
+    ids: list[str],
+    scores: dict[str, float],
+    meta: dict[str, Any],
+    *,
+    more: bool = False,
+    fingerprint: str = "",
+) -> str:
+    sid = secrets.token_urlsafe(12)
+    entry = {
+        "ids": list(ids),
+        "scores": dict(scores),
+        "meta": dict(meta),
+        "more": bool(more),
+        "fingerprint": str(fingerprint or ""),
+        "deadline": time.monotonic() + _SEARCH_SESSION_TTL_S,
+    }
+    with _SEARCH_SESSION_LOCK:
+        _SEARCH_SESSIONS[sid] = entry
+        while len(_SEARCH_SESSIONS) > _SEARCH_SESSION_MAX:
+            _SEARCH_SESSIONS.popitem(last=False)
+    return sid
+
+
+def get_session(sid: str) -> dict[str, Any] | None:
+    if not sid:
+        return None
+    now = time.monotonic()
+    with _SEARCH_SESSION_LOCK:
+        entry = _SEARCH_SESSIONS.get(sid)
+        if entry is None:
+            return None
+        if float(entry.get("deadline") or 0.0) <= now:
+            _SEARCH_SESSIONS.pop(sid, None)
+            return None
+        entry["deadline"] = now + _SEARCH_SESSION_TTL_S
+        _SEARCH_SESSIONS.move_to_end(sid)
+        return entry
+
@@ -0,0 +1,145 @@
+"""In-memory LRU backed by an optional SQLite table under RUNTIME_DIR.
+
+Shared by the query-embedding and tag-extraction caches. Keys are strings,
+values are encoded to bytes for the disk tier, and entries may carry a TTL.
+"""
+
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+
+class SqliteLRU:
+    def __init__(
+        self,
+        name: str,
+        path: Path,
+        *,
+        mem_max: int,
+        disk_enabled: bool,
+        disk_max: int,
+        prune_every: int,
+        encode: Callable[[Any], bytes],
+        decode: Callable[[bytes], Any],
+        ttl_s: float = 0.0,
+    ) -> None:
+        self.name = name
+        self.path = path
+        self.mem_max = int(mem_max)
+        self.disk_enabled = bool(disk_enabled)
+        self.disk_max = int(disk_max)
+        self.prune_every = max(1, int(prune_every))
+        self.ttl_s = float(ttl_s)
+        self._encode = encode
+        self._decode = decode
+        self._mem_lock = threading.Lock()
+        # key -> (expires_at or 0 for no TTL, value)
+        self._mem: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._stats: dict[str, int] = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "disk_errors": 0}
+        self._disk_lock = threading.Lock()
+        self._disk_conn: sqlite3.Connection | None = None
+        self._disk_writes = 0
+
+    def _bump(self, name: str) -> None:
+        with self._mem_lock:
+            self._stats[name] = int(self._stats.get(name) or 0) + 1
+
+    def _mem_put(self, key: str, expires_at: float, value: Any) -> None:
+        with self._mem_lock:
+            self._mem[key] = (expires_at, value)
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.mem_max:
+                self._mem.popitem(last=False)
+
+    def _disk(self) -> sqlite3.Connection | None:
+        if not self.disk_enabled:
+            return None
+        if self._disk_conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, used_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_used_at ON cache_entries (used_at)")
+            conn.commit()
+            self._disk_conn = conn
+        return self._disk_conn
+
+    def get(self, key: str) -> Any | None:
+        now = time.time()
+        with self._mem_lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                if not hit[0] or hit[0] > now:
+                    self._mem.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return hit[1]
+                self._mem.pop(key, None)
+        try:
+            with self._disk_lock:
+                conn = self._disk()
+                row = (
+                    conn.execute("SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)).fetchone()
+                    if conn is not None
+                    else None
+                )
+                if row is not None and (not row[1] or float(row[1]) > now):
+                    conn.execute("UPDATE cache_entries SET used_at = ? WHERE key = ?", (now, key))
+                    conn.commit()
+                else:
+                    row = None
+            if row is not None:
+                value = self._decode(row[0])
+                self._mem_put(key, float(row[1] or 0), value)
+                self._bump("disk_hits")
+                return value
+        except Exception as e:
+            self._bump("disk_errors")
+            print(f"[{self.name}] disk read failed: {e}", file=sys.stderr)
+        self._bump("misses")
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        now = time.time()
+        expires_at = now + self.ttl_s if self.ttl_s > 0 else 0.0
+        self._mem_put(key, expires_at, value)
+        self._bump("stores")
+        try:
+            with self._disk_lock:
+                conn = self._disk()
+                if conn is None:
+                    return
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (key, value, used_at, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, self._encode(value), now, expires_at),
+                )
+                self._disk_writes += 1
+                if self._disk_writes % self.prune_every == 0:
+                    conn.execute("DELETE FROM cache_entries WHERE expires_at > 0 AND expires_at <= ?", (now,))
+                    conn.execute(
+                        "DELETE FROM cache_entries WHERE key IN ("
+                        "SELECT key FROM cache_entries ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                        (self.disk_max,),
+                    )
+                conn.commit()
+        except Exception as e:
+            self._bump("disk_errors")
+            print(f"[{self.name}] disk write failed: {e}", file=sys.stderr)
+
+    def stats(self) -> dict[str, Any]:
+        with self._mem_lock:
+            stats = dict(self._stats)
+            size = len(self._mem)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        out: dict[str, Any] = {**stats, "size": size, "max": self.mem_max}
+        if self.ttl_s > 0:
+            out["ttl_s"] = self.ttl_s
+        out["disk"] = self.disk_enabled
+        out["hit_rate"] = round((stats["hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return out
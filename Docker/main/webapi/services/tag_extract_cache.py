@@ -0,0 +1,52 @@
+"""Persistent cache for LLM tag extraction.
+
+Tag extraction runs at temperature 0, so its answer is fixed by the query, the
+model, the prompt and the allowed-tag set. Entries are keyed by a digest of
+those four and kept in an in-memory LRU backed by SQLite under RUNTIME_DIR.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any
+
+from ..core.constants import TAG_EXTRACT_CACHE_FILE
+from .sqlite_lru import SqliteLRU
+
+_cache = SqliteLRU(
+    "tag_extract_cache",
+    TAG_EXTRACT_CACHE_FILE,
+    mem_max=max(16, int(os.getenv("DATA_UI_TAG_EXTRACT_CACHE_MAX", "512") or 512)),
+    disk_enabled=str(os.getenv("DATA_UI_TAG_EXTRACT_CACHE_DISK", "1") or "1").strip().lower() in ("1", "true", "yes", "on"),
+    disk_max=max(100, int(os.getenv("DATA_UI_TAG_EXTRACT_CACHE_DISK_MAX", "20000") or 20000)),
+    prune_every=200,
+    encode=lambda tags: json.dumps(list(tags), ensure_ascii=False).encode("utf-8"),
+    decode=lambda raw: [str(x) for x in json.loads(raw)],
+    ttl_s=max(60.0, float(os.getenv("DATA_UI_TAG_EXTRACT_CACHE_TTL_S", "604800") or 604800)),
+)
+
+
+def tag_set_fingerprint(tags: list[str]) -> str:
+    # Order-insensitive: hot-tag ranking shifts with every ingest, the set rarely does.
+    payload = "\n".join(sorted({str(t) for t in tags}))
+    return hashlib.sha256(payload.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def tag_extract_cache_key(query: str, model_id: str, prompt: str, tag_fingerprint: str) -> str:
+    """Digest of the inputs; `query` must already be normalized, as sent to the model."""
+    prompt_hash = hashlib.sha256(str(prompt).encode("utf-8", errors="ignore")).hexdigest()
+    raw = json.dumps([str(query), str(model_id), prompt_hash, str(tag_fingerprint)], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def get_cached_tags(key: str) -> list[str] | None:
+    hit = _cache.get(key)
+    return list(hit) if hit is not None else None
+
+
+def put_cached_tags(key: str, tags: list[str]) -> None:
+    _cache.put(key, list(tags))
+
+
+def tag_extract_cache_stats() -> dict[str, Any]:
+    return _cache.stats()
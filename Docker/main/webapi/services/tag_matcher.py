@@ -0,0 +1,148 @@
+"""Fuzzy tag matching over a precomputed, lower-cased tag table.
+
+Scores are difflib.SequenceMatcher ratios, as search has always used. rapidfuzz's
+Indel ratio (2 * LCS / total length) never falls below that ratio, so a single
+batched cdist call prunes the table and only survivors are re-scored exactly.
+Substring hits are found through a character-bigram index instead of a scan.
+"""
+
+import threading
+from collections import OrderedDict
+from difflib import SequenceMatcher
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+# cdist cutoffs are floats on a 0..100 scale; keep exact-threshold ties as candidates.
+_CUTOFF_SLACK = 0.01
+_MATCHER_CACHE_SIZE = 4
+
+
+def _bigrams(s: str) -> set[str]:
+    return {s[i : i + 2] for i in range(len(s) - 1)}
+
+
+def _sm_ratio(a: str, b: str) -> float:
+    return SequenceMatcher(None, a, b).ratio()
+
+
+class TagMatcher:
+    def __init__(self, tags: list[str]) -> None:
+        self.tags = [str(t or "").strip() for t in tags]
+        self.norm = [t.lower() for t in self.tags]
+        self._live = [i for i, t in enumerate(self.norm) if t]
+        self._live_norm = [self.norm[i] for i in self._live]
+        self._index_lock = threading.Lock()
+        self._postings: dict[str, np.ndarray] | None = None
+        self._gram_counts = np.zeros(0, dtype=np.int64)
+        self._lengths = np.zeros(0, dtype=np.int64)
+        self._single: dict[str, list[int]] = {}
+
+    def _ensure_index(self) -> dict[str, np.ndarray]:
+        if self._postings is not None:
+            return self._postings
+        with self._index_lock:
+            if self._postings is not None:
+                return self._postings
+            postings: dict[str, list[int]] = {}
+            single: dict[str, list[int]] = {}
+            counts = np.zeros(len(self.norm), dtype=np.int64)
+            for i in self._live:
+                t = self.norm[i]
+                grams = _bigrams(t)
+                counts[i] = len(grams)
+                if not grams:
+                    single.setdefault(t, []).append(i)
+                for g in grams:
+                    postings.setdefault(g, []).append(i)
+            self._gram_counts = counts
+            self._lengths = np.asarray([len(t) for t in self.norm], dtype=np.int64)
+            self._single = single
+            self._postings = {g: np.asarray(ix, dtype=np.int64) for g, ix in postings.items()}
+            return self._postings
+
+    def substring_hits(self, token: str) -> set[int]:
+        """Indexes of tags that contain ``token`` or are contained in it."""
+        index = self._ensure_index()
+        hits: set[int] = set()
+        for ch in set(token):
+            hits.update(self._single.get(ch, []))
+        grams = _bigrams(token)
+        lists = [index[g] for g in grams if g in index]
+        if not lists:
+            return hits
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.norm))
+        # token in tag: the tag holds every bigram of the token.
+        cand = np.flatnonzero(shared >= len(grams)) if len(grams) == len(lists) else np.zeros(0, dtype=np.int64)
+        # tag in token: every bigram of the tag is one of the token's.
+        inner = np.flatnonzero((shared == self._gram_counts) & (self._gram_counts > 0) & (self._lengths <= len(token)))
+        for i in np.union1d(cand, inner):
+            t = self.norm[int(i)]
+            if token in t or t in token:
+                hits.add(int(i))
+        return hits
+
+    def _ratio_candidates(self, queries: list[str], threshold: float) -> list[list[int]]:
+        if not queries or not self._live_norm:
+            return [[] for _ in queries]
+        cutoff = max(0.0, float(threshold) * 100.0 - _CUTOFF_SLACK)
+        scores = process.cdist(queries, self._live_norm, scorer=fuzz.ratio, score_cutoff=cutoff, workers=-1)
+        return [[self._live[int(j)] for j in np.flatnonzero(row)] for row in scores]
+
+    def match_tokens(self, tokens: list[str], threshold: float, limit: int) -> list[str]:
+        """Tags that contain/are contained in a token or score >= threshold against it."""
+        queries = [t for t in tokens if len(t) >= 2]
+        scored: dict[int, float] = {}
+        for token, cands in zip(queries, self._ratio_candidates(queries, threshold)):
+            subs = self.substring_hits(token)
+            for i in sorted(subs.union(cands)):
+                if i in subs:
+                    scored[i] = 1.0
+                    continue
+                ratio = _sm_ratio(token, self.norm[i])
+                if ratio >= threshold:
+                    scored[i] = max(scored.get(i, 0.0), ratio)
+        best = sorted(scored.items(), key=lambda kv: kv[1], reverse=True)
+        return [self.tags[i] for i, _ in best[: max(1, int(limit))]]
+
+    def best_matches(self, queries: list[str], threshold: float) -> list[str]:
+        """Best-scoring tag per query (first one on ties), kept when it reaches threshold."""
+        qs = [str(q or "").strip().lower() for q in queries]
+        live = [q for q in qs if q]
+        out: list[str] = []
+        for q, cands in zip(live, self._ratio_candidates(live, threshold)):
+            best = -1
+            best_score = 0.0
+            for i in cands:
+                sc = _sm_ratio(q, self.norm[i])
+                if sc > best_score:
+                    best = i
+                    best_score = sc
+            if best >= 0 and best_score >= float(threshold):
+                out.append(self.tags[best])
+        return out
+
+
+_matcher_lock = threading.Lock()
+_matchers: "OrderedDict[int, tuple[tuple[str, ...], TagMatcher]]" = OrderedDict()
+
+
+def get_tag_matcher(tags: list[str]) -> TagMatcher:
+    key_tags = tuple(tags)
+    key = hash(key_tags)
+    with _matcher_lock:
+        hit = _matchers.get(key)
+        if hit is not None and hit[0] == key_tags:
+            _matchers.move_to_end(key)
+            return hit[1]
+    matcher = TagMatcher(list(key_tags))
+    with _matcher_lock:
+        _matchers[key] = (key_tags, matcher)
+        _matchers.move_to_end(key)
+        while len(_matchers) > _MATCHER_CACHE_SIZE:
+            _matchers.popitem(last=False)
+    return matcher
+
+
+def title_similarity(a: str, b: str) -> float:
+    return float(fuzz.ratio(a, b)) / 100.0
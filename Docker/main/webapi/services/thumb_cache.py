@@ -0,0 +1,355 @@
+"""Size-capped thumbnail disk cache with an in-memory hot tier.
+
+Bodies stay in THUMB_CACHE_DIR as sha256-named .bin files; a SQLite index next
+to them records size, content type and last access per entry. Totals are kept
+in memory so stats never walk the directory, and a background thread evicts the
+least recently used entries once the cache passes its byte cap, as well as
+entries unused for longer than the TTL.
+
+Recently served bodies are also held in a byte-capped LRU keyed by digest, so
+scrolling back through a feed is answered without touching the index or disk.
+Everything except read_hot_thumb does blocking I/O; async callers go through
+run_blocking. File deletes and the legacy-directory import run outside _lock.
+"""
+
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from ..core.constants import THUMB_CACHE_DIR, THUMB_CACHE_INDEX_FILE
+from .config_service import _runtime_tzinfo, ensure_dirs
+
+_MAX_BYTES = max(16, int(os.getenv("DATA_UI_THUMB_CACHE_MAX_MB", "2048") or 2048)) * 1024 * 1024
+# Eviction trims to this share of the cap so it does not rerun on every write.
+_LOW_WATER = 0.9
+_TTL_S = max(0.0, float(os.getenv("DATA_UI_THUMB_CACHE_TTL_DAYS", "30") or 0)) * 86400.0
+_MAINTENANCE_INTERVAL_S = 300.0
+_EVICT_BATCH = 500
+
+_lock = threading.Lock()
+_conn: sqlite3.Connection | None = None
+_needs_import = False
+_totals: dict[str, Any] = {"files": 0, "bytes": 0, "latest": 0.0, "evicted": 0, "expired": 0}
+# Last-access times are buffered here and written by the maintenance pass. They have
+# their own lock so hot-tier hits never wait behind index work.
+_touch_lock = threading.Lock()
+_touched: dict[str, float] = {}
+_wake = threading.Event()
+_worker: threading.Thread | None = None
+
+_HOT_MAX_BYTES = max(0, int(os.getenv("DATA_UI_THUMB_HOT_MB", "64") or 0)) * 1024 * 1024
+# Larger bodies (odd upstream originals) would flush the tier; they stay disk-only.
+_HOT_ITEM_MAX_BYTES = 1024 * 1024
+_hot_lock = threading.Lock()
+_hot: OrderedDict[str, tuple[bytes, str]] = OrderedDict()
+_hot_totals: dict[str, int] = {"bytes": 0, "hits": 0}
+
+
+def _digest(key: str) -> str:
+    return hashlib.sha256(str(key).encode("utf-8", errors="ignore")).hexdigest()
+
+
+def _path(digest: str) -> Path:
+    return THUMB_CACHE_DIR / f"{digest}.bin"
+
+
+def _load_totals(conn: sqlite3.Connection) -> None:
+    # Caller holds _lock.
+    row = conn.execute("SELECT count(*), coalesce(sum(size), 0), coalesce(max(created_at), 0) FROM entries").fetchone()
+    _totals.update(files=int(row[0]), bytes=int(row[1]), latest=float(row[2]))
+
+
+def _import_existing() -> None:
+    # Adopt files written before the index existed; their mtime stands in for last access.
+    global _needs_import
+    rows = []
+    for p in THUMB_CACHE_DIR.glob("*.bin"):
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        rows.append((p.stem, int(st.st_size), "image/jpeg", float(st.st_mtime), float(st.st_mtime)))
+    with _lock:
+        conn = _index()
+        conn.executemany(
+            "INSERT OR IGNORE INTO entries (digest, size, content_type, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+        _load_totals(conn)
+        _needs_import = False
+
+
+def _index() -> sqlite3.Connection:
+    # Caller holds _lock.
+    global _conn, _needs_import
+    if _conn is None:
+        ensure_dirs()
+        conn = sqlite3.connect(str(THUMB_CACHE_INDEX_FILE), timeout=5.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "digest TEXT PRIMARY KEY, size INTEGER NOT NULL, content_type TEXT NOT NULL, "
+            "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)")
+        conn.commit()
+        # The directory walk happens on the maintenance thread, not under the caller's lock.
+        _needs_import = conn.execute("SELECT 1 FROM entries LIMIT 1").fetchone() is None
+        _load_totals(conn)
+        _conn = conn
+        _start_worker()
+        if _needs_import:
+            _wake.set()
+    return _conn
+
+
+def _drop(conn: sqlite3.Connection, rows: list[tuple[str, int]]) -> None:
+    # Caller holds _lock. Removes index entries only; the caller unlinks the files
+    # once the lock is released.
+    digests = [d for d, _ in rows]
+    conn.executemany("DELETE FROM entries WHERE digest = ?", [(d,) for d in digests])
+    conn.commit()
+    with _touch_lock:
+        for d in digests:
+            _touched.pop(d, None)
+    _hot_discard(digests)
+    _totals["files"] = max(0, int(_totals["files"]) - len(rows))
+    _totals["bytes"] = max(0, int(_totals["bytes"]) - sum(int(size) for _, size in rows))
+
+
+def _unlink(rows: list[tuple[str, int]]) -> None:
+    for digest, _ in rows:
+        try:
+            _path(digest).unlink(missing_ok=True)
+        except OSError as e:
+            print(f"[thumb_cache] unlink failed: {e}", file=sys.stderr)
+
+
+def _drop_batches(select_sql: str, params: tuple[Any, ...], counter: str, target: int = -1) -> None:
+    # One batch per lock hold so cache reads keep flowing during a large sweep.
+    while True:
+        with _lock:
+            conn = _index()
+            if target >= 0 and int(_totals["bytes"]) <= target:
+                return
+            rows = conn.execute(select_sql, (*params, _EVICT_BATCH)).fetchall()
+            if not rows:
+                return
+            _drop(conn, rows)
+            _totals[counter] += len(rows)
+        _unlink(rows)
+        if len(rows) < _EVICT_BATCH and target < 0:
+            return
+
+
+def _maintain() -> None:
+    if _needs_import:
+        _import_existing()
+    with _touch_lock:
+        touched = list(_touched.items())
+        _touched.clear()
+    with _lock:
+        conn = _index()
+        if touched:
+            conn.executemany("UPDATE entries SET last_access = ? WHERE digest = ?", [(t, d) for d, t in touched])
+            conn.commit()
+    if _TTL_S > 0:
+        _drop_batches(
+            "SELECT digest, size FROM entries WHERE last_access < ? LIMIT ?",
+            (time.time() - _TTL_S,),
+            "expired",
+        )
+    with _lock:
+        over = int(_totals["bytes"]) > _MAX_BYTES
+    if over:
+        _drop_batches(
+            "SELECT digest, size FROM entries ORDER BY last_access LIMIT ?",
+            (),
+            "evicted",
+            target=int(_MAX_BYTES * _LOW_WATER),
+        )
+
+
+def _maintenance_loop() -> None:
+    while True:
+        _wake.wait(_MAINTENANCE_INTERVAL_S)
+        _wake.clear()
+        try:
+            _maintain()
+        except Exception as e:
+            print(f"[thumb_cache] maintenance failed: {e}", file=sys.stderr)
+
+
+def _start_worker() -> None:
+    global _worker
+    if _worker is None:
+        _worker = threading.Thread(target=_maintenance_loop, name="thumb-cache-maintenance", daemon=True)
+        _worker.start()
+
+
+def _forget(digest: str) -> None:
+    with _lock:
+        conn = _index()
+        row = conn.execute("SELECT digest, size FROM entries WHERE digest = ?", (digest,)).fetchone()
+        if row is not None:
+            _drop(conn, [row])
+
+
+def _hot_put(digest: str, data: bytes, content_type: str) -> None:
+    if len(data) > min(_HOT_ITEM_MAX_BYTES, _HOT_MAX_BYTES):
+        return
+    with _hot_lock:
+        old = _hot.pop(digest, None)
+        if old is not None:
+            _hot_totals["bytes"] -= len(old[0])
+        _hot[digest] = (data, content_type)
+        _hot_totals["bytes"] += len(data)
+        while _hot_totals["bytes"] > _HOT_MAX_BYTES and _hot:
+            _, (old_data, _) = _hot.popitem(last=False)
+            _hot_totals["bytes"] -= len(old_data)
+
+
+def _hot_discard(digests: list[str]) -> None:
+    with _hot_lock:
+        for d in digests:
+            old = _hot.pop(d, None)
+            if old is not None:
+                _hot_totals["bytes"] -= len(old[0])
+
+
+def read_hot_thumb(key: str) -> tuple[bytes, str] | None:
+    """Memory-only lookup; never blocks on the index or disk, so it is safe on the event loop."""
+    digest = _digest(key)
+    with _hot_lock:
+        hot = _hot.get(digest)
+        if hot is None:
+            return None
+        _hot.move_to_end(digest)
+        _hot_totals["hits"] += 1
+    with _touch_lock:
+        _touched[digest] = time.time()
+    return hot
+
+
+def read_thumb(key: str) -> tuple[bytes, str] | None:
+    hot = read_hot_thumb(key)
+    if hot is not None:
+        return hot
+    digest = _digest(key)
+    try:
+        with _lock:
+            row = _index().execute("SELECT content_type FROM entries WHERE digest = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        data = _path(digest).read_bytes()
+    except FileNotFoundError:
+        _forget(digest)
+        return None
+    except Exception as e:
+        print(f"[thumb_cache] read failed: {e}", file=sys.stderr)
+        return None
+    if not data:
+        return None
+    with _touch_lock:
+        _touched[digest] = time.time()
+    ctype = str(row[0] or "image/jpeg")
+    _hot_put(digest, data, ctype)
+    return data, ctype
+
+
+def write_thumb(key: str, data: bytes, content_type: str = "image/jpeg") -> None:
+    if not data:
+        return
+    ensure_dirs()
+    digest = _digest(key)
+    _hot_put(digest, data, str(content_type or "image/jpeg"))
+    p = _path(digest)
+    tmp = p.with_suffix(f".{time.time_ns()}.tmp")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, p)
+    except Exception:
+        try:
+            tmp.unlink(missing_ok=True)
+        except Exception:
+            pass
+        return
+    now = time.time()
+    try:
+        with _lock:
+            conn = _index()
+            old = conn.execute("SELECT size FROM entries WHERE digest = ?", (digest,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (digest, size, content_type, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (digest, len(data), str(content_type or "image/jpeg"), now, now),
+            )
+            conn.commit()
+            _totals["files"] += 0 if old else 1
+            _totals["bytes"] += len(data) - (int(old[0]) if old else 0)
+            _totals["latest"] = now
+            over = int(_totals["bytes"]) > _MAX_BYTES
+    except Exception as e:
+        print(f"[thumb_cache] index write failed: {e}", file=sys.stderr)
+        return
+    if over:
+        _wake.set()
+
+
+def thumb_cache_stats() -> dict[str, Any]:
+    with _lock:
+        _index()
+        t = dict(_totals)
+    with _hot_lock:
+        hot_files = len(_hot)
+        hot = dict(_hot_totals)
+    total = int(t["bytes"])
+    latest = float(t["latest"])
+    return {
+        "files": int(t["files"]),
+        "bytes": total,
+        "mb": round(total / (1024 * 1024), 2),
+        "latest_at": datetime.fromtimestamp(latest, tz=_runtime_tzinfo()).isoformat(timespec="seconds") if latest > 0 else "-",
+        "max_mb": round(_MAX_BYTES / (1024 * 1024), 2),
+        "ttl_days": round(_TTL_S / 86400.0, 2),
+        "evicted": int(t["evicted"]),
+        "expired": int(t["expired"]),
+        "hot_files": hot_files,
+        "hot_mb": round(int(hot["bytes"]) / (1024 * 1024), 2),
+        "hot_max_mb": round(_HOT_MAX_BYTES / (1024 * 1024), 2),
+        "hot_hits": int(hot["hits"]),
+    }
+
+
+def clear_thumb_cache() -> dict[str, Any]:
+    global _needs_import
+    deleted = 0
+    freed = 0
+    with _lock:
+        conn = _index()
+        conn.execute("DELETE FROM entries")
+        conn.commit()
+        _needs_import = False
+        with _touch_lock:
+            _touched.clear()
+        _totals.update(files=0, bytes=0, latest=0.0)
+    with _hot_lock:
+        _hot.clear()
+        _hot_totals["bytes"] = 0
+    # Walk the directory rather than the index so stray files go too.
+    for p in THUMB_CACHE_DIR.glob("*.bin"):
+        try:
+            st = p.stat()
+            p.unlink(missing_ok=True)
+            freed += int(st.st_size)
+            deleted += 1
+        except Exception:
+            continue
+    return {"deleted": deleted, "freed_bytes": freed, "freed_mb": round(freed / (1024 * 1024), 2)}
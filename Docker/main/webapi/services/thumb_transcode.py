@@ -0,0 +1,44 @@
+"""Width-bucketed WebP variants for thumbnail responses.
+
+Cards are displayed far smaller than LRR thumbnails and EH covers, so thumbnail
+routes accept ?w= and serve a resized WebP instead. Requested widths snap up to a
+fixed bucket so each source has at most a handful of cached variants.
+"""
+
+import io
+import os
+import sys
+
+THUMB_WIDTHS = (240, 360, 480)
+_WEBP_QUALITY = min(100, max(30, int(os.getenv("DATA_UI_THUMB_WEBP_QUALITY", "80") or 80)))
+# Tall covers (long strips) keep at most this many widths of height.
+_MAX_ASPECT = 4
+
+
+def thumb_width_bucket(width: int | None) -> int:
+    w = int(width or 0)
+    if w <= 0:
+        return 0
+    for bucket in THUMB_WIDTHS:
+        if w <= bucket:
+            return bucket
+    return THUMB_WIDTHS[-1]
+
+
+def transcode_thumb(data: bytes, width: int) -> bytes | None:
+    """Resize to `width` (never upscaling) and encode as WebP; None if the source cannot be decoded."""
+    try:
+        from PIL import Image
+
+        with Image.open(io.BytesIO(data)) as src:
+            # Lets the JPEG decoder scale down by 1/2..1/8 before the real resize.
+            src.draft("RGB", (width, 1))
+            alpha = src.mode in ("RGBA", "LA") or (src.mode == "P" and "transparency" in src.info)
+            img = src.convert("RGBA" if alpha else "RGB")
+        img.thumbnail((width, width * _MAX_ASPECT), Image.LANCZOS)
+        out = io.BytesIO()
+        img.save(out, format="WEBP", quality=_WEBP_QUALITY, method=4)
+        return out.getvalue()
+    except Exception as e:
+        print(f"[thumb_transcode] transcode failed: {e}", file=sys.stderr)
+        return None
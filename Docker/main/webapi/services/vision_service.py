@@ -13,6 +13,7 @@ from typing import Any
 
 from ..core.constants import RUNTIME_DIR
 from ..core.runtime_state import model_dl_lock, model_dl_state
+from .embedding_cache import cached_embedding
 
 logger = logging.getLogger(__name__)
 
@@ -541,6 +542,10 @@ def _embed_text_siglip(text: str, model_id: str) -> list[float]:
     q = str(text or "").strip()
     if not q:
         return []
+    return cached_embedding(f"siglip:{model_id}", q, lambda s: _run_siglip_text(s, model_id))
+
+
+def _run_siglip_text(q: str, model_id: str) -> list[float]:
     try:
         import numpy as _np
     except Exception as e:
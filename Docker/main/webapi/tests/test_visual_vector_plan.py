@@ -0,0 +1,47 @@
+"""Opt-in plan check for the image-search top-K scans.
+
+Needs a database with the textIngest schema; set POSTGRES_DSN to run it:
+
+    POSTGRES_DSN=postgresql://... python -m pytest webapi/tests
+"""
+
+import os
+
+import pytest
+
+DSN = os.getenv("POSTGRES_DSN", "").strip()
+
+pytestmark = pytest.mark.skipif(not DSN, reason="POSTGRES_DSN not set")
+
+
+@pytest.mark.parametrize(
+    ("column", "index"),
+    [
+        ("visual_embedding", "idx_works_visual_vec"),
+        ("page_visual_embedding", "idx_works_page_visual_vec"),
+    ],
+)
+def test_work_vector_scan_uses_hnsw_index(column: str, index: str) -> None:
+    psycopg = pytest.importorskip("psycopg")
+    from webapi.services.search_service import _work_vector_sql
+
+    with psycopg.connect(DSN) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT format_type(a.atttypid, a.atttypmod) FROM pg_attribute a "
+                "WHERE a.attrelid = 'works'::regclass AND a.attname = %s",
+                (column,),
+            )
+            row = cur.fetchone()
+            assert row is not None, f"works.{column} is missing"
+            dims = int(str(row[0]).split("(", 1)[1].rstrip(")")) if "(" in str(row[0]) else 0
+            if dims <= 0:
+                pytest.skip(f"works.{column} has no fixed dimension")
+            vec = "[" + ",".join(["0.1"] * dims) + "]"
+            # A small test table would otherwise plan as seq scan + sort; this only
+            # checks that the query shape lets the planner use the index at all.
+            cur.execute("SET LOCAL enable_seqscan = off")
+            cur.execute("EXPLAIN " + _work_vector_sql(column), (vec, vec, 50))
+            plan = "\n".join(str(r[0]) for r in cur.fetchall())
+        conn.rollback()
+    assert index in plan, plan
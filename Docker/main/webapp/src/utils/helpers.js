@@ -78,3 +78,13 @@ export function parseCsv(raw) {
     .map((x) => x.trim())
     .filter(Boolean);
 }
+
+// Thumbnail routes resize to ?w= (snapped server-side to a few buckets), so cards
+// ask for their rendered width in device pixels instead of the full cover.
+export function thumbSrc(url, cssWidth = 240) {
+  const s = String(url || "");
+  if (!s.startsWith("/api/thumb/")) return s;
+  const dpr = typeof window !== "undefined" ? Math.min(3, Number(window.devicePixelRatio) || 1) : 1;
+  const w = Math.ceil(Number(cssWidth || 240) * dpr);
+  return `${s}${s.includes("?") ? "&" : "?"}w=${w}`;
+}